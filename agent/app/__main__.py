@@ -13,6 +13,7 @@ from a2a.types import (
 )
 from app.agent import AgentEvolution
 from app.agent_executor import EvolutionAgentExecutor
+from app.health import add_health_routes, mcp_probe
 from dotenv import load_dotenv
 
 from starlette.middleware.cors import CORSMiddleware  # Import CORSMiddleware
@@ -111,6 +112,9 @@ def main(host, port):
             agent_card=agent_card, http_handler=request_handler
         )
         starlette_app = server.build()
+        add_health_routes(starlette_app)
+        # The readiness probe keeps an HTTP client to the MCP server
+        starlette_app.add_event_handler('shutdown', mcp_probe.aclose)
         
         # Build the application and add CORS middleware
         starlette_app.add_middleware(
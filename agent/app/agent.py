@@ -10,8 +10,25 @@ from google.genai import types
 from google.adk.models.lite_llm import LiteLlm
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseConnectionParams
 import litellm
+
+from app.health import toolset_state
+
 litellm._turn_on_debug()
 
+
+class TrackedMCPToolset(MCPToolset):
+    """MCPToolset that reports its connection state to the readiness probe."""
+
+    async def get_tools(self, readonly_context=None):
+        try:
+            tools = await super().get_tools(readonly_context)
+        except Exception as e:
+            toolset_state.failed(e)
+            raise
+        toolset_state.connected(len(tools))
+        return tools
+
+
 class AgentEvolution:
     """
     AgentEvolution - an advanced AI agent with evolutionary capabilities.
@@ -40,7 +57,9 @@ class AgentEvolution:
         # Create a toolset without specific parameters for compatibility
         mcp_url = os.getenv('MCP_URL')
         if mcp_url:
-            toolset = MCPToolset(connection_params=SseConnectionParams(url=mcp_url))
+            toolset = TrackedMCPToolset(connection_params=SseConnectionParams(url=mcp_url))
+            # /readyz connects the toolset until it has listed its tools
+            toolset_state.attach(toolset.get_tools)
             tools = [toolset]
         else:
             tools = []
@@ -0,0 +1,164 @@
+"""Liveness and readiness endpoints of the agent.
+
+/healthz answers from memory. /readyz checks that the MCP server behind
+the agent's toolset is ready by calling that server's own /readyz, and that
+the toolset itself can connect to it: the agent's MCPToolset reports every
+connection attempt to toolset_state, and while it is not connected the
+probe makes it list its tools. The result is cached for a few seconds so
+frequent probes cost at most one check per interval.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+HEALTHY_BODY = b'{"status":"ok"}'
+# How long the result of an MCP server check is reused, seconds
+HEALTH_CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', '5'))
+HEALTH_TIMEOUT = float(os.getenv('HEALTH_TIMEOUT', '2'))
+
+
+def mcp_readiness_url(mcp_url: str | None) -> str | None:
+    """Return the /readyz URL of the server of an MCP endpoint URL."""
+    if not mcp_url:
+        return None
+    parts = urlsplit(mcp_url)
+    return f'{parts.scheme}://{parts.netloc}/readyz'
+
+
+class ToolsetState:
+    """Outcome of the last connection of the agent's MCP toolset."""
+
+    NOT_CONNECTED = 'not_connected'
+    CONNECTED = 'connected'
+    FAILED = 'failed'
+
+    def __init__(self):
+        self._connect: Callable[[], Awaitable[Sequence[Any]]] | None = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the last connection attempt."""
+        self.state = self.NOT_CONNECTED
+        self.tools = 0
+        self.error: str | None = None
+
+    def attach(self, connect: Callable[[], Awaitable[Sequence[Any]]]) -> None:
+        """Register the coroutine function that lists the toolset's tools."""
+        self._connect = connect
+
+    @property
+    def attached(self) -> bool:
+        return self._connect is not None
+
+    def connected(self, tools: int) -> None:
+        self.state = self.CONNECTED
+        self.tools = tools
+        self.error = None
+
+    def failed(self, error: BaseException) -> None:
+        self.state = self.FAILED
+        self.error = str(error) or type(error).__name__
+
+    async def connect(self, timeout: float = HEALTH_TIMEOUT) -> bool:
+        """Connect the toolset by listing its tools; return whether it worked."""
+        try:
+            tools = await asyncio.wait_for(self._connect(), timeout)
+        except Exception as e:
+            self.failed(e)
+            return False
+        self.connected(len(tools))
+        return True
+
+    def snapshot(self) -> dict:
+        return {'state': self.state, 'tools': self.tools, 'error': self.error}
+
+
+toolset_state = ToolsetState()
+
+
+class MCPProbe:
+    """Cached readiness check of the MCP server and the agent's toolset."""
+
+    def __init__(
+        self,
+        url: str | None,
+        ttl: float = HEALTH_CACHE_TTL,
+        toolset: ToolsetState = toolset_state,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.toolset = toolset
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._lock = asyncio.Lock()
+        self._checked = float('-inf')
+        self.mcp_ready = url is None
+
+    async def check(self) -> bool:
+        """Return whether the MCP server and the toolset passed their last check."""
+        if self.url is None:
+            # No toolset configured: nothing to wait for
+            return True
+        async with self._lock:
+            if time.monotonic() - self._checked >= self.ttl:
+                self.mcp_ready = await self._fetch()
+                if (
+                    self.mcp_ready
+                    and self.toolset.attached
+                    and self.toolset.state != ToolsetState.CONNECTED
+                ):
+                    await self.toolset.connect()
+                self._checked = time.monotonic()
+        return self.mcp_ready and self.toolset.state != ToolsetState.FAILED
+
+    async def _fetch(self) -> bool:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=HEALTH_TIMEOUT, transport=self.transport
+            )
+        try:
+            response = await self._client.get(self.url)
+        except httpx.HTTPError:
+            return False
+        return response.status_code == 200
+
+    async def aclose(self) -> None:
+        """Close the HTTP client of the probe."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+mcp_probe = MCPProbe(mcp_readiness_url(os.getenv('MCP_URL')))
+
+
+async def healthz(request: Request) -> Response:
+    """Liveness: the event loop answers."""
+    return Response(HEALTHY_BODY, media_type='application/json')
+
+
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness: 200 once the MCP server is ready and the toolset connects."""
+    ready = await mcp_probe.check()
+    return JSONResponse(
+        {
+            'ready': ready,
+            'mcp': mcp_probe.mcp_ready,
+            'toolset': mcp_probe.toolset.snapshot(),
+        },
+        status_code=200 if ready else 503,
+    )
+
+
+def add_health_routes(app) -> None:
+    """Register /healthz and /readyz on a Starlette app."""
+    app.add_route('/healthz', healthz, methods=['GET'])
+    app.add_route('/readyz', readyz, methods=['GET'])
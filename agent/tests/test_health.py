@@ -0,0 +1,121 @@
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+from unittest.mock import patch
+
+from app import health
+from app.health import MCPProbe, ToolsetState, add_health_routes, mcp_readiness_url
+
+pytestmark = pytest.mark.asyncio
+
+MCP_URL = "http://mcp-weather:8001/sse"
+
+
+def mcp_server(status_code: int, requests: list) -> httpx.MockTransport:
+    """Stub MCP server answering /readyz with the given status."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(status_code, json={"ready": status_code == 200})
+
+    return httpx.MockTransport(handler)
+
+
+def toolset(tools=None, error=None) -> ToolsetState:
+    """Toolset state whose connection returns `tools` or raises `error`."""
+    async def connect():
+        if error is not None:
+            raise error
+        return tools
+
+    state = ToolsetState()
+    state.attach(connect)
+    return state
+
+
+async def test_ready():
+    """
+    Tests that the probe calls the MCP server's /readyz and connects the toolset.
+    """
+    requests = []
+    probe = MCPProbe(
+        mcp_readiness_url(MCP_URL), ttl=60,
+        toolset=toolset(tools=["a", "b"]), transport=mcp_server(200, requests),
+    )
+
+    assert await probe.check() is True
+    assert requests == ["/readyz"]
+    assert probe.toolset.snapshot() == {"state": "connected", "tools": 2, "error": None}
+    await probe.aclose()
+
+
+async def test_not_ready():
+    """
+    Tests that an MCP server that is not ready fails the check without
+    connecting the toolset.
+    """
+    probe = MCPProbe(
+        mcp_readiness_url(MCP_URL), ttl=60,
+        toolset=toolset(tools=["a"]), transport=mcp_server(503, []),
+    )
+
+    assert await probe.check() is False
+    assert probe.toolset.state == ToolsetState.NOT_CONNECTED
+    await probe.aclose()
+
+
+async def test_toolset_cannot_connect():
+    """
+    Tests that a ready MCP server is not enough when the toolset fails to connect.
+    """
+    probe = MCPProbe(
+        mcp_readiness_url(MCP_URL), ttl=0,
+        toolset=toolset(error=ConnectionError("SSE handshake failed")),
+        transport=mcp_server(200, []),
+    )
+
+    assert await probe.check() is False
+    assert probe.toolset.snapshot()["state"] == "failed"
+    assert probe.toolset.snapshot()["error"] == "SSE handshake failed"
+    await probe.aclose()
+
+
+async def test_result_is_cached():
+    """
+    Tests that probes within the TTL reuse the last result.
+    """
+    requests = []
+    probe = MCPProbe(
+        mcp_readiness_url(MCP_URL), ttl=60,
+        toolset=ToolsetState(), transport=mcp_server(200, requests),
+    )
+    assert await probe.check() is True
+    assert await probe.check() is True
+    assert len(requests) == 1
+
+    probe.ttl = 0
+    assert await probe.check() is True
+    assert len(requests) == 2
+    await probe.aclose()
+
+
+async def test_readyz_endpoint():
+    """
+    Tests that /readyz reports the MCP server and toolset state.
+    """
+    app = Starlette()
+    add_health_routes(app)
+    probe = MCPProbe(
+        mcp_readiness_url(MCP_URL), ttl=60,
+        toolset=toolset(error=TimeoutError()), transport=mcp_server(200, []),
+    )
+    with patch.object(health, "mcp_probe", probe), TestClient(app) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json() == {
+            "ready": False,
+            "mcp": True,
+            "toolset": {"state": "failed", "tools": 0, "error": "TimeoutError"},
+        }
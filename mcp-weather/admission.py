@@ -0,0 +1,235 @@
+"""
+Admission control for the MCP weather server.
+
+ClientLimiter gives every client (SSE session or client id header) its own
+token bucket, so a burst from one agent cannot starve the others.
+UpstreamBudget is a global token bucket in front of Open-Meteo: requests
+wait in a bounded FIFO queue for a token and are rejected with an MCP error
+when the queue is full or the wait would be too long. Only requests that
+actually go upstream take from it, cache hits never do.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from mcp.shared.exceptions import McpError
+from mcp.types import ErrorData
+
+# Implementation-defined JSON-RPC server error codes (-32000..-32099)
+CLIENT_RATE_LIMITED = -32001
+UPSTREAM_BUSY = -32002
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, tokens: float = 1.0) -> bool:
+        """
+        Takes tokens if there are enough.
+
+        Args:
+            tokens: Number of tokens
+
+        Returns:
+            True if the tokens were taken
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Returns the number of seconds until `tokens` are available"""
+        self._refill()
+        missing = tokens - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class ClientLimiter:
+    """
+    Per-client token buckets.
+
+    Buckets of the least recently seen clients are dropped beyond
+    max_clients; a dropped client starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        """
+        Args:
+            rate: Tool calls per second per client, 0 disables the limit
+            burst: Bucket capacity
+            max_clients: Number of clients to remember
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets all clients and resets the counters"""
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self, client: Optional[Hashable], cost: float = 1.0) -> None:
+        """
+        Admits a call of a client.
+
+        Args:
+            client: Client key, None for calls from outside of a request
+            cost: Tokens the call takes
+
+        Raises:
+            McpError: CLIENT_RATE_LIMITED when the client's bucket is empty
+        """
+        if self.rate <= 0 or client is None:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+
+        # A call costing more than the burst is admitted on a full bucket
+        cost = min(cost, self.burst)
+        if bucket.try_take(cost):
+            self.admitted += 1
+            return
+
+        self.rejected += 1
+        retry_after = round(bucket.delay(cost), 1)
+        raise McpError(ErrorData(
+            code=CLIENT_RATE_LIMITED,
+            message=f"Too many requests, retry in {retry_after} s",
+            data={"retry_after": retry_after},
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of tracked clients and admission counters"""
+        return {
+            "clients": len(self._buckets),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamBudget:
+    """
+    Global rate budget for upstream requests with a bounded wait queue.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_queue: int = 100,
+        max_wait: float = 5.0
+    ):
+        """
+        Args:
+            rate: Upstream requests per second, 0 disables the budget
+            burst: Bucket capacity
+            max_queue: Maximum number of waiting requests
+            max_wait: Maximum time a request may wait, seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.reset()
+
+    def reset(self) -> None:
+        """Refills the bucket and resets the counters"""
+        self._bucket = TokenBucket(self.rate, self.burst) if self.rate > 0 else None
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def _busy(self, reason: str) -> McpError:
+        self.rejected += 1
+        return McpError(ErrorData(
+            code=UPSTREAM_BUSY,
+            message=f"Weather service is busy ({reason}), please retry later",
+            data={"retry_after": self.max_wait},
+        ))
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a token without waiting, for optional requests such as hedges.
+
+        Returns:
+            True if the request may be sent; False when no token is free or
+            other requests are already waiting for one
+        """
+        if self._bucket is None:
+            return True
+        if self.waiting == 0 and self._bucket.try_take():
+            self.admitted += 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """
+        Waits for a token to send one upstream request.
+
+        Raises:
+            McpError: UPSTREAM_BUSY when the queue is full or the wait
+                would exceed max_wait
+        """
+        if self._bucket is None:
+            return
+        if self.waiting == 0 and self._bucket.try_take():
+            self.admitted += 1
+            return
+        if self.waiting >= self.max_queue:
+            raise self._busy("queue is full")
+
+        self.waiting += 1
+        self.queued += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        try:
+            # The lock hands out tokens in arrival order
+            try:
+                await asyncio.wait_for(self._lock.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                raise self._busy("wait timed out") from None
+            try:
+                delay = self._bucket.delay()
+                if loop.time() + delay > deadline:
+                    raise self._busy("wait timed out")
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._bucket.try_take()
+                self.admitted += 1
+            finally:
+                self._lock.release()
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns queue length and admission counters"""
+        return {
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
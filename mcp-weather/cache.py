@@ -0,0 +1,596 @@
+"""
+In-process caches for the MCP weather server.
+
+TTLCache is a bounded LRU cache with per-entry expiry. Entries can be
+persisted through a SQLiteStore so that a restarted server starts warm.
+Expired entries may be kept for a while longer and read with get_stale().
+SQLiteCache has the same interface but keeps the entries in a SQLite
+database in WAL mode, so all worker processes on one host share them.
+SingleFlight coalesces concurrent identical upstream requests.
+"""
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional,
+    Tuple, TypeVar
+)
+
+T = TypeVar("T")
+
+# Returned by TTLCache.get() on a miss, so that None can be cached
+MISSING = object()
+
+
+class SQLiteStore:
+    """
+    Write-through persistence for cache entries in a local SQLite file.
+
+    Values are pickled, keys must be strings.
+    """
+
+    def __init__(self, path: str, table: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, limit: int) -> List[Tuple[str, Any, float]]:
+        """
+        Loads unexpired entries, the longest-living last.
+
+        Args:
+            limit: Maximum number of entries to load
+
+        Returns:
+            List of (key, value, expires_at)
+        """
+        now = time.time()
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,)
+        )
+        self._conn.commit()
+        rows = self._conn.execute(
+            f"SELECT key, value, expires_at FROM {self.table} "
+            "ORDER BY expires_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            (key, pickle.loads(value), expires_at)
+            for key, value, expires_at in reversed(rows)
+        ]
+
+    def put(self, key: str, value: Any, expires_at: float) -> None:
+        """Stores or replaces an entry"""
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) "
+            "VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at),
+        )
+        self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Removes an entry"""
+        self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def clear(self) -> None:
+        """Removes all entries"""
+        self._conn.execute(f"DELETE FROM {self.table}")
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Closes the database connection"""
+        self._conn.close()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry time-to-live.
+
+    Expired entries are dropped lazily on access once they are more than
+    max_stale seconds past their expiry; the least recently used entry is
+    evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        store: Optional[SQLiteStore] = None,
+        max_stale: float = 0.0
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._store = store
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        if store is not None:
+            self.attach_store(store)
+
+    def attach_store(self, store: Optional[SQLiteStore]) -> None:
+        """
+        Attaches (or detaches with None) persistent storage and loads
+        the stored entries into memory.
+
+        Args:
+            store: SQLite store to persist entries to
+        """
+        self._store = store
+        if store is None:
+            return
+        for key, value, expires_at in store.load(self.maxsize):
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns the cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or MISSING
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        value, expires_at = entry
+        now = time.time()
+        if expires_at <= now:
+            if expires_at + self.max_stale <= now:
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_stale(self, key: Hashable) -> Tuple[Any, float]:
+        """
+        Returns a value that may have expired less than max_stale seconds ago.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple[cached value or MISSING, seconds since expiry]
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING, 0.0
+
+        value, expires_at = entry
+        stale_for = time.time() - expires_at
+        if stale_for >= self.max_stale:
+            return MISSING, 0.0
+        if stale_for > 0:
+            self.stale_hits += 1
+        return value, max(stale_for, 0.0)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores a value.
+
+        Args:
+            key: Cache key
+            value: Value to store (may be None)
+            ttl: Time-to-live in seconds, the cache default if not given
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            self.evictions += 1
+            if self._store is not None:
+                self._store.delete(evicted)
+        if self._store is not None:
+            self._store.put(key, value, expires_at)
+
+    def delete(self, key: Hashable) -> None:
+        """Removes a value if present"""
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Removes all values and resets the counters"""
+        self._data.clear()
+        if self._store is not None:
+            self._store.clear()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.stale_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns cache counters.
+
+        Returns:
+            Dictionary with size, hits, misses, evictions and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.time()
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data))
+
+    def _remove(self, key: Hashable) -> None:
+        del self._data[key]
+        if self._store is not None:
+            self._store.delete(key)
+
+
+class SQLiteCache:
+    """
+    Bounded TTL cache shared between processes through SQLite in WAL mode.
+
+    Every read and write is a single atomic statement. The least recently
+    used entries are evicted once the table grows beyond maxsize; access
+    times are refreshed at most once per second to keep reads cheap.
+    Hit and miss counters are per process.
+
+    Statements run on the caller's thread, i.e. the event loop. Readers
+    never wait in WAL mode, but a writer waits for the write lock held by
+    another worker; so writes give up after busy_timeout and are skipped
+    (counted as skipped_writes) - a cache entry not stored is only a later
+    miss, while a blocked event loop stalls every request of the worker.
+    """
+
+    # Eviction is checked every this many writes
+    EVICTION_INTERVAL = 64
+    # Wait for the write lock while the connection is set up, seconds
+    SETUP_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        maxsize: int,
+        ttl: float,
+        max_stale: float = 0.0,
+        busy_timeout: float = 0.05
+    ):
+        self.path = path
+        self.table = table
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.skipped_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of this process, opened on first use"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.SETUP_TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at "
+                f"ON {self.table} (accessed_at)"
+            )
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+            self._conn = conn
+        return self._conn
+
+    def _write(self, sql: str, parameters: Tuple = ()) -> bool:
+        """
+        Runs a write statement unless another process holds the write lock
+        for longer than busy_timeout.
+
+        Returns:
+            False if the write was skipped
+        """
+        try:
+            self.conn.execute(sql, parameters)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            self.skipped_writes += 1
+            return False
+        return True
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or MISSING
+        """
+        row = self.conn.execute(
+            f"SELECT value, expires_at, accessed_at FROM {self.table} "
+            "WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISSING
+
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at <= now:
+            if expires_at + self.max_stale <= now and self._write(
+                f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?",
+                (key, now - self.max_stale),
+            ):
+                self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+        if now - accessed_at > 1.0:
+            self._write(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+        self.hits += 1
+        return pickle.loads(value)
+
+    def get_stale(self, key: str) -> Tuple[Any, float]:
+        """
+        Returns a value that may have expired less than max_stale seconds ago.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple[cached value or MISSING, seconds since expiry]
+        """
+        row = self.conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return MISSING, 0.0
+
+        value, expires_at = row
+        stale_for = time.time() - expires_at
+        if stale_for >= self.max_stale:
+            return MISSING, 0.0
+        if stale_for > 0:
+            self.stale_hits += 1
+        return pickle.loads(value), max(stale_for, 0.0)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores a value.
+
+        Args:
+            key: Cache key
+            value: Value to store (may be None)
+            ttl: Time-to-live in seconds, the cache default if not given
+        """
+        now = time.time()
+        if not self._write(
+            f"INSERT OR REPLACE INTO {self.table} "
+            "(key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (
+                key,
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                now + (self.ttl if ttl is None else ttl),
+                now,
+            ),
+        ):
+            return
+        self._writes += 1
+        if self._writes % self.EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """Removes expired entries and trims the table to maxsize"""
+        if not self._write(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?",
+            (time.time() - self.max_stale,),
+        ):
+            return
+        excess = len(self) - self.maxsize
+        if excess > 0 and self._write(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+            (excess,),
+        ):
+            self.evictions += excess
+
+    def delete(self, key: str) -> None:
+        """Removes a value if present"""
+        self._write(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Removes all values and resets the counters"""
+        self.conn.execute(f"DELETE FROM {self.table}")
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.stale_hits = self.skipped_writes = 0
+
+    def close(self) -> None:
+        """Closes the connection of this process"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns cache counters.
+
+        Returns:
+            Dictionary with size, hits, misses, evictions, skipped writes and
+            hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "skipped_writes": self.skipped_writes,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        row = self.conn.execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self.conn.execute(f"SELECT key FROM {self.table}").fetchall()
+        return iter([key for key, in rows])
+
+
+def create_cache(
+    backend: str,
+    table: str,
+    maxsize: int,
+    ttl: float,
+    path: str = "",
+    max_stale: float = 0.0,
+    busy_timeout: float = 0.05
+) -> "TTLCache | SQLiteCache":
+    """
+    Creates a cache with the configured backend.
+
+    Args:
+        backend: "memory" (per process) or "sqlite" (shared between the
+            processes on one host)
+        table: Name of the cache, the table name for SQLite
+        maxsize: Maximum number of entries
+        ttl: Default time-to-live in seconds
+        path: SQLite database file, required for the "sqlite" backend
+        max_stale: Seconds expired entries stay available to get_stale()
+        busy_timeout: How long a SQLite write waits for another process
+            before it is skipped, seconds
+
+    Returns:
+        TTLCache or SQLiteCache
+    """
+    if backend == "memory":
+        return TTLCache(maxsize, ttl, max_stale=max_stale)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite cache backend requires a database path")
+        return SQLiteCache(path, table, maxsize, ttl, max_stale, busy_timeout)
+    raise ValueError(f"Unknown cache backend '{backend}'")
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Callers that arrive while a call with the same key is in flight await
+    the same result (or exception) instead of starting a new call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs fn() or joins the call already in flight for the key.
+
+        Args:
+            key: Normalized request key
+            fn: Coroutine function performing the request
+
+        Returns:
+            Result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        # A cancelled caller must not cancel the call for the others
+        return await asyncio.shield(call)
+
+    def in_flight(self) -> int:
+        """Returns the number of calls in flight"""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of started and coalesced calls"""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
+
+    def _forget(self, key: Hashable, call: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # Mark the exception as retrieved if every caller went away
+            call.exception()
@@ -0,0 +1,202 @@
+"""
+Compact daily forecasts for the forecast cache.
+
+An Open-Meteo forecast response decoded from JSON is a tree of dicts,
+lists and boxed floats - several kilobytes of Python objects per location.
+ForecastRecord keeps the current conditions as plain attributes and the
+daily series as two typed numpy arrays (float32 values in one block, int8
+WMO weather codes), with the days stored as the first day and a count.
+A record takes a few hundred bytes in memory and in the SQLite cache, so
+tens of thousands of grid cells fit in a small container. Records are
+decoded into tool output only when a response is rendered (see
+server.parse_weather_data).
+"""
+
+import calendar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Rows of ForecastRecord.values
+TEMPERATURE_MAX, TEMPERATURE_MIN, PRECIPITATION_PROBABILITY, WIND_SPEED_MAX = range(4)
+
+
+class ForecastRecord:
+    """Current conditions and daily series of one grid cell, metric units"""
+
+    __slots__ = (
+        "observed", "temperature", "humidity", "weather_code", "wind_speed", "pressure",
+        "first_day", "values", "weather_codes", "stale_for",
+    )
+
+    def __init__(
+        self,
+        observed: int,
+        temperature: float,
+        humidity: float,
+        weather_code: int,
+        wind_speed: float,
+        pressure: float,
+        first_day: int,
+        values: np.ndarray,
+        weather_codes: np.ndarray,
+        stale_for: Optional[float] = None
+    ):
+        """
+        Args:
+            observed: Time of the current conditions, UNIX time
+            temperature: Current temperature, °C
+            humidity: Current relative humidity, %
+            weather_code: Current WMO weather code
+            wind_speed: Current wind speed, m/s
+            pressure: Current surface pressure, hPa
+            first_day: First forecast day, days since 1970-01-01
+            values: float32 array of shape (4, days): daily maximum and
+                minimum temperature (°C), maximum precipitation probability
+                (%, NaN if unknown) and maximum wind speed (m/s)
+            weather_codes: Daily WMO weather codes, int8
+            stale_for: Seconds since the cached record expired, None if fresh
+        """
+        self.observed = observed
+        self.temperature = temperature
+        self.humidity = humidity
+        self.weather_code = weather_code
+        self.wind_speed = wind_speed
+        self.pressure = pressure
+        self.first_day = first_day
+        self.values = values
+        self.weather_codes = weather_codes
+        self.stale_for = stale_for
+
+    @classmethod
+    def from_open_meteo(cls, data: Dict) -> "ForecastRecord":
+        """
+        Converts an Open-Meteo forecast response with current and daily
+        variables.
+
+        Args:
+            data: Open-Meteo forecast response
+
+        Returns:
+            ForecastRecord
+        """
+        current = data["current"]
+        daily = data["daily"]
+
+        values = np.array(
+            [
+                [np.nan if value is None else value for value in daily[name]]
+                for name in (
+                    "temperature_2m_max",
+                    "temperature_2m_min",
+                    "precipitation_probability_max",
+                    "wind_speed_10m_max",
+                )
+            ],
+            dtype=np.float32
+        ).reshape(4, len(daily["time"]))
+        weather_codes = np.array(
+            [code or 0 for code in daily["weather_code"]], dtype=np.int8
+        )
+        first_day = (
+            int(np.datetime64(daily["time"][0], "D").astype(np.int64)) if daily["time"] else 0
+        )
+
+        return cls(
+            observed=parse_time(current["time"]),
+            temperature=current["temperature_2m"],
+            humidity=current["relative_humidity_2m"],
+            weather_code=int(current["weather_code"]),
+            wind_speed=current["wind_speed_10m"],
+            pressure=current["surface_pressure"],
+            first_day=first_day,
+            values=values,
+            weather_codes=weather_codes,
+        )
+
+    def __len__(self) -> int:
+        return len(self.weather_codes)
+
+    def __getstate__(self):
+        # Raw array bytes pickle to a fraction of numpy's own pickle format
+        return (
+            self.observed, self.temperature, self.humidity, self.weather_code,
+            self.wind_speed, self.pressure, self.first_day,
+            self.values.tobytes(), self.weather_codes.tobytes(), self.stale_for,
+        )
+
+    def __setstate__(self, state) -> None:
+        (
+            self.observed, self.temperature, self.humidity, self.weather_code,
+            self.wind_speed, self.pressure, self.first_day,
+            values, weather_codes, self.stale_for,
+        ) = state
+        self.weather_codes = np.frombuffer(weather_codes, dtype=np.int8)
+        self.values = np.frombuffer(values, dtype=np.float32).reshape(4, len(self.weather_codes))
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Forecast days, datetime64[D]"""
+        return np.datetime64(self.first_day, "D") + np.arange(len(self))
+
+    def head(self, days: int) -> "ForecastRecord":
+        """Returns the record cut to at most `days` days"""
+        if len(self) <= days:
+            return self
+        return self.replace(
+            values=self.values[:, :days], weather_codes=self.weather_codes[:days]
+        )
+
+    def as_stale(self, stale_for: float) -> "ForecastRecord":
+        """Returns a copy marked as served past its expiry"""
+        return self.replace(stale_for=stale_for)
+
+    def replace(self, **changes) -> "ForecastRecord":
+        """Returns a copy with the given attributes replaced"""
+        attributes = {name: getattr(self, name) for name in self.__slots__}
+        attributes.update(changes)
+        return ForecastRecord(**attributes)
+
+    def observed_at(self) -> datetime:
+        """Returns the time of the current conditions as a UTC datetime"""
+        return datetime.fromtimestamp(self.observed, timezone.utc)
+
+    def daily(self) -> List[Dict]:
+        """
+        Decodes the daily series.
+
+        Returns:
+            One dict per day: "date" (ISO), "temperature_max",
+            "temperature_min", "weather_code", "precipitation_probability"
+            (0 if unknown) and "wind_speed_max" as Python numbers
+        """
+        probabilities = np.nan_to_num(self.values[PRECIPITATION_PROBABILITY]).round()
+        return [
+            {
+                "date": str(date),
+                "temperature_max": temperature_max,
+                "temperature_min": temperature_min,
+                "weather_code": weather_code,
+                "precipitation_probability": int(probability),
+                "wind_speed_max": wind_speed_max,
+            }
+            for date, temperature_max, temperature_min, weather_code, probability, wind_speed_max
+            in zip(
+                self.dates.tolist(),
+                self.values[TEMPERATURE_MAX].tolist(),
+                self.values[TEMPERATURE_MIN].tolist(),
+                self.weather_codes.tolist(),
+                probabilities.tolist(),
+                self.values[WIND_SPEED_MAX].tolist(),
+            )
+        ]
+
+
+def parse_time(value: str) -> int:
+    """
+    Converts an Open-Meteo time ("YYYY-MM-DDTHH:MM", optionally with a
+    zone suffix) to UNIX time; times without a zone are taken as UTC.
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return calendar.timegm(parsed.utctimetuple())
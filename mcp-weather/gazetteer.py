@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Offline gazetteer for resolving city names without a network round trip.
+
+The index is a prebuilt binary file that is memory-mapped on load, so
+opening it costs nothing regardless of its size. Layout (little-endian):
+
+    header   "GZT2", uint32 entry count
+    entries  sorted by key bytes, 36 bytes each:
+             key offset, key length, name offset, name length,
+             GeoNames id, latitude, longitude, population
+    blob     UTF-8 keys and canonical names
+
+"GZT1" indexes, whose entries have no population, can still be opened;
+their cities have a population of 0.
+
+Keys are normalized city names and alternate names, so lookups are a
+binary search over the entry table.
+
+Build an index from a GeoNames dump (e.g. cities15000.txt):
+
+    python gazetteer.py build cities15000.txt mcp_data/gazetteer.bin
+"""
+
+import argparse
+import mmap
+import struct
+import unicodedata
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+MAGIC = b"GZT2"
+_HEADER = struct.Struct("<4sI")
+_ENTRY = struct.Struct("<IHIHIddI")
+# Entry layout of each readable format
+_ENTRIES = {MAGIC: _ENTRY, b"GZT1": struct.Struct("<IHIHIdd")}
+
+# Column numbers in the GeoNames "geoname" table dump
+_GEONAMES_ID = 0
+_GEONAMES_NAME = 1
+_GEONAMES_ASCII_NAME = 2
+_GEONAMES_ALTERNATE_NAMES = 3
+_GEONAMES_LATITUDE = 4
+_GEONAMES_LONGITUDE = 5
+_GEONAMES_POPULATION = 14
+
+
+def normalize_city_name(city_name: str) -> str:
+    """
+    Normalizes a city name for use as a lookup or cache key.
+
+    Args:
+        city_name: City name as entered by the user
+
+    Returns:
+        Case-folded name with collapsed whitespace
+    """
+    name = unicodedata.normalize("NFKC", city_name)
+    return " ".join(name.casefold().split())
+
+
+# Cyrillic to Latin, close to the transliteration used by GeoNames
+_CYRILLIC_TO_LATIN = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    "і": "i", "ї": "yi", "є": "ye", "ґ": "g",
+})
+
+
+def transliterate(city_name: str) -> str:
+    """
+    Folds a city name to lowercase ASCII.
+
+    Cyrillic letters are transliterated and diacritics are dropped, so
+    "Москва" and "Moskva", or "São Paulo" and "Sao Paulo", get the same key.
+
+    Args:
+        city_name: City name as entered by the user
+
+    Returns:
+        Normalized ASCII name; characters without a Latin form are dropped
+    """
+    name = normalize_city_name(city_name).translate(_CYRILLIC_TO_LATIN)
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = name.encode("ascii", "ignore").decode("ascii")
+    return " ".join(name.split())
+
+
+class GazetteerEntry(NamedTuple):
+    """City resolved from the gazetteer"""
+    geoname_id: int
+    name: str
+    latitude: float
+    longitude: float
+    population: int = 0
+
+
+class Gazetteer:
+    """Read-only, memory-mapped city index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count = _HEADER.unpack_from(self._map, 0)
+        if magic not in _ENTRIES:
+            self.close()
+            raise ValueError(f"{path} is not a gazetteer index")
+
+        self._entry_format = _ENTRIES[magic]
+        self._entries_offset = _HEADER.size
+        self._blob_offset = self._entries_offset + self.count * self._entry_format.size
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path: str) -> "Gazetteer":
+        """Opens an index built with build_index()"""
+        return cls(path)
+
+    def close(self) -> None:
+        """Unmaps the index file"""
+        self._map.close()
+        self._file.close()
+
+    def lookup(self, city_name: str) -> Optional[GazetteerEntry]:
+        """
+        Finds a city by name, alternate name or transliteration.
+
+        Args:
+            city_name: City name in any supported language
+
+        Returns:
+            GazetteerEntry or None if the name is not in the index
+        """
+        name = normalize_city_name(city_name)
+        for key in dict.fromkeys((name, transliterate(name))):
+            key = key.encode("utf-8")
+            index = self._bisect(key)
+            if key and index < self.count and self._key(index) == key:
+                self.hits += 1
+                return self._entry(index)
+        self.misses += 1
+        return None
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[GazetteerEntry]:
+        """
+        Lists cities whose name starts with the given prefix.
+
+        Args:
+            prefix: Beginning of a city name
+            limit: Maximum number of results
+
+        Returns:
+            Matching entries in key order
+        """
+        key = normalize_city_name(prefix).encode("utf-8")
+        result = []
+        index = self._bisect(key)
+        while index < self.count and len(result) < limit:
+            if not self._key(index).startswith(key):
+                break
+            result.append(self._entry(index))
+            index += 1
+        return result
+
+    def keys(self) -> Iterator[str]:
+        """Iterates over all normalized names in the index"""
+        for index in range(self.count):
+            yield self._key(index).decode("utf-8")
+
+    def items(self) -> Iterator[Tuple[str, GazetteerEntry]]:
+        """Iterates over all normalized names in the index with their cities"""
+        for index in range(self.count):
+            yield self._key(index).decode("utf-8"), self._entry(index)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns index size and lookup counters"""
+        return {"names": self.count, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bisect(self, key: bytes) -> int:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _key(self, index: int) -> bytes:
+        key_offset, key_length = struct.unpack_from(
+            "<IH", self._map, self._entries_offset + index * self._entry_format.size
+        )
+        start = self._blob_offset + key_offset
+        return self._map[start:start + key_length]
+
+    def _entry(self, index: int) -> GazetteerEntry:
+        _, _, name_offset, name_length, *city = self._entry_format.unpack_from(
+            self._map, self._entries_offset + index * self._entry_format.size
+        )
+        start = self._blob_offset + name_offset
+        name = self._map[start:start + name_length].decode("utf-8")
+        return GazetteerEntry(city[0], name, *city[1:])
+
+
+def read_geonames(
+    path: str,
+    min_population: int = 0
+) -> Iterator[Tuple[int, str, List[str], float, float, int]]:
+    """
+    Reads cities from a GeoNames dump.
+
+    Args:
+        path: Tab-separated GeoNames file (cities500.txt, cities15000.txt...)
+        min_population: Skip smaller cities
+
+    Yields:
+        (geoname_id, name, alternate names, latitude, longitude, population)
+    """
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) <= _GEONAMES_POPULATION:
+                continue
+            population = int(columns[_GEONAMES_POPULATION] or 0)
+            if population < min_population:
+                continue
+            alternate_names = [
+                name for name in columns[_GEONAMES_ALTERNATE_NAMES].split(",")
+                if name and not name.startswith("http")
+            ]
+            alternate_names.append(columns[_GEONAMES_ASCII_NAME])
+            yield (
+                int(columns[_GEONAMES_ID]),
+                columns[_GEONAMES_NAME],
+                alternate_names,
+                float(columns[_GEONAMES_LATITUDE]),
+                float(columns[_GEONAMES_LONGITUDE]),
+                population,
+            )
+
+
+def build_index(source_path: str, index_path: str, min_population: int = 0) -> int:
+    """
+    Builds a binary gazetteer index from a GeoNames dump.
+
+    When several cities share a name, the most populous one wins.
+
+    Args:
+        source_path: GeoNames dump
+        index_path: Output file
+        min_population: Skip smaller cities
+
+    Returns:
+        Number of indexed names
+    """
+    # normalized key -> (population, geoname_id, name, latitude, longitude)
+    best: Dict[bytes, Tuple[int, int, str, float, float]] = {}
+    for geoname_id, name, alternate_names, latitude, longitude, population in (
+        read_geonames(source_path, min_population)
+    ):
+        city = (population, geoname_id, name, latitude, longitude)
+        for variant in [name, *alternate_names]:
+            key = normalize_city_name(variant).encode("utf-8")
+            if not key or len(key) > 0xFFFF:
+                continue
+            if key not in best or best[key][0] < population:
+                best[key] = city
+
+    blob = bytearray()
+    name_offsets: Dict[str, int] = {}
+    entries = bytearray()
+    for key in sorted(best):
+        population, geoname_id, name, latitude, longitude = best[key]
+        key_offset = len(blob)
+        blob += key
+        if name not in name_offsets:
+            name_offsets[name] = len(blob)
+            blob += name.encode("utf-8")
+        entries += _ENTRY.pack(
+            key_offset, len(key),
+            name_offsets[name], len(name.encode("utf-8")),
+            geoname_id, latitude, longitude, min(population, 0xFFFFFFFF),
+        )
+
+    with open(index_path, "wb") as index:
+        index.write(_HEADER.pack(MAGIC, len(best)))
+        index.write(entries)
+        index.write(blob)
+
+    return len(best)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Offline gazetteer index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Build an index from GeoNames")
+    build.add_argument("source", help="GeoNames dump, e.g. cities15000.txt")
+    build.add_argument("index", help="Output index file")
+    build.add_argument("--min-population", type=int, default=0)
+
+    lookup = commands.add_parser("lookup", help="Look up a city")
+    lookup.add_argument("index", help="Index file")
+    lookup.add_argument("city", help="City name")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_index(args.source, args.index, args.min_population)
+        print(f"✅ Indexed {count} names into {args.index}")
+    else:
+        gazetteer = Gazetteer.open(args.index)
+        print(gazetteer.lookup(args.city))
+        gazetteer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Hourly forecasts as column arrays.
+
+Open-Meteo returns hourly variables as parallel JSON lists. HourlyForecast
+keeps them as numpy arrays (float32 values, local datetime64 hours), so a
+cached forecast pickles to a few kilobytes, and daily extremes,
+precipitation windows and the best hours are computed locally with
+vectorized operations from a single upstream fetch.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Hourly variables requested from Open-Meteo
+HOURLY_PARAMS = [
+    "temperature_2m",
+    "precipitation_probability",
+    "precipitation",
+    "weather_code",
+    "wind_speed_10m",
+    "is_day"
+]
+
+# Comfortable temperature for the best hours, °C
+COMFORT_TEMPERATURE = 20.0
+# Score added to wet and night hours, larger than any weather score
+UNSUITABLE = 1000.0
+
+
+def hour_string(value: np.datetime64) -> str:
+    """Formats a local hour as "YYYY-MM-DDTHH:MM" """
+    return str(value.astype("datetime64[m]"))
+
+
+def rounded(values: np.ndarray) -> List[float]:
+    """Rounds float32 values to one decimal as Python floats"""
+    return values.astype(np.float64).round(1).tolist()
+
+
+class HourlyForecast:
+    """Hourly series of one location, in the location's local time"""
+
+    def __init__(
+        self,
+        time: np.ndarray,
+        temperature: np.ndarray,
+        precipitation_probability: np.ndarray,
+        precipitation: np.ndarray,
+        weather_code: np.ndarray,
+        wind_speed: np.ndarray,
+        is_day: np.ndarray,
+        utc_offset: int = 0
+    ):
+        """
+        Args:
+            time: Local hours, datetime64[h]
+            temperature: Temperature, °C
+            precipitation_probability: Precipitation probability, %
+            precipitation: Precipitation, mm
+            weather_code: WMO weather codes
+            wind_speed: Wind speed
+            is_day: True for daylight hours
+            utc_offset: Offset of the local time from UTC, seconds
+        """
+        self.time = time
+        self.temperature = temperature
+        self.precipitation_probability = precipitation_probability
+        self.precipitation = precipitation
+        self.weather_code = weather_code
+        self.wind_speed = wind_speed
+        self.is_day = is_day
+        self.utc_offset = utc_offset
+
+    @classmethod
+    def from_open_meteo(cls, data: Dict) -> "HourlyForecast":
+        """
+        Converts an Open-Meteo forecast response with hourly variables.
+
+        Missing values (null) become NaN.
+
+        Args:
+            data: Open-Meteo forecast response
+
+        Returns:
+            HourlyForecast
+        """
+        hourly = data["hourly"]
+
+        def column(name: str) -> np.ndarray:
+            return np.array(
+                [np.nan if value is None else value for value in hourly[name]],
+                dtype=np.float32
+            )
+
+        return cls(
+            time=np.array(hourly["time"], dtype="datetime64[h]"),
+            temperature=column("temperature_2m"),
+            precipitation_probability=column("precipitation_probability"),
+            precipitation=column("precipitation"),
+            weather_code=np.nan_to_num(column("weather_code")).astype(np.int16),
+            wind_speed=column("wind_speed_10m"),
+            is_day=np.nan_to_num(column("is_day")).astype(bool),
+            utc_offset=int(data.get("utc_offset_seconds", 0)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: slice) -> "HourlyForecast":
+        return HourlyForecast(
+            self.time[index],
+            self.temperature[index],
+            self.precipitation_probability[index],
+            self.precipitation[index],
+            self.weather_code[index],
+            self.wind_speed[index],
+            self.is_day[index],
+            self.utc_offset,
+        )
+
+    def local_hour(self, now: Optional[float] = None) -> np.datetime64:
+        """
+        Returns the current hour in the location's local time.
+
+        Args:
+            now: UNIX time, defaults to time.time()
+        """
+        now = time.time() if now is None else now
+        return np.datetime64(int(now) + self.utc_offset, "s").astype("datetime64[h]")
+
+    def next_hours(self, hours: int, now: Optional[float] = None) -> "HourlyForecast":
+        """
+        Returns the series from the current hour on.
+
+        Args:
+            hours: Number of hours
+            now: UNIX time, defaults to time.time()
+
+        Returns:
+            At most `hours` hours starting with the current one
+        """
+        start = int(np.searchsorted(self.time, self.local_hour(now), side="right")) - 1
+        start = max(start, 0)
+        return self[start:start + hours]
+
+    def daily_summary(self) -> Dict[str, List]:
+        """
+        Aggregates the series per local day.
+
+        Returns:
+            {"date": [...], "max": [...], "min": [...], "precipitation": [...]}
+            with temperatures in °C and precipitation sums in mm
+        """
+        if not len(self):
+            return {"date": [], "max": [], "min": [], "precipitation": []}
+        dates, starts = np.unique(self.time.astype("datetime64[D]"), return_index=True)
+        return {
+            "date": [str(date) for date in dates],
+            "max": rounded(np.fmax.reduceat(self.temperature, starts)),
+            "min": rounded(np.fmin.reduceat(self.temperature, starts)),
+            "precipitation": rounded(
+                np.add.reduceat(np.nan_to_num(self.precipitation), starts)
+            ),
+        }
+
+    def wet_hours(self, probability: float, amount: float) -> np.ndarray:
+        """
+        Returns a mask of hours with expected precipitation.
+
+        Args:
+            probability: Minimum precipitation probability, %
+            amount: Minimum precipitation, mm
+        """
+        with np.errstate(invalid="ignore"):
+            return (self.precipitation_probability >= probability) | (
+                self.precipitation >= amount
+            )
+
+    def precipitation_windows(
+        self,
+        probability: float = 50.0,
+        amount: float = 0.1
+    ) -> List[Dict[str, Any]]:
+        """
+        Finds consecutive hours with expected precipitation.
+
+        Args:
+            probability: Minimum precipitation probability of a wet hour, %
+            amount: Minimum precipitation of a wet hour, mm
+
+        Returns:
+            Windows in time order: {"start", "end" (first dry hour),
+            "hours", "probability" (maximum, %), "amount" (sum, mm)}
+        """
+        wet = self.wet_hours(probability, amount)
+        if not wet.any():
+            return []
+        edges = np.diff(np.concatenate(([0], wet.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        # reduceat over [start0, end0, start1, end1, ...] reduces each window
+        # at the even positions; a zero is appended so an end may equal len
+        bounds = np.column_stack((starts, ends)).ravel()
+        amounts = np.add.reduceat(
+            np.append(np.nan_to_num(self.precipitation), 0), bounds
+        )[::2]
+        max_probability = np.maximum.reduceat(
+            np.append(np.nan_to_num(self.precipitation_probability), 0), bounds
+        )[::2]
+
+        end_times = self.time[starts] + (ends - starts)
+        return [
+            {
+                "start": hour_string(self.time[start]),
+                "end": hour_string(end_time),
+                "hours": int(end - start),
+                "probability": int(round(float(window_probability))),
+                "amount": round(float(window_amount), 1),
+            }
+            for start, end, end_time, window_probability, window_amount in zip(
+                starts, ends, end_times, max_probability, amounts
+            )
+        ]
+
+    def best_hours(
+        self,
+        length: int = 3,
+        probability: float = 50.0,
+        amount: float = 0.1
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Finds the best daylight hours to be outside.
+
+        Hours are scored by distance from COMFORT_TEMPERATURE,
+        precipitation probability and wind; wet and night hours are
+        excluded.
+
+        Args:
+            length: Number of consecutive hours
+            probability: Minimum precipitation probability of a wet hour, %
+            amount: Minimum precipitation of a wet hour, mm
+
+        Returns:
+            {"start", "end", "temperature" (mean, °C), "probability"
+            (maximum, %)}, or None if there are no dry daylight hours
+        """
+        length = min(length, len(self))
+        if length <= 0:
+            return None
+        score = (
+            np.abs(self.temperature - COMFORT_TEMPERATURE)
+            + np.nan_to_num(self.precipitation_probability) / 10
+            + np.nan_to_num(self.wind_speed) / 5
+        )
+        unsuitable = self.wet_hours(probability, amount) | ~self.is_day
+        score = np.where(unsuitable | np.isnan(score), UNSUITABLE, score)
+
+        # Sum of each run of `length` hours
+        window_scores = np.convolve(score, np.ones(length), mode="valid")
+        start = int(np.argmin(window_scores))
+        if window_scores[start] >= UNSUITABLE:
+            return None
+        end = start + length
+        return {
+            "start": hour_string(self.time[start]),
+            "end": hour_string(self.time[end - 1] + 1),
+            "temperature": round(float(np.nanmean(self.temperature[start:end])), 1),
+            "probability": int(
+                np.nan_to_num(self.precipitation_probability[start:end]).max()
+            ),
+        }
+
+
+def to_list(values: np.ndarray, decimals: int = 0) -> List[Optional[float]]:
+    """
+    Converts an array to a JSON-friendly list.
+
+    Args:
+        values: Float array
+        decimals: Decimals to round to; 0 gives ints
+
+    Returns:
+        Rounded values with None in place of NaN
+    """
+    values = values.astype(np.float64).round(decimals)
+    missing = np.isnan(values)
+    if decimals == 0:
+        return [None if nan else int(value) for value, nan in zip(values, missing)]
+    return [None if nan else value for value, nan in zip(values.tolist(), missing)]
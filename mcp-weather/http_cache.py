@@ -0,0 +1,262 @@
+"""
+HTTP caching for the Open-Meteo client.
+
+CachingTransport sits between httpx.AsyncClient and the network transport
+and keeps GET responses together with their Cache-Control, Expires, ETag
+and Last-Modified metadata. A fresh response is served without touching
+the network; a stale one is revalidated with If-None-Match /
+If-Modified-Since, and a 304 answer reuses the stored body. This sits below
+the application caches: it makes repeated identical requests (same URL and
+parameters) cheap, whatever the code path that sends them.
+"""
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from cache import MISSING
+
+
+def new_counters() -> Dict[str, int]:
+    """Returns zeroed CachingTransport counters"""
+    return {"hits": 0, "revalidated": 0, "misses": 0}
+
+
+class CachedResponse(NamedTuple):
+    """Stored response with its validators"""
+    status_code: int
+    headers: List[Tuple[str, str]]
+    content: bytes
+    fresh_until: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def fresh_response(
+    cache: Any,
+    request: httpx.Request,
+    counters: Optional[Dict[str, int]] = None
+) -> Optional[httpx.Response]:
+    """
+    Returns a stored response that can be reused without the network.
+
+    Callers that meter or circuit-break their requests (upstream.Upstream)
+    check this first, so that cache hits cost them nothing.
+
+    Args:
+        cache: Cache of a CachingTransport
+        request: GET request as it would be sent
+        counters: CachingTransport counters; a hit increments "hits"
+
+    Returns:
+        Response marked with extensions["cache"] == "HIT", or None if the
+        request has to go to the transport
+    """
+    if request.method != "GET":
+        return None
+    directives = parse_cache_control(request.headers.get("cache-control", ""))
+    if "no-store" in directives or "no-cache" in directives:
+        return None
+    entry = cache.get(str(request.url))
+    if entry is MISSING or time.time() >= entry.fresh_until:
+        return None
+    if counters is not None:
+        counters["hits"] += 1
+    return build_response(entry, request, "HIT")
+
+
+def build_response(entry: CachedResponse, request: httpx.Request, status: str) -> httpx.Response:
+    """Builds a response from a stored entry"""
+    return httpx.Response(
+        entry.status_code,
+        headers=entry.headers,
+        content=entry.content,
+        request=request,
+        extensions={"cache": status},
+    )
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """
+    Parses a Cache-Control header.
+
+    Args:
+        value: Header value, e.g. "public, max-age=900"
+
+    Returns:
+        Lowercase directive -> argument (None for directives without one)
+    """
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+    """Converts an HTTP date to UNIX time, None if missing or invalid"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: httpx.Headers, now: float) -> Optional[float]:
+    """
+    Computes how long a response stays fresh.
+
+    max-age takes precedence over Expires; the Age header is subtracted.
+
+    Args:
+        headers: Response headers
+        now: Current UNIX time
+
+    Returns:
+        Seconds (0 or less if the response must be revalidated before
+        reuse), or None if it must not be stored
+    """
+    directives = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    age = 0.0
+    try:
+        age = float(headers.get("age", 0))
+    except ValueError:
+        pass
+
+    max_age = directives.get("max-age")
+    if max_age is not None:
+        try:
+            return float(max_age) - age
+        except ValueError:
+            return 0.0
+
+    expires = parse_http_date(headers.get("expires"))
+    if expires is not None:
+        date = parse_http_date(headers.get("date")) or now
+        return expires - date - age
+    return 0.0
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """HTTP cache in front of another transport"""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        cache: Any,
+        retention: float = 3600.0,
+        counters: Optional[Dict[str, int]] = None
+    ):
+        """
+        Args:
+            transport: Transport that sends requests to the network
+            cache: TTLCache or SQLiteCache for CachedResponse entries
+            retention: How long a response with validators is kept after
+                it goes stale, for conditional requests, seconds
+            counters: Dict to count "hits", "revalidated" and "misses" in,
+                shared by the transports of successive clients
+        """
+        self.transport = transport
+        self.cache = cache
+        self.retention = retention
+        self.counters = counters if counters is not None else new_counters()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_directives = parse_cache_control(request.headers.get("cache-control", ""))
+        if (
+            request.method != "GET"
+            or "no-store" in request_directives
+            or "if-none-match" in request.headers
+            or "if-modified-since" in request.headers
+        ):
+            return await self.transport.handle_async_request(request)
+
+        response = fresh_response(self.cache, request, self.counters)
+        if response is not None:
+            return response
+
+        key = str(request.url)
+        entry = self.cache.get(key)
+        now = time.time()
+        if entry is not MISSING:
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self.transport.handle_async_request(request)
+
+        if entry is not MISSING and response.status_code == 304:
+            await response.aclose()
+            self.counters["revalidated"] += 1
+            # A 304 carries updated metadata for the stored body
+            headers = httpx.Headers(entry.headers)
+            for name, value in response.headers.items():
+                if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                    headers[name] = value
+            stored = self._store(key, entry.status_code, headers, entry.content, now)
+            return build_response(stored or entry, request, "REVALIDATED")
+
+        self.counters["misses"] += 1
+        if response.status_code != 200:
+            return response
+
+        # Raw bytes: the client decodes Content-Encoding of the returned response
+        try:
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        headers = httpx.Headers(response.headers)
+        self._store(key, response.status_code, headers, content, now)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+            extensions={**response.extensions, "cache": "MISS"},
+        )
+
+    def _store(
+        self,
+        key: str,
+        status_code: int,
+        headers: httpx.Headers,
+        content: bytes,
+        now: float
+    ) -> Optional[CachedResponse]:
+        """Stores a response if its headers allow it"""
+        lifetime = freshness_lifetime(headers, now)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        has_validators = bool(etag or last_modified)
+        if lifetime is None or (lifetime <= 0 and not has_validators):
+            self.cache.delete(key)
+            return None
+
+        entry = CachedResponse(
+            status_code=status_code,
+            headers=headers.multi_items(),
+            content=content,
+            fresh_until=now + max(lifetime, 0.0),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        ttl = max(lifetime, 0.0) + (self.retention if has_validators else 0.0)
+        self.cache.set(key, entry, ttl=ttl)
+        return entry
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns counters of fresh hits, revalidations and network fetches"""
+        return dict(self.counters)
@@ -0,0 +1,305 @@
+"""
+Units, languages and clock formats of the tool output.
+
+Forecasts are fetched and cached once in canonical metric units (°C, m/s,
+hPa, mm) with WMO weather codes. Imperial units, the output language and
+12/24-hour clocks are applied only when a cached forecast is rendered, so
+callers with different preferences share the same cache entries.
+"""
+
+from datetime import datetime
+from typing import Dict, NamedTuple
+
+UNIT_SYSTEMS = ("metric", "imperial")
+LANGUAGES = ("en", "ru")
+TIME_FORMATS = ("24h", "12h")
+
+# Decimals shown per unit system; imperial pressure and precipitation
+# values are small numbers
+PRESSURE_DECIMALS = {"metric": 0, "imperial": 2}
+PRECIPITATION_DECIMALS = {"metric": 1, "imperial": 2}
+
+
+class Preferences(NamedTuple):
+    """Rendering preferences of one tool call"""
+    units: str = "metric"
+    language: str = "en"
+    time_format: str = "24h"
+
+
+def convert_temperature(celsius, units: str):
+    """Converts °C (a number or a numpy array) to the unit system"""
+    return celsius * 9 / 5 + 32 if units == "imperial" else celsius
+
+
+def convert_wind_speed(meters_per_second, units: str):
+    """Converts m/s to the unit system (mph for imperial)"""
+    return meters_per_second * 2.236936 if units == "imperial" else meters_per_second
+
+
+def convert_pressure(hectopascals, units: str):
+    """Converts hPa to the unit system (inHg for imperial)"""
+    return hectopascals * 0.02953 if units == "imperial" else hectopascals
+
+
+def convert_precipitation(millimeters, units: str):
+    """Converts mm to the unit system (inches for imperial)"""
+    return millimeters / 25.4 if units == "imperial" else millimeters
+
+
+def round_to(value: float, decimals: int) -> float:
+    """Rounds to the given decimals, to an int for 0"""
+    return round(value, decimals) if decimals else round(value)
+
+
+UNIT_LABELS = {
+    ("metric", "en"): {"temperature": "°C", "wind": "m/s", "pressure": "hPa", "precipitation": "mm"},
+    ("metric", "ru"): {"temperature": "°C", "wind": "м/с", "pressure": "гПа", "precipitation": "мм"},
+    ("imperial", "en"): {"temperature": "°F", "wind": "mph", "pressure": "inHg", "precipitation": "in"},
+    ("imperial", "ru"): {
+        "temperature": "°F", "wind": "миль/ч", "pressure": "дюйм рт. ст.", "precipitation": "дюйм"
+    },
+}
+
+
+def unit_labels(preferences: Preferences) -> Dict[str, str]:
+    """Returns unit labels for the unit system and language"""
+    return UNIT_LABELS[(preferences.units, preferences.language)]
+
+
+def format_clock(value: datetime, preferences: Preferences) -> str:
+    """
+    Formats the time of day.
+
+    Args:
+        value: Date and time
+        preferences: Rendering preferences
+
+    Returns:
+        "14:00" or "2:00 PM"
+    """
+    if preferences.time_format == "12h":
+        return value.strftime("%I:%M %p").lstrip("0")
+    return value.strftime("%H:%M")
+
+
+def format_date_time(value: str, preferences: Preferences) -> str:
+    """
+    Formats an ISO local date and time ("YYYY-MM-DDTHH:MM").
+
+    Returns:
+        "YYYY-MM-DD 14:00" or "YYYY-MM-DD 2:00 PM"
+    """
+    parsed = datetime.fromisoformat(value)
+    return f"{parsed.date().isoformat()} {format_clock(parsed, preferences)}"
+
+
+WEATHER_CODES = {
+    "en": {
+        0: "clear",
+        1: "mostly clear",
+        2: "partly cloudy",
+        3: "overcast",
+        45: "fog",
+        48: "drizzle",
+        51: "light drizzle",
+        53: "moderate drizzle",
+        55: "heavy drizzle",
+        56: "light freezing drizzle",
+        57: "heavy freezing drizzle",
+        61: "light rain",
+        63: "moderate rain",
+        65: "heavy rain",
+        66: "light freezing rain",
+        67: "heavy freezing rain",
+        71: "light snow",
+        73: "moderate snow",
+        75: "heavy snow",
+        77: "snow pellets",
+        80: "light showers",
+        81: "moderate showers",
+        82: "heavy showers",
+        85: "light snow showers",
+        86: "heavy snow showers",
+        95: "thunderstorm",
+        96: "thunderstorm with light hail",
+        99: "thunderstorm with large hail"
+    },
+    "ru": {
+        0: "ясно",
+        1: "преимущественно ясно",
+        2: "переменная облачность",
+        3: "пасмурно",
+        45: "туман",
+        48: "изморозь",
+        51: "слабая морось",
+        53: "умеренная морось",
+        55: "сильная морось",
+        56: "слабая ледяная морось",
+        57: "сильная ледяная морось",
+        61: "небольшой дождь",
+        63: "умеренный дождь",
+        65: "сильный дождь",
+        66: "слабый ледяной дождь",
+        67: "сильный ледяной дождь",
+        71: "небольшой снег",
+        73: "умеренный снег",
+        75: "сильный снег",
+        77: "снежные зёрна",
+        80: "слабый ливень",
+        81: "умеренный ливень",
+        82: "сильный ливень",
+        85: "слабый снегопад",
+        86: "сильный снегопад",
+        95: "гроза",
+        96: "гроза с небольшим градом",
+        99: "гроза с сильным градом"
+    },
+}
+
+UNKNOWN_WEATHER_CODE = {
+    "en": "unknown (code {code})",
+    "ru": "неизвестно (код {code})",
+}
+
+WEEKDAYS = {
+    "en": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+    "ru": ["понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье"],
+}
+
+
+def describe_weather(code: int, language: str = "en") -> str:
+    """
+    Converts a WMO weather code to a text description.
+
+    Args:
+        code: WMO weather code
+        language: Output language
+
+    Returns:
+        Description of the weather
+    """
+    description = WEATHER_CODES[language].get(code)
+    if description is None:
+        return UNKNOWN_WEATHER_CODE[language].format(code=code)
+    return description
+
+
+# Texts of the formatted tool output
+MESSAGES = {
+    "en": {
+        "today_title": "Weather in the city today {city}",
+        "weekly_title": "Weekly weather forecast for the city {city}",
+        "days_title": "{days}-day weather forecast for {city}",
+        "cities_title": "Weather today in {count} cities",
+        "hourly_title": "Hourly forecast for the city {city}, next {hours} h",
+        "coordinates": "Coordinates",
+        "time": "Time",
+        "updated": "Updated",
+        "now": "Now",
+        "conditions": "Conditions",
+        "humidity": "Humidity",
+        "wind_speed": "Wind speed",
+        "pressure": "Pressure",
+        "today_forecast": "Forecast for today",
+        "weekly_forecast": "Weekly forecast",
+        "days_forecast": "Forecast for {days} days",
+        "maximum": "Maximum",
+        "minimum": "Minimum",
+        "max": "Max",
+        "min": "Min",
+        "precipitation_chance": "Chance of precipitation",
+        "city_not_found": "city not found",
+        "city_not_found_error": "City '{city}' not found",
+        "cached": "cached",
+        "stale": "Cached data, {minutes} min past its refresh time; an update is in progress",
+        "from": "From",
+        "local_time": "local time",
+        "no_hourly": "No hourly forecast available for the city {city}",
+        "no_precipitation": "No precipitation expected",
+        "precipitation_now": "Precipitation now, expected to stop at {end}",
+        "precipitation": "Precipitation {period}",
+        "up_to": "up to",
+        "best_time": "Best time outside",
+        "by_day": "By day",
+        "hourly": "Hourly",
+        "source": "Data provided by Open-Meteo API",
+        "outdoor_title": "Outdoor conditions in the city {city}",
+        "today": "Today",
+        "air_quality": "Air quality",
+        "european_aqi": "European AQI",
+        "aqi_good": "good",
+        "aqi_fair": "fair",
+        "aqi_moderate": "moderate",
+        "aqi_poor": "poor",
+        "aqi_very_poor": "very poor",
+        "aqi_extremely_poor": "extremely poor",
+        "sun": "Sun",
+        "sunrise": "Sunrise",
+        "sunset": "sunset",
+        "daylight": "daylight",
+        "hours_minutes": "{hours} h {minutes} min",
+        "uv_index": "UV index up to",
+        "unavailable": "unavailable",
+    },
+    "ru": {
+        "today_title": "Погода сегодня в городе {city}",
+        "weekly_title": "Прогноз погоды на неделю для города {city}",
+        "days_title": "Прогноз погоды на {days} дн. для {city}",
+        "cities_title": "Погода сегодня в {count} городах",
+        "hourly_title": "Почасовой прогноз для города {city}, ближайшие {hours} ч",
+        "coordinates": "Координаты",
+        "time": "Время",
+        "updated": "Обновлено",
+        "now": "Сейчас",
+        "conditions": "Условия",
+        "humidity": "Влажность",
+        "wind_speed": "Скорость ветра",
+        "pressure": "Давление",
+        "today_forecast": "Прогноз на сегодня",
+        "weekly_forecast": "Прогноз на неделю",
+        "days_forecast": "Прогноз на {days} дн.",
+        "maximum": "Максимум",
+        "minimum": "Минимум",
+        "max": "Макс",
+        "min": "Мин",
+        "precipitation_chance": "Вероятность осадков",
+        "city_not_found": "город не найден",
+        "city_not_found_error": "Город '{city}' не найден",
+        "cached": "из кэша",
+        "stale": "Данные из кэша, устарели на {minutes} мин; идёт обновление",
+        "from": "С",
+        "local_time": "местное время",
+        "no_hourly": "Почасовой прогноз для города {city} недоступен",
+        "no_precipitation": "Осадков не ожидается",
+        "precipitation_now": "Сейчас идут осадки, закончатся к {end}",
+        "precipitation": "Осадки {period}",
+        "up_to": "до",
+        "best_time": "Лучшее время для прогулки",
+        "by_day": "По дням",
+        "hourly": "По часам",
+        "source": "Данные предоставлены Open-Meteo API",
+        "outdoor_title": "Условия на улице в городе {city}",
+        "today": "Сегодня",
+        "air_quality": "Качество воздуха",
+        "european_aqi": "европейский AQI",
+        "aqi_good": "хорошее",
+        "aqi_fair": "удовлетворительное",
+        "aqi_moderate": "умеренное",
+        "aqi_poor": "плохое",
+        "aqi_very_poor": "очень плохое",
+        "aqi_extremely_poor": "крайне плохое",
+        "sun": "Солнце",
+        "sunrise": "Восход",
+        "sunset": "закат",
+        "daylight": "световой день",
+        "hours_minutes": "{hours} ч {minutes} мин",
+        "uv_index": "УФ-индекс до",
+        "unavailable": "нет данных",
+    },
+}
+
+
+def messages(preferences: Preferences) -> Dict[str, str]:
+    """Returns the output texts for the language"""
+    return MESSAGES[preferences.language]
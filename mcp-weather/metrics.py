@@ -0,0 +1,217 @@
+"""
+Prometheus metrics of the MCP weather server.
+
+Hot-path metrics are plain prometheus_client counters and histograms whose
+label children are resolved once per tool or API, so recording a call is a
+few lock-protected additions. Cache and circuit breaker state is not
+recorded on every request: CacheCollector and UpstreamCollector read the
+existing stats() counters when /metrics is scraped.
+
+With several uvicorn workers every process reports its own values.
+"""
+
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, TypeVar
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INTERNAL_ERROR
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+
+T = TypeVar("T")
+
+REGISTRY = CollectorRegistry()
+ProcessCollector(registry=REGISTRY)
+
+# Tool calls answered from the cache take milliseconds, upstream fetches
+# up to the 30 s read timeout
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+TOOL_CALLS = Counter(
+    "mcp_weather_tool_calls_total",
+    "Tool calls by outcome",
+    ["tool", "outcome"],
+    registry=REGISTRY,
+)
+TOOL_LATENCY = Histogram(
+    "mcp_weather_tool_duration_seconds",
+    "Tool call latency",
+    ["tool"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+TOOL_ERRORS = Counter(
+    "mcp_weather_tool_errors_total",
+    "Failed tool calls by MCP ErrorData code",
+    ["tool", "code"],
+    registry=REGISTRY,
+)
+UPSTREAM_LATENCY = Histogram(
+    "mcp_weather_upstream_duration_seconds",
+    "Open-Meteo request latency",
+    ["api", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+SSE_SESSIONS = Gauge(
+    "mcp_weather_sse_sessions",
+    "Open SSE sessions",
+    registry=REGISTRY,
+)
+
+
+def track_tool(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Counts calls, errors and latency of an async MCP tool.
+
+    Apply below @mcp.tool(); the wrapper keeps the signature of fn.
+    """
+    tool = fn.__name__
+    latency = TOOL_LATENCY.labels(tool)
+    succeeded = TOOL_CALLS.labels(tool, "ok")
+    failed = TOOL_CALLS.labels(tool, "error")
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except McpError as e:
+            failed.inc()
+            TOOL_ERRORS.labels(tool, str(e.error.code)).inc()
+            raise
+        except Exception:
+            failed.inc()
+            TOOL_ERRORS.labels(tool, str(INTERNAL_ERROR)).inc()
+            raise
+        finally:
+            latency.observe(time.perf_counter() - started)
+        succeeded.inc()
+        return result
+
+    return wrapper
+
+
+def upstream_observer(api: str) -> Callable[[float, str], None]:
+    """
+    Returns a latency callback for upstream.Upstream.
+
+    Args:
+        api: "geocoding" or "forecast"
+    """
+    histograms = {
+        outcome: UPSTREAM_LATENCY.labels(api, outcome) for outcome in ("ok", "error")
+    }
+
+    def observe(seconds: float, outcome: str) -> None:
+        histograms[outcome].observe(seconds)
+
+    return observe
+
+
+class CacheCollector:
+    """Reports cache counters and hit ratios at scrape time"""
+
+    def __init__(self, caches: Dict[str, Any]):
+        """
+        Args:
+            caches: Objects with a stats() method by cache name
+        """
+        self.caches = caches
+
+    def collect(self) -> Iterator[Metric]:
+        hits = CounterMetricFamily(
+            "mcp_weather_cache_hits", "Cache hits", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "mcp_weather_cache_misses", "Cache misses", labels=["cache"]
+        )
+        stale_hits = CounterMetricFamily(
+            "mcp_weather_cache_stale_hits", "Expired entries served", labels=["cache"]
+        )
+        skipped_writes = CounterMetricFamily(
+            "mcp_weather_cache_skipped_writes",
+            "Shared cache writes skipped while another worker held the write lock",
+            labels=["cache"],
+        )
+        hit_ratio = GaugeMetricFamily(
+            "mcp_weather_cache_hit_ratio", "Cache hit ratio", labels=["cache"]
+        )
+        size = GaugeMetricFamily(
+            "mcp_weather_cache_entries", "Cached entries", labels=["cache"]
+        )
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            stale_hits.add_metric([name], stats.get("stale_hits", 0))
+            skipped_writes.add_metric([name], stats.get("skipped_writes", 0))
+            hit_ratio.add_metric([name], stats["hit_ratio"])
+            size.add_metric([name], stats.get("size", 0))
+        yield from (hits, misses, stale_hits, skipped_writes, hit_ratio, size)
+
+
+class UpstreamCollector:
+    """Reports circuit breaker state and hedging counters at scrape time"""
+
+    def __init__(self, upstreams: Dict[str, Any]):
+        """
+        Args:
+            upstreams: upstream.Upstream objects by API name
+        """
+        self.upstreams = upstreams
+
+    def collect(self) -> Iterator[Metric]:
+        circuit_open = GaugeMetricFamily(
+            "mcp_weather_upstream_circuit_open",
+            "1 while the circuit breaker rejects calls",
+            labels=["api"],
+        )
+        rejected = CounterMetricFamily(
+            "mcp_weather_upstream_rejected", "Calls rejected by an open circuit",
+            labels=["api"],
+        )
+        hedged = CounterMetricFamily(
+            "mcp_weather_upstream_hedged", "Hedged requests sent", labels=["api"]
+        )
+        for name, upstream in self.upstreams.items():
+            stats = upstream.stats()
+            circuit_open.add_metric([name], 0 if stats["state"] == "closed" else 1)
+            rejected.add_metric([name], stats["rejected"])
+            hedged.add_metric([name], stats["hedged"])
+        yield from (circuit_open, rejected, hedged)
+
+
+class SessionCollector:
+    """Reports SSE session admission and eviction counters at scrape time"""
+
+    def __init__(self, sessions: Any):
+        """
+        Args:
+            sessions: sessions.SessionManager of the SSE transport
+        """
+        self.sessions = sessions
+
+    def collect(self) -> Iterator[Metric]:
+        rejected = CounterMetricFamily(
+            "mcp_weather_sse_rejected", "SSE connections refused at the session limit"
+        )
+        evicted = CounterMetricFamily(
+            "mcp_weather_sse_evicted", "SSE sessions closed by the server",
+            labels=["reason"],
+        )
+        stats = self.sessions.stats()
+        rejected.add_metric([], stats["rejected"])
+        for reason, count in stats["evicted"].items():
+            evicted.add_metric([reason], count)
+        yield from (rejected, evicted)
+
+
+def render() -> bytes:
+    """Returns all metrics in the Prometheus text format"""
+    return generate_latest(REGISTRY)
@@ -0,0 +1,96 @@
+"""
+Air quality and sun data for the outdoor conditions tool.
+
+Both datasets come from separate Open-Meteo requests (the Air Quality API
+and daily astronomy variables of the Forecast API) that the server runs
+concurrently with the weather forecast. The parsed values are small
+NamedTuples, cached per grid cell like forecasts.
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+# Current variables requested from the Air Quality API
+AIR_QUALITY_PARAMS = [
+    "european_aqi",
+    "us_aqi",
+    "pm2_5",
+    "pm10",
+    "ozone",
+    "nitrogen_dioxide"
+]
+
+# Daily variables requested from the Forecast API
+ASTRONOMY_PARAMS = [
+    "sunrise",
+    "sunset",
+    "daylight_duration",
+    "uv_index_max"
+]
+
+# Upper bounds of the European AQI bands
+AQI_LEVELS = (
+    (20, "good"),
+    (40, "fair"),
+    (60, "moderate"),
+    (80, "poor"),
+    (100, "very_poor"),
+)
+
+
+class AirQuality(NamedTuple):
+    """Current air quality of one location; None for unknown values"""
+    time: str
+    european_aqi: Optional[float]
+    us_aqi: Optional[float]
+    pm2_5: Optional[float]
+    pm10: Optional[float]
+    ozone: Optional[float]
+    nitrogen_dioxide: Optional[float]
+
+    @classmethod
+    def from_open_meteo(cls, data: Dict) -> "AirQuality":
+        """
+        Converts an Air Quality API response with current variables.
+
+        Args:
+            data: Open-Meteo air quality response
+
+        Returns:
+            AirQuality; concentrations in μg/m³
+        """
+        current = data["current"]
+        return cls(current["time"], *(current.get(name) for name in AIR_QUALITY_PARAMS))
+
+    @property
+    def level(self) -> Optional[str]:
+        """European AQI band: "good" to "extremely_poor", None if unknown"""
+        if self.european_aqi is None:
+            return None
+        for bound, level in AQI_LEVELS:
+            if self.european_aqi <= bound:
+                return level
+        return "extremely_poor"
+
+
+class Astronomy(NamedTuple):
+    """Today's sun times of one location, in its local time"""
+    date: str
+    sunrise: Optional[str]
+    sunset: Optional[str]
+    daylight: Optional[float]
+    uv_index_max: Optional[float]
+
+    @classmethod
+    def from_open_meteo(cls, data: Dict) -> "Astronomy":
+        """
+        Converts a Forecast API response with daily astronomy variables.
+
+        Args:
+            data: Open-Meteo forecast response for one day
+
+        Returns:
+            Astronomy; sunrise and sunset as "YYYY-MM-DDTHH:MM", daylight
+            in seconds
+        """
+        daily = data["daily"]
+        return cls(daily["time"][0], *(daily[name][0] for name in ASTRONOMY_PARAMS))
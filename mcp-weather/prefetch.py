@@ -0,0 +1,200 @@
+"""
+Background prefetching of popular forecasts.
+
+PrefetchScheduler counts requests per forecast grid cell and horizon and,
+shortly before the cached forecasts expire, refreshes the most requested
+cells, so user-facing calls almost never wait on Open-Meteo. Each cell is
+refreshed once, with the largest horizon requested for it; the shorter
+horizons are cut from that forecast.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+)
+
+# (latitude, longitude, horizon) of a forecast cache entry
+Location = Tuple[float, float, int]
+
+
+class PrefetchScheduler:
+    """
+    Refreshes the forecasts of the top-N most requested grid cells before
+    they expire.
+
+    Cache entries expire together on wall-clock boundaries that are
+    `interval` seconds apart, so the scheduler wakes up `lead_time`
+    seconds before each boundary. Request counts are halved after every
+    cycle so that popularity follows recent traffic.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[float, float, int], Awaitable[Iterable[Hashable]]],
+        interval: float,
+        top_n: int = 200,
+        lead_time: float = 60.0,
+        concurrency: int = 4,
+        rate: float = 5.0
+    ):
+        """
+        Args:
+            refresh: Coroutine function refreshing the forecast of one cell
+                up to a horizon; returns the cache keys it stored
+            interval: Seconds between cache expiry boundaries
+            top_n: Number of grid cells refreshed per cycle
+            lead_time: Seconds before expiry at which to refresh
+            concurrency: Maximum number of refreshes in flight
+            rate: Maximum number of refreshes started per second
+        """
+        self.refresh = refresh
+        self.interval = interval
+        self.top_n = top_n
+        self.lead_time = lead_time
+        self.concurrency = concurrency
+        self.rate = rate
+        self._counts: Counter = Counter()
+        self._prefetched: Set[Hashable] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.hits = 0
+        self.misses = 0
+
+    def record(
+        self,
+        location: Location,
+        cache_key: Optional[Hashable] = None,
+        hit: bool = False
+    ) -> None:
+        """
+        Records a forecast request.
+
+        Args:
+            location: (latitude, longitude, horizon) of the requested cell
+            cache_key: Cache key the request was served from
+            hit: Whether the request was served from the cache
+        """
+        self._counts[location] += 1
+        if cache_key in self._prefetched:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def top(self) -> List[Location]:
+        """
+        Returns the most requested grid cells.
+
+        Returns:
+            (latitude, longitude, horizon) per cell, with the largest
+            horizon requested for it, most requested cells first
+        """
+        cells: Counter = Counter()
+        horizons: Dict[Tuple[float, float], int] = {}
+        for (latitude, longitude, horizon), count in self._counts.items():
+            cell = (latitude, longitude)
+            cells[cell] += count
+            horizons[cell] = max(horizons.get(cell, horizon), horizon)
+        return [(*cell, horizons[cell]) for cell, _ in cells.most_common(self.top_n)]
+
+    def next_run_delay(self, now: Optional[float] = None) -> float:
+        """
+        Returns the number of seconds until the next prefetch cycle.
+
+        Args:
+            now: Current UNIX time, defaults to time.time()
+        """
+        now = time.time() if now is None else now
+        delay = self.interval - now % self.interval - self.lead_time
+        return delay if delay > 0 else delay + self.interval
+
+    async def run_once(self) -> int:
+        """
+        Refreshes the forecasts of the most requested grid cells.
+
+        Returns:
+            Number of refreshed cells
+        """
+        locations = self.top()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        prefetched: Set[Hashable] = set()
+        refreshed = 0
+
+        async def refresh(location: Location) -> None:
+            nonlocal refreshed
+            try:
+                cache_keys = await self.refresh(*location)
+            except Exception as e:
+                self.failed += 1
+                print(f"Prefetch error for {location}: {e}")
+            else:
+                self.refreshed += 1
+                refreshed += 1
+                prefetched.update(cache_keys)
+            finally:
+                semaphore.release()
+
+        tasks = []
+        for location in locations:
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(refresh(location)))
+            if self.rate > 0:
+                await asyncio.sleep(1 / self.rate)
+        await asyncio.gather(*tasks)
+
+        self._prefetched = prefetched
+        self.cycles += 1
+        # Decay so that popularity follows recent traffic
+        self._counts = Counter({
+            location: count // 2
+            for location, count in self._counts.items() if count > 1
+        })
+        return refreshed
+
+    async def run(self) -> None:
+        """Runs prefetch cycles until cancelled"""
+        while True:
+            await asyncio.sleep(self.next_run_delay())
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Prefetch cycle error: {e}")
+
+    def start(self) -> None:
+        """Starts the background task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stops the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns prefetch counters.
+
+        Returns:
+            Dictionary with tracked locations, refreshes and the share of
+            requests for prefetched forecasts served from the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "running": self._task is not None,
+            "tracked": len(self._counts),
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
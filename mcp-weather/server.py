@@ -1,237 +1,2228 @@
+import asyncio
+import contextlib
+import heapq
+import importlib.util
+import json
+import os
+import time
 from datetime import datetime
-from typing import Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
 import httpx
 
 import uvicorn
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
 from starlette.routing import Route, Mount
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
 from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.types import Receive, Scope, Send
+
+from cache import MISSING, SingleFlight, SQLiteStore, TTLCache, create_cache
+from forecast import ForecastRecord
+from fuzzy import TrigramIndex
+from gazetteer import Gazetteer, normalize_city_name, transliterate
+from http_cache import CachingTransport, fresh_response, new_counters
+from hourly import HOURLY_PARAMS, HourlyForecast, hour_string, to_list
+from localization import (
+    LANGUAGES, PRECIPITATION_DECIMALS, PRESSURE_DECIMALS, TIME_FORMATS, UNIT_SYSTEMS,
+    Preferences, convert_precipitation, convert_pressure, convert_temperature,
+    convert_wind_speed, describe_weather, format_clock, format_date_time, messages,
+    round_to, unit_labels, WEEKDAYS
+)
+from outdoor import AIR_QUALITY_PARAMS, ASTRONOMY_PARAMS, AirQuality, Astronomy
+from prefetch import PrefetchScheduler
+from sessions import SessionManager
+from upstream import CircuitOpenError, Upstream
+from admission import ClientLimiter, UpstreamBudget
+import metrics
 
 # Create an instance of the MCP server with the identifier "weather"
 mcp = FastMCP("weather")
 
+# Open-Meteo API endpoints (can point to a local stand-in for load tests)
+GEOCODING_URL = os.getenv(
+    "OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search"
+)
+FORECAST_URL = os.getenv("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+AIR_QUALITY_URL = os.getenv(
+    "OPEN_METEO_AIR_QUALITY_URL", "https://air-quality-api.open-meteo.com/v1/air-quality"
+)
+
+# Настройки пула соединений к Open-Meteo
+HTTP_MAX_CONNECTIONS = int(os.getenv("OPEN_METEO_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("OPEN_METEO_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OPEN_METEO_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("OPEN_METEO_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("OPEN_METEO_READ_TIMEOUT", "30"))
+HTTP2_ENABLED = os.getenv("OPEN_METEO_HTTP2", "true").lower() == "true"
+# HTTP-кэш ответов Open-Meteo по заголовкам Cache-Control/Expires/ETag
+HTTP_CACHE_ENABLED = os.getenv("OPEN_METEO_HTTP_CACHE", "true").lower() == "true"
+HTTP_CACHE_SIZE = int(os.getenv("OPEN_METEO_HTTP_CACHE_SIZE", "1000"))
+# How long a stale response with an ETag or Last-Modified is kept for
+# conditional requests, seconds
+HTTP_CACHE_RETENTION = float(os.getenv("OPEN_METEO_HTTP_CACHE_RETENTION", "3600"))
+
+# Shared client, opened in the app lifespan (or lazily outside of it)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Circuit breaker: consecutive failures after which calls fail fast, and
+# for how many seconds
+UPSTREAM_FAILURE_THRESHOLD = int(os.getenv("OPEN_METEO_FAILURE_THRESHOLD", "5"))
+UPSTREAM_RESET_TIMEOUT = float(os.getenv("OPEN_METEO_RESET_TIMEOUT", "30"))
+# Hedging: repeat a request that is slower than the recent p95 latency
+UPSTREAM_HEDGING = os.getenv("OPEN_METEO_HEDGING", "false").lower() == "true"
+UPSTREAM_HEDGE_QUANTILE = float(os.getenv("OPEN_METEO_HEDGE_QUANTILE", "0.95"))
+UPSTREAM_HEDGE_MIN_DELAY = float(os.getenv("OPEN_METEO_HEDGE_MIN_DELAY", "0.05"))
+
+# Общий бюджет запросов к Open-Meteo (бесплатный тариф ограничен квотами);
+# requests wait in a bounded queue for their turn, 0 disables the budget
+UPSTREAM_RATE_LIMIT = float(os.getenv("OPEN_METEO_RATE_LIMIT", "10"))
+UPSTREAM_BURST = float(os.getenv("OPEN_METEO_BURST", "20"))
+UPSTREAM_QUEUE_SIZE = int(os.getenv("OPEN_METEO_QUEUE_SIZE", "100"))
+UPSTREAM_MAX_WAIT = float(os.getenv("OPEN_METEO_MAX_WAIT", "5"))
+
+upstream_budget = UpstreamBudget(
+    UPSTREAM_RATE_LIMIT, UPSTREAM_BURST, UPSTREAM_QUEUE_SIZE, UPSTREAM_MAX_WAIT
+)
+
+# Лимит вызовов инструментов на клиента (SSE-сессию или заголовок);
+# 0 disables the limit
+CLIENT_RATE_LIMIT = float(os.getenv("CLIENT_RATE_LIMIT", "5"))
+CLIENT_BURST = float(os.getenv("CLIENT_BURST", "20"))
+CLIENT_ID_HEADER = os.getenv("CLIENT_ID_HEADER", "x-client-id")
+
+client_limiter = ClientLimiter(CLIENT_RATE_LIMIT, CLIENT_BURST)
+
+
+def create_upstream(name: str) -> Upstream:
+    """
+    Creates a circuit-broken (and optionally hedged) Open-Meteo API.
+
+    Args:
+        name: API name for errors and statistics
+
+    Returns:
+        Upstream sending requests through the shared HTTP client
+    """
+    return Upstream(
+        name,
+        lambda: get_http_client(),
+        failure_threshold=UPSTREAM_FAILURE_THRESHOLD,
+        reset_timeout=UPSTREAM_RESET_TIMEOUT,
+        hedging=UPSTREAM_HEDGING,
+        hedge_quantile=UPSTREAM_HEDGE_QUANTILE,
+        hedge_min_delay=UPSTREAM_HEDGE_MIN_DELAY,
+        observe=metrics.upstream_observer(name),
+        budget=upstream_budget,
+        cached=(lambda request: cached_response(request)) if HTTP_CACHE_ENABLED else None,
+    )
+
+
+geocoding_upstream = create_upstream("geocoding")
+forecast_upstream = create_upstream("forecast")
+air_quality_upstream = create_upstream("air_quality")
+
+# Настройки кэша геокодирования
+GEOCODING_LANGUAGE = "ru"
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", "3600"))
+# SQLite file for persistent caches, an empty value disables persistence
+CACHE_DB_PATH = os.getenv("WEATHER_CACHE_DB", "mcp_data/weather_cache.sqlite3")
+# "memory" - per-process caches, "sqlite" - caches shared by all worker
+# processes on the host through CACHE_DB_PATH in WAL mode
+CACHE_BACKEND = os.getenv("WEATHER_CACHE_BACKEND", "memory")
+# Seconds a shared cache write waits for another worker's write lock before
+# it is skipped, so the event loop is never blocked on the database
+CACHE_BUSY_TIMEOUT = float(os.getenv("WEATHER_CACHE_BUSY_TIMEOUT", "0.05"))
+
+# Name variants (normalized names and their transliterations) per location
+GEOCODE_ALIAS_CACHE_SIZE = int(os.getenv("GEOCODE_ALIAS_CACHE_SIZE", "50000"))
+
+# Location id (GeoNames id) -> coordinates
+geocode_cache = create_cache(
+    CACHE_BACKEND, "shared_geocode", GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL, CACHE_DB_PATH,
+    busy_timeout=CACHE_BUSY_TIMEOUT
+)
+# Alias index: name variant -> location id, None for names that were not found
+alias_cache = create_cache(
+    CACHE_BACKEND, "shared_geocode_alias", GEOCODE_ALIAS_CACHE_SIZE, GEOCODE_CACHE_TTL,
+    CACHE_DB_PATH, busy_timeout=CACHE_BUSY_TIMEOUT
+)
+geocode_flight = SingleFlight()
+
+# URL -> CachedResponse of the HTTP caching transport (see http_cache.py)
+http_response_cache = create_cache(
+    CACHE_BACKEND, "shared_http_responses", HTTP_CACHE_SIZE, HTTP_CACHE_RETENTION,
+    CACHE_DB_PATH, busy_timeout=CACHE_BUSY_TIMEOUT
+)
+http_cache_counters = new_counters()
+
+
+def cached_response(request: httpx.Request) -> Optional[httpx.Response]:
+    """Returns a fresh response of the HTTP cache for a request, or None"""
+    return fresh_response(http_response_cache, request, http_cache_counters)
+
+
+# Исправление опечаток: maximum edit distance between a misspelled name and
+# a resolved or gazetteer city, 0 disables the correction
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "2"))
+FUZZY_INDEX_SIZE = int(os.getenv("FUZZY_INDEX_SIZE", "100000"))
+# Name variant -> coordinates of the cities resolved so far and of the most
+# populous gazetteer cities, which resolved cities replace once it is full
+fuzzy_index = TrigramIndex(FUZZY_INDEX_SIZE)
+
+# Настройки кэша прогнозов
+FORECAST_GRID_STEP = float(os.getenv("FORECAST_GRID_STEP", "0.05"))
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "50000"))
+# Open-Meteo updates current conditions every 15 minutes; cached forecasts
+# expire together on these wall-clock boundaries
+FORECAST_REFRESH_SECONDS = int(os.getenv("FORECAST_REFRESH_SECONDS", "900"))
+# Horizons requested from Open-Meteo; a request for N days is served by the
+# shortest cached horizon that covers it
+FORECAST_HORIZONS = (1, 7, 16)
+# Expired forecasts are served for up to this many seconds while a fresh one
+# is fetched in the background; 0 disables stale serving
+FORECAST_MAX_STALENESS = float(os.getenv("FORECAST_MAX_STALENESS", "3600"))
+
+# Grid cell and horizon -> ForecastRecord (see forecast.py); the table name
+# changed with the record format, so shared caches never hold raw responses
+forecast_cache = create_cache(
+    CACHE_BACKEND, "shared_forecast_records", FORECAST_CACHE_SIZE, FORECAST_REFRESH_SECONDS,
+    CACHE_DB_PATH, max_stale=FORECAST_MAX_STALENESS,
+    busy_timeout=CACHE_BUSY_TIMEOUT
+)
+forecast_flight = SingleFlight()
+# Background refreshes of stale forecasts
+forecast_revalidations = {"started": 0, "failed": 0}
+_revalidation_tasks: Set["asyncio.Task[None]"] = set()
+
+# Настройки почасового прогноза
+HOURLY_CACHE_SIZE = int(os.getenv("HOURLY_CACHE_SIZE", "2000"))
+# Maximum number of hours per get_hourly_forecast call
+HOURLY_MAX_HOURS = 168
+# Days requested from Open-Meteo for hourly forecasts; the series starts at
+# local midnight, so N days cover (N - 1) * 24 hours from any hour of today
+HOURLY_HORIZONS = (2, 8)
+# Hours with at least this precipitation probability (%) count as wet
+HOURLY_RAIN_PROBABILITY = float(os.getenv("HOURLY_RAIN_PROBABILITY", "50"))
+# Length of the "best hours" window
+HOURLY_BEST_HOURS = 3
+
+hourly_cache = create_cache(
+    CACHE_BACKEND, "shared_hourly", HOURLY_CACHE_SIZE, FORECAST_REFRESH_SECONDS,
+    CACHE_DB_PATH, busy_timeout=CACHE_BUSY_TIMEOUT
+)
+
+# Качество воздуха и время восхода/заката для get_outdoor_conditions;
+# the Air Quality API updates hourly
+OUTDOOR_CACHE_SIZE = int(os.getenv("OUTDOOR_CACHE_SIZE", "2000"))
+OUTDOOR_CACHE_TTL = float(os.getenv("OUTDOOR_CACHE_TTL", "3600"))
+# Hours of precipitation outlook in get_outdoor_conditions
+OUTDOOR_HOURS = 12
+
+# Grid cell -> AirQuality / Astronomy (see outdoor.py)
+air_quality_cache = create_cache(
+    CACHE_BACKEND, "shared_air_quality", OUTDOOR_CACHE_SIZE, OUTDOOR_CACHE_TTL, CACHE_DB_PATH,
+    busy_timeout=CACHE_BUSY_TIMEOUT
+)
+astronomy_cache = create_cache(
+    CACHE_BACKEND, "shared_astronomy", OUTDOOR_CACHE_SIZE, OUTDOOR_CACHE_TTL, CACHE_DB_PATH,
+    busy_timeout=CACHE_BUSY_TIMEOUT
+)
+
+# Обновление популярных прогнозов до истечения их срока в кэше
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "200"))
+PREFETCH_LEAD_SECONDS = float(os.getenv("PREFETCH_LEAD_SECONDS", "60"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+# Maximum number of prefetch requests started per second
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", "5"))
+
+prefetcher = PrefetchScheduler(
+    lambda latitude, longitude, horizon: prefetch_forecast(latitude, longitude, horizon),
+    interval=FORECAST_REFRESH_SECONDS,
+    top_n=PREFETCH_TOP_N,
+    lead_time=PREFETCH_LEAD_SECONDS,
+    concurrency=PREFETCH_CONCURRENCY,
+    rate=PREFETCH_RATE,
+)
+
+# Максимальное число городов в get_weather_for_cities
+MAX_BATCH_CITIES = int(os.getenv("MAX_BATCH_CITIES", "10"))
+
+# Формат ответов инструментов: "text" (читаемый текст) или "compact" (JSON)
+OUTPUT_FORMATS = ("text", "compact")
+WEATHER_OUTPUT_FORMAT = os.getenv("WEATHER_OUTPUT_FORMAT", "text")
+
+# Единицы, язык и формат времени по умолчанию; forecasts are cached in
+# metric units and converted when a response is rendered
+DEFAULT_PREFERENCES = Preferences(
+    units=os.getenv("WEATHER_UNITS", "metric"),
+    language=os.getenv("WEATHER_LANGUAGE", "en"),
+    time_format=os.getenv("WEATHER_TIME_FORMAT", "24h"),
+)
+
+# Optional offline gazetteer (see gazetteer.py), opened in the app lifespan
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "mcp_data/gazetteer.bin")
+gazetteer: Optional[Gazetteer] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Creates a pooled HTTP client for the Open-Meteo APIs.
+
+    HTTP/2 is used only when enabled and the optional ``h2`` package
+    is installed (``httpx[http2]``). With OPEN_METEO_HTTP_CACHE the
+    connection pool sits behind a CachingTransport that honors the
+    upstream cache headers.
+
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    http2 = HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    if HTTP_CACHE_ENABLED:
+        transport = CachingTransport(
+            transport, http_response_cache, HTTP_CACHE_RETENTION, http_cache_counters
+        )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            HTTP_READ_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide HTTP client, creating it on first use.
+
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Closes the shared HTTP client, if it was opened"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def alias_keys(city_name: str) -> List[str]:
+    """
+    Returns the alias index keys of a city name.
+
+    Args:
+        city_name: City name in any language or transliteration
+
+    Returns:
+        Normalized name, followed by its ASCII transliteration if it differs
+    """
+    name = normalize_city_name(city_name)
+    return list(dict.fromkeys(key for key in (name, transliterate(name)) if key))
+
+
+def find_location(city_name: str) -> object:
+    """
+    Resolves a city name through the alias index.
+
+    Args:
+        city_name: City name in any language or transliteration
+
+    Returns:
+        Tuple[latitude, longitude], None for a name known to be missing,
+        or MISSING if the name has not been resolved yet
+    """
+    for key in alias_keys(city_name):
+        location_id = alias_cache.get(key)
+        if location_id is MISSING:
+            continue
+        if location_id is None:
+            return None
+        coordinates = geocode_cache.get(location_id)
+        if coordinates is not MISSING:
+            return tuple(coordinates)
+    return MISSING
+
+
+def fuzzy_distance(name: str) -> int:
+    """
+    Returns the edit distance allowed for a name.
+
+    Short names allow fewer edits, so that "Rome" is not corrected to
+    another short city name.
+
+    Args:
+        name: Normalized name
+
+    Returns:
+        0 for names shorter than 5 characters, 1 up to 8 characters,
+        FUZZY_MAX_DISTANCE for longer names
+    """
+    if len(name) < 5:
+        return 0
+    if len(name) < 9:
+        return min(1, FUZZY_MAX_DISTANCE)
+    return FUZZY_MAX_DISTANCE
+
+
+def find_near_miss(city_name: str) -> Optional[Tuple[float, float]]:
+    """
+    Corrects a misspelled city name with the fuzzy index.
+
+    Args:
+        city_name: City name in any language or transliteration
+
+    Returns:
+        Tuple[latitude, longitude] of the closest known name, or None
+    """
+    if FUZZY_MAX_DISTANCE <= 0:
+        return None
+    for key in alias_keys(city_name):
+        match = fuzzy_index.search(key, fuzzy_distance(key))
+        if match is not None:
+            return tuple(match.value)
+    return None
+
+
+def index_names(names: Tuple[str, ...], coordinates: Tuple[float, float]) -> None:
+    """Adds the variants of resolved city names to the fuzzy index"""
+    for name in names:
+        for key in alias_keys(name):
+            fuzzy_index.add(key, coordinates)
+
+
+def index_gazetteer(source: Gazetteer, index: Optional[TrigramIndex] = None) -> int:
+    """
+    Adds the names of the most populous gazetteer cities to a fuzzy index,
+    as evictable names, until it is full.
+
+    Args:
+        source: Opened gazetteer
+        index: Index to fill, fuzzy_index by default
+
+    Returns:
+        Number of indexed names
+    """
+    if FUZZY_MAX_DISTANCE <= 0:
+        return 0
+    index = fuzzy_index if index is None else index
+    largest = heapq.nlargest(
+        index.max_names, source.items(), key=lambda item: item[1].population
+    )
+    return index.update(
+        ((name, (entry.latitude, entry.longitude)) for name, entry in largest),
+        evictable=True,
+    )
+
+
+async def load_fuzzy_index(source: Gazetteer) -> None:
+    """
+    Indexes the gazetteer in a thread, so that startup does not wait for it,
+    and merges the result into fuzzy_index.
+
+    Args:
+        source: Opened gazetteer
+    """
+    index = TrigramIndex(FUZZY_INDEX_SIZE)
+    try:
+        await asyncio.to_thread(index_gazetteer, source, index)
+    except Exception as e:
+        print(f"Gazetteer indexing error: {e}")
+        return
+    fuzzy_index.merge(index)
+
+
+async def get_city_coordinates(
+    city_name: str
+) -> Optional[Tuple[float, float]]:
+    """
+    Gets city coordinates via the Open-Meteo Geocoding API.
+
+    Cities from the offline gazetteer are resolved locally. API results
+    are cached by location id, and every name variant seen for a
+    location (the query, the returned name and their transliterations)
+    is added to the alias index, so other spellings of a resolved city
+    need no API call. Misspelled names within a few edits of a resolved
+    or gazetteer city are corrected locally before the API is called.
+    Cities that were not found are cached for a shorter time.
+
+    Args:
+        city_name: City name
+
+    Returns:
+        Tuple[latitude, longitude] or None if not found
+
+    Raises:
+        CircuitOpenError: The geocoding circuit is open
+        McpError: The upstream budget is exhausted
+    """
+    if gazetteer is not None:
+        entry = gazetteer.lookup(city_name)
+        if entry is not None:
+            return entry.latitude, entry.longitude
+
+    coordinates = find_location(city_name)
+    if coordinates is not None and coordinates is not MISSING:
+        return coordinates
+
+    corrected = find_near_miss(city_name)
+    if corrected is not None:
+        return corrected
+    if coordinates is None:
+        return None
+
+    try:
+        # Concurrent lookups of the same city share one request
+        return await geocode_flight.do(
+            alias_keys(city_name)[0], lambda: fetch_city_coordinates(city_name)
+        )
+    except (CircuitOpenError, McpError):
+        # Unavailable or busy, not unknown: reported like a failed forecast request
+        raise
+    except Exception as e:
+        print(f"Coordinate error for the city {city_name}: {e}")
+        return None
+
+
+async def fetch_city_coordinates(city_name: str) -> Optional[Tuple[float, float]]:
+    """
+    Requests city coordinates from the Open-Meteo Geocoding API and
+    caches the result with its name variants.
+
+    Args:
+        city_name: City name
+
+    Returns:
+        Tuple[latitude, longitude] or None if not found
+    """
+    params = {
+        "name": city_name,
+        "count": 1,
+        "language": GEOCODING_LANGUAGE,
+        "format": "json"
+    }
+
+    response = await geocoding_upstream.get(GEOCODING_URL, params=params)
+
+    data = response.json()
+
+    if "results" not in data or not data["results"]:
+        # Only the exact name: a transliteration may still match another city
+        alias_cache.set(normalize_city_name(city_name), None, ttl=GEOCODE_NEGATIVE_TTL)
+        return None
+
+    result = data["results"][0]
+    coordinates = (result["latitude"], result["longitude"])
+    # GeoNames id, coordinates for results without one
+    location_id = str(result.get("id") or f"{coordinates[0]:.4f},{coordinates[1]:.4f}")
+    geocode_cache.set(location_id, coordinates)
+    names = (city_name, result.get("name") or "")
+    for name in names:
+        for key in alias_keys(name):
+            alias_cache.set(key, location_id)
+    index_names(names, coordinates)
+    return coordinates
+
+
+# Параметры для текущей погоды
+CURRENT_PARAMS = [
+    "temperature_2m",
+    "relative_humidity_2m",
+    "weather_code",
+    "wind_speed_10m",
+    "surface_pressure"
+]
+
+# Параметры для ежедневного прогноза
+DAILY_PARAMS = [
+    "weather_code",
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_probability_max",
+    "wind_speed_10m_max"
+]
+
+
+def forecast_params(latitude: str, longitude: str, days: int) -> Dict:
+    """
+    Builds Open-Meteo forecast request parameters.
+
+    Args:
+        latitude: Latitude, or comma-separated latitudes
+        longitude: Longitude, or comma-separated longitudes
+        days: Number of forecast days
+
+    Returns:
+        Query parameters
+    """
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": ",".join(CURRENT_PARAMS),
+        "daily": ",".join(DAILY_PARAMS),
+        # Canonical units of cached forecasts, see localization.py
+        "wind_speed_unit": "ms",
+        "timezone": "auto",
+        "forecast_days": days
+    }
+
+
+async def get_weather_data(
+    latitude: float, 
+    longitude: float, 
+    days: int = 1
+) -> Dict:
+    """
+    Retrieves weather data via the Open-Meteo API
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        days: Number of forecast days
+
+    Returns:
+        Dictionary with weather data
+    """
+    params = forecast_params(latitude, longitude, days)
+
+    response = await forecast_upstream.get(FORECAST_URL, params=params)
+
+    return response.json()
+
+
+async def get_weather_data_batch(
+    locations: List[Tuple[float, float]],
+    days: int = 1
+) -> List[Dict]:
+    """
+    Retrieves weather data for several locations in one Open-Meteo request.
+
+    Args:
+        locations: List of (latitude, longitude)
+        days: Number of forecast days
+
+    Returns:
+        Weather data for each location, in the same order
+    """
+    params = forecast_params(
+        ",".join(str(latitude) for latitude, _ in locations),
+        ",".join(str(longitude) for _, longitude in locations),
+        days
+    )
+
+    response = await forecast_upstream.get(FORECAST_URL, params=params)
+
+    # Для одной точки Open-Meteo возвращает объект, для нескольких - список
+    data = response.json()
+    return data if isinstance(data, list) else [data]
+
+
+def snap_to_grid(latitude: float, longitude: float) -> Tuple[float, float]:
+    """
+    Snaps coordinates to the center of a forecast cache grid cell.
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+
+    Returns:
+        Tuple[latitude, longitude] of the grid cell
+    """
+    step = FORECAST_GRID_STEP
+    return (
+        round(round(latitude / step) * step, 4),
+        round(round(longitude / step) * step, 4),
+    )
+
+
+def forecast_ttl(now: Optional[float] = None) -> float:
+    """
+    Returns the number of seconds until the next upstream refresh.
+
+    Args:
+        now: Current UNIX time, defaults to time.time()
+
+    Returns:
+        Time-to-live for a forecast fetched now
+    """
+    now = time.time() if now is None else now
+    return FORECAST_REFRESH_SECONDS - now % FORECAST_REFRESH_SECONDS
+
+
+def forecast_horizon(days: int) -> int:
+    """
+    Returns the horizon to request from Open-Meteo for the given days.
+
+    Args:
+        days: Number of forecast days needed
+
+    Returns:
+        Shortest standard horizon covering the request
+    """
+    for horizon in FORECAST_HORIZONS:
+        if days <= horizon:
+            return horizon
+    return days
+
+
+def forecast_cache_key(latitude: float, longitude: float, horizon: int) -> str:
+    """Returns the forecast cache key of a grid cell and horizon"""
+    return f"{latitude:.4f},{longitude:.4f}:{horizon}"
+
+
+def find_cached_forecast(
+    cell_latitude: float,
+    cell_longitude: float,
+    days: int
+) -> Tuple[str, object]:
+    """
+    Looks up the shortest cached horizon covering the requested days.
+
+    Args:
+        cell_latitude: Latitude of the grid cell
+        cell_longitude: Longitude of the grid cell
+        days: Number of forecast days
+
+    Returns:
+        Tuple[cache key, cached forecast or MISSING]; on a miss the key
+        is the one to store a new fetch under
+    """
+    cache_key = forecast_cache_key(
+        cell_latitude, cell_longitude, forecast_horizon(days)
+    )
+    for horizon in FORECAST_HORIZONS:
+        key = forecast_cache_key(cell_latitude, cell_longitude, horizon)
+        if horizon >= days and key in forecast_cache:
+            cache_key = key
+            break
+
+    return cache_key, forecast_cache.get(cache_key)
+
+
+def find_stale_forecast(
+    cell_latitude: float,
+    cell_longitude: float,
+    days: int
+) -> object:
+    """
+    Looks up an expired forecast covering the requested days that is still
+    within FORECAST_MAX_STALENESS.
+
+    Args:
+        cell_latitude: Latitude of the grid cell
+        cell_longitude: Longitude of the grid cell
+        days: Number of forecast days
+
+    Returns:
+        ForecastRecord marked with stale_for (seconds since expiry) or MISSING
+    """
+    for horizon in FORECAST_HORIZONS:
+        if horizon < days:
+            continue
+        record, stale_for = forecast_cache.get_stale(
+            forecast_cache_key(cell_latitude, cell_longitude, horizon)
+        )
+        if record is not MISSING:
+            return record.as_stale(stale_for)
+    return MISSING
+
+
+def revalidate_forecast(
+    cell_latitude: float,
+    cell_longitude: float,
+    days: int,
+    cache_key: str
+) -> None:
+    """
+    Refreshes a stale forecast in the background.
+
+    Args:
+        cell_latitude: Latitude of the grid cell
+        cell_longitude: Longitude of the grid cell
+        days: Number of forecast days
+        cache_key: Forecast cache key to store the fresh forecast under
+    """
+    async def revalidate() -> None:
+        try:
+            await forecast_flight.do(
+                cache_key,
+                lambda: fetch_forecast(cell_latitude, cell_longitude, days, cache_key)
+            )
+        except Exception as e:
+            forecast_revalidations["failed"] += 1
+            print(f"Error refreshing stale forecast {cache_key}: {e}")
+
+    forecast_revalidations["started"] += 1
+    task = asyncio.ensure_future(revalidate())
+    # Keep a reference until the task is done
+    _revalidation_tasks.add(task)
+    task.add_done_callback(_revalidation_tasks.discard)
+
+
+async def get_forecast(
+    latitude: float,
+    longitude: float,
+    days: int = 1
+) -> ForecastRecord:
+    """
+    Returns the forecast for the grid cell containing the coordinates.
+
+    Forecasts are cached per grid cell and horizon as compact
+    ForecastRecords, so nearby locations and shorter requests share one
+    upstream fetch. A recently expired forecast is returned at once,
+    marked with stale_for (seconds since expiry), while a fresh one is
+    fetched in the background.
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        days: Number of forecast days
+
+    Returns:
+        ForecastRecord cut to `days` days
+    """
+    cell_latitude, cell_longitude = snap_to_grid(latitude, longitude)
+
+    cache_key, weather_data = find_cached_forecast(
+        cell_latitude, cell_longitude, days
+    )
+    prefetcher.record(
+        (cell_latitude, cell_longitude, forecast_horizon(days)),
+        cache_key,
+        hit=weather_data is not MISSING
+    )
+    if weather_data is MISSING:
+        weather_data = find_stale_forecast(cell_latitude, cell_longitude, days)
+        if weather_data is not MISSING:
+            revalidate_forecast(cell_latitude, cell_longitude, days, cache_key)
+    if weather_data is MISSING:
+        # Concurrent requests for the same cell share one request
+        weather_data = await forecast_flight.do(
+            cache_key,
+            lambda: fetch_forecast(cell_latitude, cell_longitude, days, cache_key)
+        )
+
+    return weather_data.head(days)
+
+
+async def fetch_forecast(
+    latitude: float,
+    longitude: float,
+    days: int,
+    cache_key: str,
+    ttl: Optional[float] = None
+) -> ForecastRecord:
+    """
+    Requests a forecast for a grid cell from Open-Meteo and caches it.
+
+    Args:
+        latitude: Latitude of the grid cell
+        longitude: Longitude of the grid cell
+        days: Number of forecast days needed
+        cache_key: Forecast cache key of the cell
+        ttl: Time-to-live in the cache, until the next upstream refresh by default
+
+    Returns:
+        ForecastRecord of the cell
+    """
+    weather_data = await get_weather_data(
+        latitude, longitude, forecast_horizon(days)
+    )
+    record = ForecastRecord.from_open_meteo(weather_data)
+    forecast_cache.set(
+        cache_key, record, ttl=forecast_ttl() if ttl is None else ttl
+    )
+    return record
+
+
+async def prefetch_forecast(latitude: float, longitude: float, horizon: int) -> List[str]:
+    """
+    Refreshes the cached forecasts of a grid cell ahead of their expiry.
+
+    One forecast is fetched for the largest horizon and also stored, cut,
+    under the keys of the shorter horizons, so a cell requested for 1 and
+    7 days costs one request. A forecast fetched within
+    PREFETCH_LEAD_SECONDS of an upstream refresh is kept until the
+    following one, so the entries it replaces never expire in front of a
+    user request.
+
+    Args:
+        latitude: Latitude of the grid cell
+        longitude: Longitude of the grid cell
+        horizon: Largest forecast horizon requested for the cell, in days
+
+    Returns:
+        Forecast cache keys of the refreshed entries
+    """
+    cache_key = forecast_cache_key(latitude, longitude, horizon)
+    now = time.time()
+    ttl = forecast_ttl(now + PREFETCH_LEAD_SECONDS) + PREFETCH_LEAD_SECONDS
+    record = await forecast_flight.do(
+        cache_key,
+        lambda: fetch_forecast(latitude, longitude, horizon, cache_key, ttl=ttl)
+    )
+    cache_keys = [cache_key]
+    for shorter in FORECAST_HORIZONS:
+        if shorter < horizon:
+            key = forecast_cache_key(latitude, longitude, shorter)
+            forecast_cache.set(key, record.head(shorter), ttl=ttl)
+            cache_keys.append(key)
+    return cache_keys
+
+
+async def get_forecasts(
+    locations: List[Tuple[float, float]],
+    days: int = 1
+) -> List[ForecastRecord]:
+    """
+    Returns forecasts for several locations.
+
+    Cached grid cells are served from the cache (stale ones are refreshed
+    in the background), all the others are fetched with a single
+    Open-Meteo request.
+
+    Args:
+        locations: List of (latitude, longitude)
+        days: Number of forecast days
+
+    Returns:
+        ForecastRecords cut to `days` days, in input order
+    """
+    cells = [snap_to_grid(latitude, longitude) for latitude, longitude in locations]
+    forecasts: Dict[Tuple[float, float], ForecastRecord] = {}
+    missing: Dict[Tuple[float, float], str] = {}
+
+    for cell in cells:
+        if cell in forecasts or cell in missing:
+            continue
+        cache_key, weather_data = find_cached_forecast(*cell, days)
+        prefetcher.record(
+            (*cell, forecast_horizon(days)), cache_key, hit=weather_data is not MISSING
+        )
+        if weather_data is MISSING:
+            weather_data = find_stale_forecast(*cell, days)
+            if weather_data is not MISSING:
+                revalidate_forecast(*cell, days, cache_key)
+        if weather_data is MISSING:
+            missing[cell] = cache_key
+        else:
+            forecasts[cell] = weather_data
+
+    if missing:
+        fetched = await get_weather_data_batch(
+            list(missing), forecast_horizon(days)
+        )
+        ttl = forecast_ttl()
+        for (cell, cache_key), weather_data in zip(missing.items(), fetched):
+            record = ForecastRecord.from_open_meteo(weather_data)
+            forecast_cache.set(cache_key, record, ttl=ttl)
+            forecasts[cell] = record
+
+    return [forecasts[cell].head(days) for cell in cells]
+
+
+def hourly_cache_key(latitude: float, longitude: float, days: int) -> str:
+    """Returns the hourly forecast cache key of a grid cell and horizon"""
+    return f"{latitude:.4f},{longitude:.4f}:h{days}"
+
+
+async def fetch_hourly(
+    latitude: float,
+    longitude: float,
+    days: int,
+    cache_key: str
+) -> HourlyForecast:
+    """
+    Requests hourly variables for a grid cell from Open-Meteo and caches
+    them as arrays.
+
+    Args:
+        latitude: Latitude of the grid cell
+        longitude: Longitude of the grid cell
+        days: Number of forecast days
+        cache_key: Hourly cache key of the cell
+
+    Returns:
+        HourlyForecast starting at local midnight of today
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": ",".join(HOURLY_PARAMS),
+        "wind_speed_unit": "ms",
+        "timezone": "auto",
+        "forecast_days": days
+    }
+
+    response = await forecast_upstream.get(FORECAST_URL, params=params)
+
+    forecast = HourlyForecast.from_open_meteo(response.json())
+    hourly_cache.set(cache_key, forecast, ttl=forecast_ttl())
+    return forecast
+
+
+async def get_hourly(
+    latitude: float,
+    longitude: float,
+    hours: int = 24,
+    now: Optional[float] = None
+) -> HourlyForecast:
+    """
+    Returns the hourly forecast for the grid cell containing the coordinates.
+
+    One upstream fetch per grid cell and horizon serves every window and
+    summary until the next upstream refresh.
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        hours: Number of hours from the current one
+        now: UNIX time, defaults to time.time()
+
+    Returns:
+        HourlyForecast of at most `hours` hours starting with the current one
+    """
+    cell_latitude, cell_longitude = snap_to_grid(latitude, longitude)
+    horizons = [days for days in HOURLY_HORIZONS if hours <= (days - 1) * 24]
+
+    forecast = MISSING
+    for days in horizons:
+        forecast = hourly_cache.get(hourly_cache_key(cell_latitude, cell_longitude, days))
+        if forecast is not MISSING:
+            break
+    if forecast is MISSING:
+        cache_key = hourly_cache_key(cell_latitude, cell_longitude, horizons[0])
+        forecast = await forecast_flight.do(
+            cache_key,
+            lambda: fetch_hourly(cell_latitude, cell_longitude, horizons[0], cache_key)
+        )
+
+    return forecast.next_hours(hours, now)
+
+
+async def fetch_air_quality(latitude: float, longitude: float, cache_key: str) -> AirQuality:
+    """
+    Fetches current air quality of a grid cell and caches it.
+
+    Args:
+        latitude: Latitude of the grid cell
+        longitude: Longitude of the grid cell
+        cache_key: Air quality cache key of the cell
+
+    Returns:
+        AirQuality
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": ",".join(AIR_QUALITY_PARAMS),
+        "timezone": "auto"
+    }
+
+    response = await air_quality_upstream.get(AIR_QUALITY_URL, params=params)
+
+    air_quality = AirQuality.from_open_meteo(response.json())
+    air_quality_cache.set(cache_key, air_quality)
+    return air_quality
+
+
+async def get_air_quality(latitude: float, longitude: float) -> AirQuality:
+    """Returns the air quality of the grid cell containing the coordinates"""
+    cell_latitude, cell_longitude = snap_to_grid(latitude, longitude)
+    cache_key = f"{cell_latitude:.4f},{cell_longitude:.4f}:aq"
+    air_quality = air_quality_cache.get(cache_key)
+    if air_quality is MISSING:
+        air_quality = await forecast_flight.do(
+            cache_key, lambda: fetch_air_quality(cell_latitude, cell_longitude, cache_key)
+        )
+    return air_quality
+
+
+async def fetch_astronomy(latitude: float, longitude: float, cache_key: str) -> Astronomy:
+    """
+    Fetches today's sunrise, sunset and UV index of a grid cell and caches
+    them.
+
+    Args:
+        latitude: Latitude of the grid cell
+        longitude: Longitude of the grid cell
+        cache_key: Astronomy cache key of the cell
+
+    Returns:
+        Astronomy in the local time of the cell
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "daily": ",".join(ASTRONOMY_PARAMS),
+        "timezone": "auto",
+        "forecast_days": 1
+    }
+
+    response = await forecast_upstream.get(FORECAST_URL, params=params)
+
+    astronomy = Astronomy.from_open_meteo(response.json())
+    astronomy_cache.set(cache_key, astronomy)
+    return astronomy
+
+
+async def get_astronomy(latitude: float, longitude: float) -> Astronomy:
+    """Returns today's sun times of the grid cell containing the coordinates"""
+    cell_latitude, cell_longitude = snap_to_grid(latitude, longitude)
+    cache_key = f"{cell_latitude:.4f},{cell_longitude:.4f}:sun"
+    astronomy = astronomy_cache.get(cache_key)
+    if astronomy is MISSING:
+        astronomy = await forecast_flight.do(
+            cache_key, lambda: fetch_astronomy(cell_latitude, cell_longitude, cache_key)
+        )
+    return astronomy
+
+
+async def get_outdoor_data(
+    latitude: float,
+    longitude: float,
+    hours: int = OUTDOOR_HOURS
+) -> Tuple[ForecastRecord, HourlyForecast, Optional[AirQuality], Optional[Astronomy]]:
+    """
+    Gets the forecast, hourly outlook, air quality and sun times of one
+    location concurrently.
+
+    The four datasets come from independent cached lookups, so the call
+    takes as long as the slowest upstream request instead of their sum.
+    Air quality and sun times are supplementary: if their request fails,
+    None is returned in their place.
+
+    Args:
+        latitude: Latitude
+        longitude: Longitude
+        hours: Hours of the hourly outlook
+
+    Returns:
+        (forecast, hourly forecast, air quality or None, astronomy or None)
+    """
+    forecast, hourly, air_quality, astronomy = await asyncio.gather(
+        get_forecast(latitude, longitude, 1),
+        get_hourly(latitude, longitude, hours),
+        get_air_quality(latitude, longitude),
+        get_astronomy(latitude, longitude),
+        return_exceptions=True
+    )
+    for result in (forecast, hourly):
+        if isinstance(result, BaseException):
+            raise result
+    if isinstance(air_quality, BaseException):
+        print(f"Air quality error at {latitude}, {longitude}: {air_quality}")
+        air_quality = None
+    if isinstance(astronomy, BaseException):
+        print(f"Astronomy error at {latitude}, {longitude}: {astronomy}")
+        astronomy = None
+    return forecast, hourly, air_quality, astronomy
+
+
+def weather_code_to_description(code: int, language: str = "en") -> str:
+    """
+    Converts a WMO weather code to a text description.
+
+    Args:
+        code: WMO weather code
+        language: Output language, "en" or "ru"
+
+    Returns:
+        Text description of the weather
+    """
+    return describe_weather(code, language)
+
+
+async def get_real_weather_data(
+    city_name: str,
+    days: int = 1,
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> Dict:
+    """
+    Gets real weather data for the specified city.
+
+    Args:
+        city_name: City name
+        days: Number of forecast days
+        preferences: Units and language of the result
+
+    Returns:
+        Dictionary with weather data
+    """
+    # Получаем координаты города
+    coordinates = await get_city_coordinates(city_name)
+    if not coordinates:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=messages(preferences)["city_not_found_error"].format(city=city_name)
+            )
+        )
+    
+    latitude, longitude = coordinates
+    
+    # Получаем данные о погоде (из кэша, если есть)
+    weather_data = await get_forecast(latitude, longitude, days)
+
+    return parse_weather_data(city_name, latitude, longitude, weather_data, preferences)
+
+
+def parse_weather_data(
+    city_name: str,
+    latitude: float,
+    longitude: float,
+    weather_data: Union[ForecastRecord, Dict],
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> Dict:
+    """
+    Decodes a cached forecast into tool weather data.
+
+    The forecast holds canonical metric units; values are converted to
+    the requested unit system and descriptions to the requested language.
+
+    Args:
+        city_name: City name
+        latitude: Latitude of the city
+        longitude: Longitude of the city
+        weather_data: ForecastRecord, or a raw Open-Meteo forecast response
+        preferences: Units, language and clock format
+
+    Returns:
+        Dictionary with weather data
+    """
+    if isinstance(weather_data, dict):
+        weather_data = ForecastRecord.from_open_meteo(weather_data)
+
+    # Парсим текущую погоду
+    current_time = weather_data.observed_at()
+
+    units, language = preferences.units, preferences.language
+    current_weather = {
+        "temperature": round(convert_temperature(weather_data.temperature, units)),
+        "condition": weather_code_to_description(weather_data.weather_code, language),
+        "humidity": weather_data.humidity,
+        "wind_speed": round(convert_wind_speed(weather_data.wind_speed, units)),
+        "pressure": round_to(
+            convert_pressure(weather_data.pressure, units), PRESSURE_DECIMALS[units]
+        )
+    }
+
+    # Парсим прогноз
+    forecast = []
+
+    for day in weather_data.daily():
+        forecast_date = datetime.fromisoformat(day["date"])
+
+        forecast.append({
+            "date": day["date"],
+            "weekday": WEEKDAYS[language][forecast_date.weekday()],
+            "day_temp": round(convert_temperature(day["temperature_max"], units)),
+            "night_temp": round(convert_temperature(day["temperature_min"], units)),
+            "condition": weather_code_to_description(day["weather_code"], language),
+            "wind_speed": round(convert_wind_speed(day["wind_speed_max"], units)),
+            "precipitation_chance": day["precipitation_probability"]
+        })
+
+    result = {
+        "city": city_name.title(),
+        "coordinates": {"latitude": latitude, "longitude": longitude},
+        "current_time": (
+            f"{current_time.date().isoformat()} {format_clock(current_time, preferences)} UTC"
+        ),
+        "current_weather": current_weather,
+        "forecast": forecast
+    }
+    if weather_data.stale_for is not None:
+        # Served from the cache past its refresh time
+        result["stale_minutes"] = max(1, round(weather_data.stale_for / 60))
+    return result
+
+
+def stale_note(weather_data: Dict, preferences: Preferences = DEFAULT_PREFERENCES) -> str:
+    """
+    Returns a warning line for stale weather data.
+
+    Args:
+        weather_data: Result of parse_weather_data()
+        preferences: Output language
+
+    Returns:
+        Warning followed by a blank line, or an empty string for fresh data
+    """
+    if "stale_minutes" not in weather_data:
+        return ""
+    note = messages(preferences)["stale"].format(minutes=weather_data["stale_minutes"])
+    return f"⚠️ {note}\n\n"
+
+
+def client_key(ctx: Optional[Context]) -> Optional[str]:
+    """
+    Identifies the client of a tool call for the per-client rate limit.
+
+    Args:
+        ctx: Request context injected by FastMCP
+
+    Returns:
+        The CLIENT_ID_HEADER value, else the SSE session id, else the
+        client address; None for calls made outside of a request
+    """
+    if ctx is None:
+        return None
+    try:
+        request = ctx.request_context.request
+    except ValueError:
+        return None
+    if request is None:
+        return None
+
+    client_id = request.headers.get(CLIENT_ID_HEADER)
+    if client_id:
+        return f"client:{client_id}"
+    session_id = request.query_params.get("session_id")
+    if session_id:
+        return f"session:{session_id}"
+    if request.client is not None:
+        return f"address:{request.client.host}"
+    return None
+
+
+def resolve_output_format(output_format: Optional[str]) -> str:
+    """
+    Returns the output format of a tool call.
+
+    Args:
+        output_format: Format requested by the caller, None for the
+            server default
+
+    Returns:
+        "text" or "compact"
+    """
+    output_format = (output_format or WEATHER_OUTPUT_FORMAT).strip().lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=f"Unknown output format '{output_format}', "
+                        f"expected one of: {', '.join(OUTPUT_FORMATS)}"
+            )
+        )
+    return output_format
+
+
+def resolve_preferences(
+    units: Optional[str],
+    language: Optional[str],
+    time_format: Optional[str]
+) -> Preferences:
+    """
+    Returns the rendering preferences of a tool call.
+
+    Args:
+        units: "metric" or "imperial", None for the server default
+        language: "en" or "ru", None for the server default
+        time_format: "24h" or "12h", None for the server default
+
+    Returns:
+        Preferences
+    """
+    values = []
+    for name, value, default, choices in (
+        ("units", units, DEFAULT_PREFERENCES.units, UNIT_SYSTEMS),
+        ("language", language, DEFAULT_PREFERENCES.language, LANGUAGES),
+        ("time format", time_format, DEFAULT_PREFERENCES.time_format, TIME_FORMATS),
+    ):
+        value = (value or default).strip().lower()
+        if value not in choices:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"Unknown {name} '{value}', expected one of: {', '.join(choices)}"
+                )
+            )
+        values.append(value)
+    return Preferences(*values)
+
+
+def to_compact_json(data: Dict) -> str:
+    """Serializes data as JSON without whitespace"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_today_weather(
+    weather_data: Dict,
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> str:
+    """
+    Formats today's weather as readable text.
+
+    Args:
+        weather_data: Result of get_real_weather_data()
+        preferences: Units and language of weather_data
+
+    Returns:
+        Text for the LLM
+    """
+    current = weather_data["current_weather"]
+    today_forecast = weather_data["forecast"][0]
+    coords = weather_data["coordinates"]
+    text = messages(preferences)
+    unit = unit_labels(preferences)
+
+    return f"""🌤️ {text['today_title'].format(city=weather_data['city'])}
+
+📍 {text['coordinates']}: {coords['latitude']:.2f}, {coords['longitude']:.2f}
+🕒 {text['time']}: {weather_data['current_time']}
+
+🌡️ {text['now']}: {current['temperature']}{unit['temperature']}
+☁️ {text['conditions']}: {current['condition']}
+💧 {text['humidity']}: {current['humidity']}%
+💨 {text['wind_speed']}: {current['wind_speed']} {unit['wind']}
+📊 {text['pressure']}: {current['pressure']} {unit['pressure']}
+
+📅 {text['today_forecast']}:
+🌅 {text['maximum']}: {today_forecast['day_temp']}{unit['temperature']}
+🌙 {text['minimum']}: {today_forecast['night_temp']}{unit['temperature']}
+🌧️ {text['precipitation_chance']}: {today_forecast['precipitation_chance']}%
+
+{stale_note(weather_data, preferences)}🔗 {text['source']}"""
+
+
+def format_weekly_forecast(
+    weather_data: Dict,
+    preferences: Preferences = DEFAULT_PREFERENCES,
+    days: Optional[int] = None
+) -> str:
+    """
+    Formats a multi-day forecast as readable text.
+
+    Args:
+        weather_data: Result of get_real_weather_data()
+        preferences: Units and language of weather_data
+        days: Number of days to name in the title instead of "weekly"
+
+    Returns:
+        Text for the LLM
+    """
+    coords = weather_data["coordinates"]
+    text = messages(preferences)
+    unit = unit_labels(preferences)
+
+    city_name = weather_data['city']
+    lat, lon = coords['latitude'], coords['longitude']
+    if days is None:
+        title = text['weekly_title'].format(city=city_name)
+        heading = text['weekly_forecast']
+    else:
+        title = text['days_title'].format(city=city_name, days=days)
+        heading = text['days_forecast'].format(days=days)
+    result = f"""📅 {title}
+
+📍 {text['coordinates']}: {lat:.2f}, {lon:.2f}
+🕒 {text['updated']}: {weather_data['current_time']}
+
+📊 {heading}:
+"""
+
+    for day in weather_data['forecast']:
+        result += f"""
+📆 {day['date']} ({day['weekday']})
+   🌅 {text['max']}: {day['day_temp']}{unit['temperature']} | 🌙 {text['min']}: {day['night_temp']}{unit['temperature']}
+   ☁️ {day['condition']} | 💨 {day['wind_speed']} {unit['wind']}
+   🌧️ {text['precipitation_chance']}: {day['precipitation_chance']}%"""
+
+    result += f"\n\n{stale_note(weather_data, preferences)}🔗 {text['source']}"
+
+    return result
+
+
+def format_cities_weather(
+    names: List[str],
+    weather_by_city: Dict[str, Dict],
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> str:
+    """
+    Formats today's weather for several cities as readable text.
+
+    Args:
+        names: Requested city names
+        weather_by_city: Results of parse_weather_data() by city name;
+            cities that were not found are missing
+        preferences: Units and language of weather_by_city
+
+    Returns:
+        Text for the LLM
+    """
+    text = messages(preferences)
+    unit = unit_labels(preferences)
+    result = f"🌍 {text['cities_title'].format(count=len(names))}\n"
+    for name in names:
+        weather_data = weather_by_city.get(name)
+        if weather_data is None:
+            result += f"\n❓ {name.title()}: {text['city_not_found']}\n"
+            continue
+
+        current = weather_data["current_weather"]
+        today = weather_data["forecast"][0]
+        stale = f" ⚠️ {text['cached']}" if "stale_minutes" in weather_data else ""
+        result += f"""
+🏙️ {weather_data['city']}: {current['temperature']}{unit['temperature']}, {current['condition']}{stale}
+   🌅 {text['max']}: {today['day_temp']}{unit['temperature']} | 🌙 {text['min']}: {today['night_temp']}{unit['temperature']}
+   🌧️ {text['precipitation_chance']}: {today['precipitation_chance']}% | 💨 {current['wind_speed']} {unit['wind']}
+"""
+
+    result += f"\n🔗 {text['source']}"
+
+    return result
+
+
+def parse_hourly_data(
+    city_name: str,
+    latitude: float,
+    longitude: float,
+    forecast: HourlyForecast
+) -> Dict:
+    """
+    Summarizes an hourly forecast for the tool output.
+
+    Values stay in canonical metric units; they are converted by
+    format_hourly_forecast() and compact_hourly().
+
+    Args:
+        city_name: City name
+        latitude: Latitude of the city
+        longitude: Longitude of the city
+        forecast: Hourly series from the current hour on
+
+    Returns:
+        Dictionary with the series, daily extremes, precipitation windows
+        and the best hours
+    """
+    return {
+        "city": city_name.title(),
+        "coordinates": {"latitude": latitude, "longitude": longitude},
+        "series": forecast,
+        "daily": forecast.daily_summary(),
+        "rain": forecast.precipitation_windows(HOURLY_RAIN_PROBABILITY),
+        "best": forecast.best_hours(HOURLY_BEST_HOURS, HOURLY_RAIN_PROBABILITY),
+    }
+
+
+def format_period(start: str, end: str, preferences: Preferences = DEFAULT_PREFERENCES) -> str:
+    """Formats a local time period, the end without the date if it is the same day"""
+    if start[:10] == end[:10]:
+        return (
+            f"{format_date_time(start, preferences)}–"
+            f"{format_clock(datetime.fromisoformat(end), preferences)}"
+        )
+    return f"{format_date_time(start, preferences)}–{format_date_time(end, preferences)}"
+
+
+def format_precipitation_outlook(
+    weather_data: Dict,
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> str:
+    """
+    Formats the precipitation windows and the best hours of an hourly
+    forecast, one line each.
+
+    Args:
+        weather_data: Result of parse_hourly_data() with a non-empty series
+        preferences: Units, language and clock format
+
+    Returns:
+        Text lines for the LLM
+    """
+    text = messages(preferences)
+    unit = unit_labels(preferences)
+    units = preferences.units
+    first_hour = hour_string(weather_data["series"].time[0])
+
+    def precipitation(amount: float) -> str:
+        value = round_to(convert_precipitation(amount, units), PRECIPITATION_DECIMALS[units])
+        return f"{value} {unit['precipitation']}"
+
+    result = ""
+    rain = weather_data["rain"]
+    if not rain:
+        result += f"☀️ {text['no_precipitation']}\n"
+    for window in rain:
+        if window["start"] == first_hour:
+            end = format_date_time(window["end"], preferences)
+            result += f"🌧️ {text['precipitation_now'].format(end=end)}"
+        else:
+            period = format_period(window["start"], window["end"], preferences)
+            result += f"🌧️ {text['precipitation'].format(period=period)}"
+        result += (
+            f" ({text['up_to']} {window['probability']}%, "
+            f"{precipitation(window['amount'])})\n"
+        )
+
+    best = weather_data["best"]
+    if best:
+        temperature = round(convert_temperature(best["temperature"], units), 1)
+        result += (
+            f"😎 {text['best_time']}: "
+            f"{format_period(best['start'], best['end'], preferences)}, "
+            f"{temperature}{unit['temperature']}\n"
+        )
+    return result
+
+
+def format_hourly_forecast(
+    weather_data: Dict,
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> str:
+    """
+    Formats an hourly forecast as readable text.
+
+    Args:
+        weather_data: Result of parse_hourly_data()
+        preferences: Units, language and clock format
+
+    Returns:
+        Text for the LLM
+    """
+    coords = weather_data["coordinates"]
+    series = weather_data["series"]
+    text = messages(preferences)
+    unit = unit_labels(preferences)
+    units = preferences.units
+    if not len(series):
+        return f"❓ {text['no_hourly'].format(city=weather_data['city'])}"
+
+    def precipitation(amount: float) -> str:
+        value = round_to(convert_precipitation(amount, units), PRECIPITATION_DECIMALS[units])
+        return f"{value} {unit['precipitation']}"
+
+    first_hour = hour_string(series.time[0])
+    title = text["hourly_title"].format(city=weather_data["city"], hours=len(series))
+    result = f"""⏱️ {title}
+
+📍 {text['coordinates']}: {coords['latitude']:.2f}, {coords['longitude']:.2f}
+🕒 {text['from']}: {format_date_time(first_hour, preferences)} ({text['local_time']})
+
+"""
+    result += format_precipitation_outlook(weather_data, preferences)
+
+    daily = weather_data["daily"]
+    result += f"\n📊 {text['by_day']}:\n"
+    for date, low, high, amount in zip(
+        daily["date"], daily["min"], daily["max"], daily["precipitation"]
+    ):
+        low = round(convert_temperature(low, units))
+        high = round(convert_temperature(high, units))
+        result += (
+            f"   📆 {date}: {low}…{high}{unit['temperature']}, 🌧️ {precipitation(amount)}\n"
+        )
+
+    # Every hour for a day, every third hour for longer periods
+    step = 1 if len(series) <= 24 else 3
+    temperature = to_list(convert_temperature(series.temperature[::step], units))
+    probability = to_list(series.precipitation_probability[::step])
+    wind = to_list(convert_wind_speed(series.wind_speed[::step], units))
+    result += f"\n🕐 {text['hourly']}:\n"
+    for hour, t, pp, w, code in zip(
+        series.time[::step], temperature, probability, wind, series.weather_code[::step]
+    ):
+        hour = hour_string(hour)
+        clock = format_clock(datetime.fromisoformat(hour), preferences)
+        condition = weather_code_to_description(int(code), preferences.language)
+        result += (
+            f"   {hour[5:10]} {clock} {t}{unit['temperature']}, {condition}, "
+            f"🌧️ {pp if pp is not None else 0}%, 💨 {w} {unit['wind']}\n"
+        )
+
+    result += f"\n🔗 {text['source']}"
+
+    return result
+
+
+def compact_current(weather_data: Dict) -> Dict:
+    """Current conditions with short keys"""
+    current = weather_data["current_weather"]
+    return {
+        "t": current["temperature"],
+        "c": current["condition"],
+        "h": current["humidity"],
+        "w": current["wind_speed"],
+        "p": current["pressure"],
+    }
+
+
+def compact_daily(weather_data: Dict) -> Dict:
+    """Daily forecast as arrays with short keys"""
+    forecast = weather_data["forecast"]
+    return {
+        "d": [day["date"] for day in forecast],
+        "hi": [day["day_temp"] for day in forecast],
+        "lo": [day["night_temp"] for day in forecast],
+        "c": [day["condition"] for day in forecast],
+        "w": [day["wind_speed"] for day in forecast],
+        "pp": [day["precipitation_chance"] for day in forecast],
+    }
+
+
+def compact_weather(
+    weather_data: Dict,
+    with_current: bool = True,
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> Dict:
+    """
+    Converts tool weather data to the compact output structure.
+
+    Args:
+        weather_data: Result of get_real_weather_data()
+        with_current: Include current conditions
+        preferences: Units of weather_data; non-metric units are marked
+            with a "u" key
+
+    Returns:
+        Dictionary with short keys and daily arrays
+    """
+    coords = weather_data["coordinates"]
+    result = {
+        "city": weather_data["city"],
+        "ll": [round(coords["latitude"], 2), round(coords["longitude"], 2)],
+        "at": weather_data["current_time"],
+    }
+    if preferences.units != "metric":
+        result["u"] = preferences.units
+    if "stale_minutes" in weather_data:
+        result["stale"] = weather_data["stale_minutes"]
+    if with_current:
+        result["now"] = compact_current(weather_data)
+    result["daily"] = compact_daily(weather_data)
+    return result
+
+
+def compact_hourly(
+    weather_data: Dict,
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> Dict:
+    """
+    Converts an hourly forecast to the compact output structure.
+
+    Args:
+        weather_data: Result of parse_hourly_data()
+        preferences: Units; non-metric units are marked with a "u" key
+
+    Returns:
+        Dictionary with short keys and hourly arrays
+    """
+    coords = weather_data["coordinates"]
+    series = weather_data["series"]
+    daily = weather_data["daily"]
+    best = weather_data["best"]
+    units = preferences.units
+    decimals = PRECIPITATION_DECIMALS[units]
+
+    result = {
+        "city": weather_data["city"],
+        "ll": [round(coords["latitude"], 2), round(coords["longitude"], 2)],
+        "from": hour_string(series.time[0]) if len(series) else None,
+    }
+    if units != "metric":
+        result["u"] = units
+    result.update({
+        "hourly": {
+            "t": to_list(convert_temperature(series.temperature, units)),
+            "c": series.weather_code.tolist(),
+            "pp": to_list(series.precipitation_probability),
+            "pr": to_list(convert_precipitation(series.precipitation, units), decimals),
+            "w": to_list(convert_wind_speed(series.wind_speed, units)),
+        },
+        "rain": [
+            [
+                window["start"], window["end"], window["probability"],
+                round(convert_precipitation(window["amount"], units), decimals),
+            ]
+            for window in weather_data["rain"]
+        ],
+        "best": [
+            best["start"], best["end"],
+            round(convert_temperature(best["temperature"], units), 1),
+        ] if best else None,
+        "daily": {
+            "d": daily["date"],
+            "hi": [round(convert_temperature(value, units)) for value in daily["max"]],
+            "lo": [round(convert_temperature(value, units)) for value in daily["min"]],
+            "pr": [
+                round(convert_precipitation(value, units), decimals)
+                for value in daily["precipitation"]
+            ],
+        },
+    })
+    return result
+
+
+def format_daylight(seconds: float, preferences: Preferences = DEFAULT_PREFERENCES) -> str:
+    """Formats a duration in seconds as hours and minutes"""
+    hours, minutes = divmod(round(seconds / 60), 60)
+    return messages(preferences)["hours_minutes"].format(hours=hours, minutes=minutes)
+
+
+def format_outdoor_conditions(
+    weather_data: Dict,
+    hourly_data: Dict,
+    air_quality: Optional[AirQuality],
+    astronomy: Optional[Astronomy],
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> str:
+    """
+    Formats the merged outdoor conditions as readable text.
+
+    Args:
+        weather_data: Result of parse_weather_data() for today
+        hourly_data: Result of parse_hourly_data()
+        air_quality: Current air quality, None if unavailable
+        astronomy: Today's sun times, None if unavailable
+        preferences: Units, language and clock format
+
+    Returns:
+        Text for the LLM
+    """
+    current = weather_data["current_weather"]
+    today = weather_data["forecast"][0]
+    coords = weather_data["coordinates"]
+    text = messages(preferences)
+    unit = unit_labels(preferences)
+
+    result = f"""🏃 {text['outdoor_title'].format(city=weather_data['city'])}
+
+📍 {text['coordinates']}: {coords['latitude']:.2f}, {coords['longitude']:.2f}
+🕒 {text['time']}: {weather_data['current_time']}
+
+"""
+    result += (
+        f"🌡️ {text['now']}: {current['temperature']}{unit['temperature']}, "
+        f"{current['condition']}, 💨 {current['wind_speed']} {unit['wind']}, "
+        f"💧 {current['humidity']}%\n"
+        f"📅 {text['today']}: {today['night_temp']}…{today['day_temp']}{unit['temperature']}, "
+        f"🌧️ {today['precipitation_chance']}%\n"
+    )
+    if len(hourly_data["series"]):
+        result += format_precipitation_outlook(hourly_data, preferences)
+
+    if air_quality is None or air_quality.level is None:
+        result += f"🌫️ {text['air_quality']}: {text['unavailable']}\n"
+    else:
+        details = [f"{text['european_aqi']} {round(air_quality.european_aqi)}"]
+        for label, value in (("PM2.5", air_quality.pm2_5), ("PM10", air_quality.pm10)):
+            if value is not None:
+                details.append(f"{label} {round(value)} μg/m³")
+        result += (
+            f"🌫️ {text['air_quality']}: {text['aqi_' + air_quality.level]} "
+            f"({', '.join(details)})\n"
+        )
+
+    if astronomy is None or not astronomy.sunrise or not astronomy.sunset:
+        result += f"🌅 {text['sun']}: {text['unavailable']}\n"
+    else:
+        sunrise = format_clock(datetime.fromisoformat(astronomy.sunrise), preferences)
+        sunset = format_clock(datetime.fromisoformat(astronomy.sunset), preferences)
+        result += f"🌅 {text['sunrise']}: {sunrise}, 🌇 {text['sunset']}: {sunset}"
+        if astronomy.daylight is not None:
+            result += f", {text['daylight']}: {format_daylight(astronomy.daylight, preferences)}"
+        if astronomy.uv_index_max is not None:
+            result += f", {text['uv_index']} {round(astronomy.uv_index_max, 1)}"
+        result += "\n"
+
+    return f"{result}\n{stale_note(weather_data, preferences)}🔗 {text['source']}"
+
+
+def compact_outdoor(
+    weather_data: Dict,
+    hourly_data: Dict,
+    air_quality: Optional[AirQuality],
+    astronomy: Optional[Astronomy],
+    preferences: Preferences = DEFAULT_PREFERENCES
+) -> Dict:
+    """
+    Converts the merged outdoor conditions to the compact output structure.
+
+    Args:
+        weather_data: Result of parse_weather_data() for today
+        hourly_data: Result of parse_hourly_data()
+        air_quality: Current air quality, None if unavailable
+        astronomy: Today's sun times, None if unavailable
+        preferences: Units; non-metric units are marked with a "u" key
+
+    Returns:
+        compact_weather() structure with the "rain" and "best" entries of
+        compact_hourly(), "aq" and "sun" (None if unavailable)
+    """
+    result = compact_weather(weather_data, with_current=True, preferences=preferences)
+    hourly = compact_hourly(hourly_data, preferences)
+    result["rain"] = hourly["rain"]
+    result["best"] = hourly["best"]
+    result["aq"] = {
+        "eu": air_quality.european_aqi,
+        "us": air_quality.us_aqi,
+        "lvl": air_quality.level,
+        "pm25": air_quality.pm2_5,
+        "pm10": air_quality.pm10,
+        "o3": air_quality.ozone,
+        "no2": air_quality.nitrogen_dioxide,
+    } if air_quality is not None else None
+    result["sun"] = {
+        "rise": astronomy.sunrise,
+        "set": astronomy.sunset,
+        "day": round(astronomy.daylight / 3600, 1) if astronomy.daylight is not None else None,
+        "uv": astronomy.uv_index_max,
+    } if astronomy is not None else None
+    return result
+
+
+@mcp.tool()
+@metrics.track_tool
+async def get_today_weather(
+    city: str,
+    output_format: Optional[str] = None,
+    units: Optional[str] = None,
+    language: Optional[str] = None,
+    time_format: Optional[str] = None,
+    ctx: Optional[Context] = None
+) -> str:
+    """
+    Gets the current weather and today's forecast for any city in the world.
+    Data provided by the Open-Meteo API.
+
+    Args:
+        city: City name (in any language)
+        output_format: "text" for readable text or "compact" for terse JSON
+            (now: t=°C, c=conditions, h=humidity %, w=wind m/s, p=pressure hPa;
+            daily arrays: d=date, hi/lo=°C, c=conditions, w=wind m/s,
+            pp=precipitation chance %; u="imperial" marks °F, mph and inHg).
+            Server default if omitted.
+        units: "metric" (°C, m/s, hPa, mm) or "imperial" (°F, mph, inHg, in).
+            Server default if omitted.
+        language: "en" or "ru". Server default if omitted.
+        time_format: "24h" or "12h". Server default if omitted.
+
+    Usage:
+            get_today_weather("Moscow")
+            get_today_weather("Paris", output_format="compact")
+            get_today_weather("New York", units="imperial", time_format="12h")
+    """
+    try:
+        client_limiter.acquire(client_key(ctx))
+        if not city or not city.strip():
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="The city name cannot be empty"
+                )
+            )
+        output_format = resolve_output_format(output_format)
+        preferences = resolve_preferences(units, language, time_format)
+
+        weather_data = await get_real_weather_data(city.strip(), 1, preferences)
 
-async def get_city_coordinates(
-    city_name: str
-) -> Optional[Tuple[float, float]]:
+        if output_format == "compact":
+            return to_compact_json(compact_weather(weather_data, preferences=preferences))
+        return format_today_weather(weather_data, preferences)
+        
+    except Exception as e:
+        if isinstance(e, McpError):
+            raise
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Error retrieving weather data: {str(e)}"
+            )
+        ) from e
+
+
+@mcp.tool()
+@metrics.track_tool
+async def get_weekly_forecast(
+    city: str,
+    output_format: Optional[str] = None,
+    units: Optional[str] = None,
+    language: Optional[str] = None,
+    time_format: Optional[str] = None,
+    ctx: Optional[Context] = None
+) -> str:
     """
-    Gets city coordinates via the Open-Meteo Geocoding API.
+    Gets the current weekly weather forecast for any city in the world.
+    Data provided by the Open-Meteo API.
 
     Args:
-        city_name: City name
+        city: City name (in any language)
+        output_format: "text" for readable text or "compact" for terse JSON
+            (daily arrays: d=date, hi/lo=°C, c=conditions, w=wind m/s,
+            pp=precipitation chance %; u="imperial" marks °F and mph).
+            Server default if omitted.
+        units: "metric" (°C, m/s, hPa, mm) or "imperial" (°F, mph, inHg, in).
+            Server default if omitted.
+        language: "en" or "ru". Server default if omitted.
+        time_format: "24h" or "12h". Server default if omitted.
 
-    Returns:
-        Tuple[latitude, longitude] or None if not found
+    Usage:
+            get_weekly_forecast("London")
+            get_weekly_forecast("Tokyo")
+            get_weekly_forecast("Sydney")
+            get_weekly_forecast("Berlin", output_format="compact")
+            get_weekly_forecast("Москва", language="ru")
     """
     try:
-        geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
-        params = {
-            "name": city_name,
-            "count": 1,
-            "language": "ru",
-            "format": "json"
-        }
-        
-        # Create a new HTTP client for each request
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(geocoding_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if "results" not in data or not data["results"]:
-                return None
-                
-            result = data["results"][0]
-            return result["latitude"], result["longitude"]
+        client_limiter.acquire(client_key(ctx))
+        if not city or not city.strip():
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="The city name cannot be empty"
+                )
+            )
+        output_format = resolve_output_format(output_format)
+        preferences = resolve_preferences(units, language, time_format)
+
+        weather_data = await get_real_weather_data(city.strip(), 7, preferences)
+
+        if output_format == "compact":
+            return to_compact_json(
+                compact_weather(weather_data, with_current=False, preferences=preferences)
+            )
+        return format_weekly_forecast(weather_data, preferences)
         
     except Exception as e:
-        print(f"Coordinate error for the city {city_name}: {e}")
-        return None
+        if isinstance(e, McpError):
+            raise
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Error retrieving weather forecast: {str(e)}"
+            )
+        ) from e
 
 
-async def get_weather_data(
-    latitude: float, 
-    longitude: float, 
-    days: int = 1
-) -> Dict:
+@mcp.tool()
+@metrics.track_tool
+async def get_weather_by_coordinates(
+    lat: float,
+    lon: float,
+    days: int = 1,
+    output_format: Optional[str] = None,
+    units: Optional[str] = None,
+    language: Optional[str] = None,
+    time_format: Optional[str] = None,
+    ctx: Optional[Context] = None
+) -> str:
     """
-    Retrieves weather data via the Open-Meteo API
+    Gets the weather for known coordinates without looking up a city name.
+    Use it when the latitude and longitude are already known, for example
+    from a previous tool result. Data provided by the Open-Meteo API.
 
     Args:
-        latitude: Latitude
-        longitude: Longitude
-        days: Number of forecast days
+        lat: Latitude, -90 to 90
+        lon: Longitude, -180 to 180
+        days: 1 for current weather and today's forecast, up to 16 for a
+            multi-day forecast
+        output_format: "text" for readable text or "compact" for terse JSON
+            (now: t=°C, c=conditions, h=humidity %, w=wind m/s, p=pressure hPa;
+            daily arrays: d=date, hi/lo=°C, c=conditions, w=wind m/s,
+            pp=precipitation chance %; u="imperial" marks °F, mph and inHg).
+            Server default if omitted.
+        units: "metric" (°C, m/s, hPa, mm) or "imperial" (°F, mph, inHg, in).
+            Server default if omitted.
+        language: "en" or "ru". Server default if omitted.
+        time_format: "24h" or "12h". Server default if omitted.
 
-    Returns:
-        Dictionary with weather data
+    Usage:
+            get_weather_by_coordinates(55.7558, 37.6176)
+            get_weather_by_coordinates(48.8566, 2.3522, days=7, output_format="compact")
     """
-    weather_url = "https://api.open-meteo.com/v1/forecast"
-    
-    # Параметры для текущей погоды
-    current_params = [
-        "temperature_2m",
-        "relative_humidity_2m", 
-        "weather_code",
-        "wind_speed_10m",
-        "surface_pressure"
-    ]
-    
-    # Параметры для ежедневного прогноза
-    daily_params = [
-        "weather_code",
-        "temperature_2m_max",
-        "temperature_2m_min",
-        "precipitation_probability_max",
-        "wind_speed_10m_max"
-    ]
-    
-    params = {
-        "latitude": latitude,
-        "longitude": longitude,
-        "current": ",".join(current_params),
-        "daily": ",".join(daily_params),
-        "timezone": "auto",
-        "forecast_days": days
-    }
-    
-    # Создаем новый HTTP клиент для каждого запроса
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(weather_url, params=params)
-        response.raise_for_status()
-        
-        return response.json()
-
+    try:
+        client_limiter.acquire(client_key(ctx))
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="Latitude must be between -90 and 90, longitude between -180 and 180"
+                )
+            )
+        max_days = FORECAST_HORIZONS[-1]
+        if not 1 <= days <= max_days:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"The number of days must be between 1 and {max_days}"
+                )
+            )
+        output_format = resolve_output_format(output_format)
+        preferences = resolve_preferences(units, language, time_format)
 
-def weather_code_to_description(code: int) -> str:
-    """
-    Converts a WMO weather code to a text description.
+        # Shares the grid cell cache with the city tools
+        forecast = await get_forecast(lat, lon, days)
+        weather_data = parse_weather_data(
+            f"{lat:.4f}, {lon:.4f}", lat, lon, forecast, preferences
+        )
 
-    Args:
-        code: WMO weather code
+        if output_format == "compact":
+            return to_compact_json(
+                compact_weather(weather_data, with_current=days == 1, preferences=preferences)
+            )
+        if days == 1:
+            return format_today_weather(weather_data, preferences)
+        return format_weekly_forecast(weather_data, preferences, days=len(weather_data["forecast"]))
 
-    Returns:
-        Text description of the weather in Russian
-    """
-    weather_codes = {
-        0: "clear",
-        1: "mostly clear",
-        2: "partly cloudy",
-        3: "overcast",
-        45: "fog",
-        48: "drizzle",
-        51: "light drizzle",
-        53: "moderate drizzle",
-        55: "heavy drizzle",
-        56: "light freezing drizzle",
-        57: "heavy freezing drizzle",
-        61: "light rain",
-        63: "moderate rain",
-        65: "heavy rain",
-        66: "light freezing rain",
-        67: "heavy freezing rain",
-        71: "light snow",
-        73: "moderate snow",
-        75: "heavy snow",
-        77: "snow pellets",
-        80: "light showers",
-        81: "moderate showers",
-        82: "heavy showers",
-        85: "light snow showers",
-        86: "heavy snow showers",
-        95: "thunderstorm",
-        96: "thunderstorm with light hail",
-        99: "thunderstorm with large hail"
-    }
-    
-    return weather_codes.get(code, f"unknown (code {code})")
+    except Exception as e:
+        if isinstance(e, McpError):
+            raise
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Error retrieving weather data: {str(e)}"
+            )
+        ) from e
 
 
-async def get_real_weather_data(city_name: str, days: int = 1) -> Dict:
+@mcp.tool()
+@metrics.track_tool
+async def get_weather_for_cities(
+    cities: List[str],
+    output_format: Optional[str] = None,
+    units: Optional[str] = None,
+    language: Optional[str] = None,
+    time_format: Optional[str] = None,
+    ctx: Optional[Context] = None
+) -> str:
     """
-    Gets real weather data for the specified city.
+    Gets today's weather for several cities in one call.
+    Use it to compare cities instead of calling get_today_weather
+    for each of them.
 
     Args:
-        city_name: City name
-        days: Number of forecast days
+        cities: City names (in any language)
+        output_format: "text" for readable text or "compact" for terse JSON
+            (same keys as get_today_weather, null for cities not found).
+            Server default if omitted.
+        units: "metric" (°C, m/s, hPa, mm) or "imperial" (°F, mph, inHg, in).
+            Server default if omitted.
+        language: "en" or "ru". Server default if omitted.
+        time_format: "24h" or "12h". Server default if omitted.
 
-    Returns:
-        Dictionary with weather data
+    Usage:
+            get_weather_for_cities(["Moscow", "Kazan", "Sochi"])
+            get_weather_for_cities(["London", "Paris"], output_format="compact")
     """
-    # Получаем координаты города
-    coordinates = await get_city_coordinates(city_name)
-    if not coordinates:
+    try:
+        names = []
+        for city in cities or []:
+            name = city.strip() if city else ""
+            if name and name not in names:
+                names.append(name)
+
+        if not names:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="The list of cities cannot be empty"
+                )
+            )
+        if len(names) > MAX_BATCH_CITIES:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"No more than {MAX_BATCH_CITIES} cities per request"
+                )
+            )
+        # Each city counts as a call
+        client_limiter.acquire(client_key(ctx), cost=len(names))
+        output_format = resolve_output_format(output_format)
+        preferences = resolve_preferences(units, language, time_format)
+
+        coordinates = await asyncio.gather(
+            *(get_city_coordinates(name) for name in names)
+        )
+        found = [
+            (name, coords) for name, coords in zip(names, coordinates) if coords
+        ]
+        forecasts = await get_forecasts([coords for _, coords in found], 1)
+        weather_by_city = {
+            name: parse_weather_data(name, *coords, weather_data, preferences)
+            for (name, coords), weather_data in zip(found, forecasts)
+        }
+
+        if output_format == "compact":
+            return to_compact_json({
+                name: compact_weather(weather_by_city[name], preferences=preferences)
+                if name in weather_by_city else None
+                for name in names
+            })
+        return format_cities_weather(names, weather_by_city, preferences)
+
+    except Exception as e:
+        if isinstance(e, McpError):
+            raise
         raise McpError(
             ErrorData(
-                code=INVALID_PARAMS,
-                message=f"Город '{city_name}' не найден"
+                code=INTERNAL_ERROR,
+                message=f"Error retrieving weather data: {str(e)}"
             )
-        )
-    
-    latitude, longitude = coordinates
-    
-    # Получаем данные о погоде
-    weather_data = await get_weather_data(latitude, longitude, days)
-    
-    # Парсим текущую погоду
-    current = weather_data["current"]
-    current_time = datetime.fromisoformat(
-        current["time"].replace("Z", "+00:00")
-    )
-    
-    current_weather = {
-        "temperature": round(current["temperature_2m"]),
-        "condition": weather_code_to_description(current["weather_code"]),
-        "humidity": current["relative_humidity_2m"],
-        "wind_speed": round(current["wind_speed_10m"]),
-        "pressure": round(current["surface_pressure"])
-    }
-    
-    # Парсим прогноз
-    daily = weather_data["daily"]
-    forecast = []
-    
-    for i in range(len(daily["time"])):
-        forecast_date = datetime.fromisoformat(daily["time"][i])
-        
-        forecast.append({
-            "date": daily["time"][i],
-            "weekday": forecast_date.strftime("%A"),
-            "day_temp": round(daily["temperature_2m_max"][i]),
-            "night_temp": round(daily["temperature_2m_min"][i]),
-            "condition": weather_code_to_description(daily["weather_code"][i]),
-            "wind_speed": round(daily["wind_speed_10m_max"][i]),
-            "precipitation_chance": daily["precipitation_probability_max"][i] 
-            if daily["precipitation_probability_max"][i] is not None else 0
-        })
-    
-    return {
-        "city": city_name.title(),
-        "coordinates": {"latitude": latitude, "longitude": longitude},
-        "current_time": current_time.strftime("%Y-%m-%d %H:%M UTC"),
-        "current_weather": current_weather,
-        "forecast": forecast
-    }
+        ) from e
 
 
 @mcp.tool()
-async def get_today_weather(city: str) -> str:
+@metrics.track_tool
+async def get_hourly_forecast(
+    city: str,
+    hours: int = 24,
+    output_format: Optional[str] = None,
+    units: Optional[str] = None,
+    language: Optional[str] = None,
+    time_format: Optional[str] = None,
+    ctx: Optional[Context] = None
+) -> str:
     """
-    Gets real weather data for the specified city.
+    Gets the hourly weather forecast for any city in the world with
+    precipitation windows, the best hours to be outside and daily
+    minimum/maximum temperatures. Use it for questions like "when will
+    it stop raining" or "when is the best time for a walk".
+    Data provided by the Open-Meteo API.
 
     Args:
-        city_name: City name
-        days: Number of forecast days
+        city: City name (in any language)
+        hours: Number of hours from now, 1 to 168
+        output_format: "text" for readable text or "compact" for terse JSON
+            (from=first local hour; hourly arrays: t=°C, c=WMO weather code,
+            pp=precipitation chance %, pr=precipitation mm, w=wind m/s;
+            rain=[start, end, max chance %, mm] windows; best=[start, end, °C];
+            daily arrays: d=date, hi/lo=°C, pr=mm; u="imperial" marks °F, in
+            and mph). Server default if omitted.
+        units: "metric" (°C, m/s, hPa, mm) or "imperial" (°F, mph, inHg, in).
+            Server default if omitted.
+        language: "en" or "ru". Server default if omitted.
+        time_format: "24h" or "12h". Server default if omitted.
 
-    Returns:
-        Dictionary with weather data
+    Usage:
+            get_hourly_forecast("Kazan")
+            get_hourly_forecast("Paris", hours=48, output_format="compact")
     """
     try:
+        client_limiter.acquire(client_key(ctx))
         if not city or not city.strip():
             raise McpError(
                 ErrorData(
@@ -239,59 +2230,81 @@ async def get_today_weather(city: str) -> str:
                     message="The city name cannot be empty"
                 )
             )
-        
-        weather_data = await get_real_weather_data(city.strip(), 1)
-        current = weather_data["current_weather"]
-        today_forecast = weather_data["forecast"][0]
-        coords = weather_data["coordinates"]
-        
-        result = f"""🌤️ Weather in the city today {weather_data['city']}
+        if not 1 <= hours <= HOURLY_MAX_HOURS:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"The number of hours must be between 1 and {HOURLY_MAX_HOURS}"
+                )
+            )
+        output_format = resolve_output_format(output_format)
+        preferences = resolve_preferences(units, language, time_format)
 
-📍 Coordinates: {coords['latitude']:.2f}, {coords['longitude']:.2f}
-🕒 Time: {weather_data['current_time']}
+        city = city.strip()
+        coordinates = await get_city_coordinates(city)
+        if not coordinates:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=messages(preferences)["city_not_found_error"].format(city=city)
+                )
+            )
 
-🌡️ Now: {current['temperature']}°C
-☁️ Conditions: {current['condition']}
-💧 Humidity: {current['humidity']}%
-💨 Wind speed: {current['wind_speed']} м/с
-📊 Pressure: {current['pressure']} гПа
+        forecast = await get_hourly(*coordinates, hours)
+        weather_data = parse_hourly_data(city, *coordinates, forecast)
 
-📅 Forecast for today:
-🌅 Maximum: {today_forecast['day_temp']}°C
-🌙 Minimum: {today_forecast['night_temp']}°C
-🌧️ Chance of precipitation: {today_forecast['precipitation_chance']}%
+        if output_format == "compact":
+            return to_compact_json(compact_hourly(weather_data, preferences))
+        return format_hourly_forecast(weather_data, preferences)
 
-🔗 Данные предоставлены Open-Meteo API"""
-        
-        return result
-        
     except Exception as e:
         if isinstance(e, McpError):
             raise
         raise McpError(
             ErrorData(
                 code=INTERNAL_ERROR,
-                message=f"Error retrieving weather data: {str(e)}"
+                message=f"Error retrieving hourly forecast: {str(e)}"
             )
         ) from e
 
 
 @mcp.tool()
-async def get_weekly_forecast(city: str) -> str:
+@metrics.track_tool
+async def get_outdoor_conditions(
+    city: str,
+    output_format: Optional[str] = None,
+    units: Optional[str] = None,
+    language: Optional[str] = None,
+    time_format: Optional[str] = None,
+    ctx: Optional[Context] = None
+) -> str:
     """
-    Gets the current weekly weather forecast for any city in the world.
-    Data provided by the Open-Meteo API.
+    Gets everything needed to plan time outside in one call: current
+    weather and today's forecast, precipitation windows and the best hours
+    of the next 12 hours, air quality, sunrise/sunset and the UV index.
+    Use it for questions like "should I go running this evening" instead
+    of calling several weather tools. Data provided by the Open-Meteo API.
 
     Args:
         city: City name (in any language)
+        output_format: "text" for readable text or "compact" for terse JSON
+            (now and daily as in get_today_weather; rain=[start, end,
+            max chance %, mm] windows; best=[start, end, °C];
+            aq: eu/us=European/US AQI, lvl=European AQI band, pm25/pm10/o3/no2
+            in μg/m³; sun: rise/set=local time, day=daylight hours,
+            uv=max UV index; aq and sun are null if unavailable).
+            Server default if omitted.
+        units: "metric" (°C, m/s, hPa, mm) or "imperial" (°F, mph, inHg, in).
+            Server default if omitted.
+        language: "en" or "ru". Server default if omitted.
+        time_format: "24h" or "12h". Server default if omitted.
 
     Usage:
-            get_weekly_forecast("London")
-            get_weekly_forecast("Tokyo")
-            get_weekly_forecast("Sydney")
-            get_weekly_forecast("Berlin")
+            get_outdoor_conditions("Moscow")
+            get_outdoor_conditions("Berlin", output_format="compact")
     """
     try:
+        client_limiter.acquire(client_key(ctx))
         if not city or not city.strip():
             raise McpError(
                 ErrorData(
@@ -299,48 +2312,38 @@ async def get_weekly_forecast(city: str) -> str:
                     message="The city name cannot be empty"
                 )
             )
-        
-        weather_data = await get_real_weather_data(city.strip(), 7)
-        coords = weather_data["coordinates"]
-        
-        city_name = weather_data['city']
-        lat, lon = coords['latitude'], coords['longitude']
-        result = f"""📅 Weekly weather forecast for the city {city_name}
+        output_format = resolve_output_format(output_format)
+        preferences = resolve_preferences(units, language, time_format)
+
+        city = city.strip()
+        coordinates = await get_city_coordinates(city)
+        if not coordinates:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=messages(preferences)["city_not_found_error"].format(city=city)
+                )
+            )
 
-📍 Coordinates: {lat:.2f}, {lon:.2f}
-🕒 Updated: {weather_data['current_time']}
+        forecast, hourly, air_quality, astronomy = await get_outdoor_data(*coordinates)
+        weather_data = parse_weather_data(city, *coordinates, forecast, preferences)
+        hourly_data = parse_hourly_data(city, *coordinates, hourly)
+
+        if output_format == "compact":
+            return to_compact_json(
+                compact_outdoor(weather_data, hourly_data, air_quality, astronomy, preferences)
+            )
+        return format_outdoor_conditions(
+            weather_data, hourly_data, air_quality, astronomy, preferences
+        )
 
-📊 Weekly forecast:
-"""
-        
-        for day in weather_data['forecast']:
-            weekday_ru = {
-                'Monday': 'Monday',
-                'Tuesday': 'Tuesday', 
-                'Wednesday': 'Wednesday',
-                'Thursday': 'Thursday',
-                'Friday': 'Friday',
-                'Saturday': 'Saturday',
-                'Sunday': 'Sunday'
-            }.get(day['weekday'], day['weekday'])
-            
-            result += f"""
-📆 {day['date']} ({weekday_ru})
-   🌅 Макс: {day['day_temp']}°C | 🌙 Мин: {day['night_temp']}°C
-   ☁️ {day['condition']} | 💨 {day['wind_speed']} м/с
-   🌧️ Chance of precipitation: {day['precipitation_chance']}%"""
-        
-        result += "\n\n🔗 Data provided by Open-Meteo API"
-        
-        return result
-        
     except Exception as e:
         if isinstance(e, McpError):
             raise
         raise McpError(
             ErrorData(
                 code=INTERNAL_ERROR,
-                message=f"Error retrieving weather forecast: {str(e)}"
+                message=f"Error retrieving outdoor conditions: {str(e)}"
             )
         ) from e
 
@@ -348,27 +2351,235 @@ async def get_weekly_forecast(city: str) -> str:
 # Настройка SSE транспорта
 sse = SseServerTransport("/messages/")
 
+# Лимиты SSE-сессий: clients that crash without closing the connection
+# would otherwise keep their session until the process runs out of memory
+SSE_MAX_SESSIONS = int(os.getenv("SSE_MAX_SESSIONS", "100"))
+SSE_IDLE_TIMEOUT = float(os.getenv("SSE_IDLE_TIMEOUT", "900"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "32"))
+SSE_SEND_TIMEOUT = float(os.getenv("SSE_SEND_TIMEOUT", "30"))
+
+sse_sessions = SessionManager(
+    SSE_MAX_SESSIONS, SSE_IDLE_TIMEOUT, SSE_QUEUE_SIZE, SSE_SEND_TIMEOUT
+)
+
 
 async def handle_sse(request: Request):
     """SSE connection handler"""
-    _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
+    session = sse_sessions.open()
+    if session is None:
+        return JSONResponse(
+            {"error": "Too many SSE sessions"},
+            status_code=503,
+            headers={"Retry-After": "5"},
         )
+    _server = mcp._mcp_server
+    try:
+        # Eviction cancels the scope: the server loop and the event stream
+        with session.scope, metrics.SSE_SESSIONS.track_inprogress():
+            async with sse.connect_sse(
+                request.scope,
+                request.receive,
+                request._send,
+            ) as (reader, writer):
+                await sse_sessions.relay(
+                    session,
+                    reader,
+                    writer,
+                    lambda read_stream, write_stream: _server.run(
+                        read_stream,
+                        write_stream,
+                        _server.create_initialization_options()
+                    ),
+                )
+    finally:
+        sse_sessions.close(session)
+    # The response was streamed by the transport; Starlette expects one back
+    return Response()
+
+
+# Настройка Streamable HTTP транспорта
+# In stateless mode every request is self-contained, so the server can run
+# with several workers or replicas behind a load balancer without sticky
+# sessions
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "true").lower() == "true"
+MCP_JSON_RESPONSE = os.getenv("MCP_JSON_RESPONSE", "false").lower() == "true"
+UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", "1"))
+
+streamable_http_manager: Optional[StreamableHTTPSessionManager] = None
+
+
+def create_streamable_http_manager() -> StreamableHTTPSessionManager:
+    """Creates the Streamable HTTP session manager of the MCP server"""
+    return StreamableHTTPSessionManager(
+        app=mcp._mcp_server,
+        stateless=MCP_STATELESS_HTTP,
+        json_response=MCP_JSON_RESPONSE,
+    )
+
+
+class StreamableHTTPEndpoint:
+    """Streamable HTTP endpoint, served by the lifespan's session manager"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if streamable_http_manager is None:
+            response = JSONResponse(
+                {"error": "Server is not running"}, status_code=503
+            )
+            await response(scope, receive, send)
+            return
+        await streamable_http_manager.handle_request(scope, receive, send)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Opens shared resources on startup and releases them on shutdown"""
+    global gazetteer, streamable_http_manager
+    get_http_client()
+    fuzzy_loading = None
+    if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+        gazetteer = Gazetteer.open(GAZETTEER_PATH)
+        if FUZZY_MAX_DISTANCE > 0:
+            fuzzy_loading = asyncio.create_task(load_fuzzy_index(gazetteer))
+    stores = []
+    if CACHE_DB_PATH and isinstance(geocode_cache, TTLCache):
+        # Locations and their aliases survive restarts
+        for table, cache in (("geocode_location", geocode_cache), ("geocode_alias", alias_cache)):
+            store = SQLiteStore(CACHE_DB_PATH, table)
+            cache.attach_store(store)
+            stores.append((cache, store))
+    # The session manager can only be run once, so each lifespan gets its own
+    streamable_http_manager = create_streamable_http_manager()
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    sse_sessions.start()
+    try:
+        async with streamable_http_manager.run():
+            yield
+    finally:
+        await sse_sessions.stop()
+        await prefetcher.stop()
+        streamable_http_manager = None
+        await close_http_client()
+        if fuzzy_loading is not None:
+            # The indexing thread reads the gazetteer until it is done
+            await fuzzy_loading
+        if gazetteer is not None:
+            gazetteer.close()
+            gazetteer = None
+        for cache, store in stores:
+            cache.attach_store(None)
+            store.close()
+
+
+async def handle_stats(request: Request) -> JSONResponse:
+    """Cache statistics, used to size the caches"""
+    return JSONResponse({
+        "geocode_cache": geocode_cache.stats(),
+        "geocode_aliases": alias_cache.stats(),
+        "forecast_cache": forecast_cache.stats(),
+        "hourly_cache": hourly_cache.stats(),
+        "air_quality_cache": air_quality_cache.stats(),
+        "astronomy_cache": astronomy_cache.stats(),
+        "geocode_requests": geocode_flight.stats(),
+        "forecast_requests": forecast_flight.stats(),
+        "forecast_revalidations": forecast_revalidations,
+        "http_cache": http_response_cache.stats(),
+        "http_requests": dict(http_cache_counters),
+        "gazetteer": gazetteer.stats() if gazetteer is not None else None,
+        "fuzzy_index": fuzzy_index.stats(),
+        "prefetch": prefetcher.stats(),
+        "sse_sessions": sse_sessions.stats(),
+        "upstream": {
+            "geocoding": geocoding_upstream.stats(),
+            "forecast": forecast_upstream.stats(),
+            "air_quality": air_quality_upstream.stats(),
+        },
+        "admission": {
+            "clients": client_limiter.stats(),
+            "upstream_budget": upstream_budget.stats(),
+        },
+    })
+
+
+# Prebuilt liveness answer: probes allocate nothing beyond the response
+HEALTHY_BODY = b'{"status":"ok"}'
+
+
+async def handle_healthz(request: Request) -> Response:
+    """Liveness: the event loop answers; opens no session and calls nothing"""
+    return Response(HEALTHY_BODY, media_type="application/json")
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    Checks whether the server can take traffic.
+
+    Only reads in-process state: no MCP session, task or upstream request
+    is created, so orchestrators can probe it as often as they like.
+
+    Returns:
+        "ready" - the lifespan is running and the Open-Meteo client is open;
+        "checks" - the individual checks; "circuits" - upstream circuit
+        breaker states (informational: cached data is still served while a
+        circuit is open)
+    """
+    checks = {
+        "lifespan": streamable_http_manager is not None,
+        "http_client": _http_client is not None and not _http_client.is_closed,
+        # Offline lookups are warm once the gazetteer is loaded and indexed
+        "gazetteer": gazetteer is not None or not GAZETTEER_PATH or not os.path.exists(GAZETTEER_PATH),
+    }
+    return {
+        "ready": all(checks.values()),
+        "checks": checks,
+        "circuits": {
+            "geocoding": geocoding_upstream.breaker.state,
+            "forecast": forecast_upstream.breaker.state,
+            "air_quality": air_quality_upstream.breaker.state,
+        },
+        "fuzzy_index": len(fuzzy_index),
+    }
+
+
+async def handle_readyz(request: Request) -> JSONResponse:
+    """Readiness: 200 when ready, 503 otherwise"""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+async def handle_metrics(request: Request) -> Response:
+    """Prometheus metrics"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+metrics.REGISTRY.register(metrics.CacheCollector({
+    "geocode": geocode_cache,
+    "geocode_alias": alias_cache,
+    "forecast": forecast_cache,
+    "hourly": hourly_cache,
+    "air_quality": air_quality_cache,
+    "astronomy": astronomy_cache,
+    "http": http_response_cache,
+}))
+metrics.REGISTRY.register(metrics.SessionCollector(sse_sessions))
+metrics.REGISTRY.register(metrics.UpstreamCollector({
+    "geocoding": geocoding_upstream,
+    "forecast": forecast_upstream,
+    "air_quality": air_quality_upstream,
+}))
 
 
 # Создание Starlette приложения
 app = Starlette(
     debug=True,
+    lifespan=lifespan,
     routes=[
         Route("/sse", endpoint=handle_sse),
+        Route("/mcp", endpoint=StreamableHTTPEndpoint()),
+        Route("/stats", endpoint=handle_stats),
+        Route("/healthz", endpoint=handle_healthz),
+        Route("/readyz", endpoint=handle_readyz),
+        Route("/metrics", endpoint=handle_metrics),
         Mount("/messages/", app=sse.handle_post_message),
     ],
 )
@@ -378,10 +2589,23 @@ if __name__ == "__main__":
     print("📡 The server will be available at: http://localhost:8001")
     print("🔗 SSE endpoint: http://localhost:8001/sse")
     print("📧 Messages endpoint: http://localhost:8001/messages/")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8001/mcp")
+    print("📈 Cache stats: http://localhost:8001/stats")
+    print("💓 Health checks: http://localhost:8001/healthz, http://localhost:8001/readyz")
+    print("📊 Prometheus metrics: http://localhost:8001/metrics")
     print("🛠️ Available tools:")
     print("   - get_today_weather(city) - current weather for any city")
     print("   - get_weekly_forecast(city) - forecast for the week")
+    print("   - get_weather_by_coordinates(lat, lon, days) - weather for known coordinates")
+    print("   - get_weather_for_cities(cities) - today's weather for several cities")
+    print("   - get_hourly_forecast(city, hours) - hourly forecast with rain windows")
+    print("   - get_outdoor_conditions(city) - weather, air quality and sun times in one call")
     print("🌍 Data is provided by the Open-Meteo API (without an API key)")
     print("🆓 Cities from all over the world are supported!")
-    
-    uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
+
+    if UVICORN_WORKERS > 1:
+        # Workers import the app by name; use the stateless /mcp endpoint,
+        # SSE sessions are bound to one worker
+        uvicorn.run("server:app", host="0.0.0.0", port=8001, workers=UVICORN_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
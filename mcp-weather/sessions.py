@@ -0,0 +1,209 @@
+"""
+Limits for SSE sessions.
+
+Every /sse connection runs its own MCP server loop, and a client that
+crashes without closing its TCP connection leaves that loop, its streams
+and its task group behind. SessionManager caps the number of concurrent
+sessions, closes sessions with no traffic in either direction for longer
+than the idle timeout, and relays outgoing messages through a bounded
+queue: a client that stops reading first slows its own server loop down
+(the queue fills and sends wait), then is evicted once a single message
+cannot be delivered within the send timeout.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+
+
+class Session:
+    """One SSE session and the cancel scope it runs in"""
+
+    __slots__ = ("id", "opened", "last_active", "scope", "evicted")
+
+    def __init__(self, session_id: int, now: float):
+        self.id = session_id
+        self.opened = now
+        self.last_active = now
+        self.scope = anyio.CancelScope()
+        self.evicted: Optional[str] = None
+
+    def touch(self) -> None:
+        """Records traffic on the session"""
+        self.last_active = time.monotonic()
+
+
+class SessionManager:
+    """Admission, idle eviction and outbound backpressure of SSE sessions"""
+
+    def __init__(
+        self,
+        max_sessions: int = 100,
+        idle_timeout: float = 900.0,
+        queue_size: int = 32,
+        send_timeout: float = 30.0
+    ):
+        """
+        Args:
+            max_sessions: Maximum number of concurrent sessions, 0 - no limit
+            idle_timeout: Seconds without messages after which a session is
+                closed, 0 - never
+            queue_size: Outgoing messages buffered per session before the
+                server loop has to wait for the client
+            send_timeout: Seconds a message may wait for the client before
+                the session is evicted as stalled, 0 - no limit
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.sessions: Dict[int, Session] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self.opened = 0
+        self.rejected = 0
+        self.evicted_idle = 0
+        self.evicted_stalled = 0
+
+    def reset(self) -> None:
+        """Forgets sessions and zeroes the counters"""
+        self.sessions.clear()
+        self.opened = 0
+        self.rejected = 0
+        self.evicted_idle = 0
+        self.evicted_stalled = 0
+
+    def open(self) -> Optional[Session]:
+        """
+        Admits a new session.
+
+        Returns:
+            Session, or None if the limit is reached even after closing idle
+            sessions
+        """
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            self.sweep()
+            if len(self.sessions) >= self.max_sessions:
+                self.rejected += 1
+                return None
+        session = Session(next(self._ids), time.monotonic())
+        self.sessions[session.id] = session
+        self.opened += 1
+        return session
+
+    def close(self, session: Session) -> None:
+        """Releases the slot of a finished session"""
+        self.sessions.pop(session.id, None)
+
+    def evict(self, session: Session, reason: str) -> None:
+        """Cancels a session; reason is "idle" or "stalled" """
+        if session.evicted is not None:
+            return
+        session.evicted = reason
+        if reason == "idle":
+            self.evicted_idle += 1
+        else:
+            self.evicted_stalled += 1
+        session.scope.cancel()
+        self.close(session)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Evicts sessions idle for longer than idle_timeout.
+
+        Returns:
+            Number of evicted sessions
+        """
+        if not self.idle_timeout:
+            return 0
+        deadline = (time.monotonic() if now is None else now) - self.idle_timeout
+        idle = [session for session in self.sessions.values() if session.last_active < deadline]
+        for session in idle:
+            self.evict(session, "idle")
+        return len(idle)
+
+    async def relay(
+        self,
+        session: Session,
+        read_stream: MemoryObjectReceiveStream,
+        write_stream: MemoryObjectSendStream,
+        serve: Callable[[MemoryObjectReceiveStream, MemoryObjectSendStream], Awaitable[Any]]
+    ) -> None:
+        """
+        Runs the MCP server loop of a session between the transport streams.
+
+        Args:
+            session: Session from open()
+            read_stream: Messages from the client (transport side)
+            write_stream: Messages to the client (transport side)
+            serve: Server loop, called with the relayed streams
+        """
+        inbound_writer, inbound = anyio.create_memory_object_stream(0)
+        outbound, outbound_reader = anyio.create_memory_object_stream(self.queue_size)
+
+        async def receive() -> None:
+            async with inbound_writer:
+                async for message in read_stream:
+                    session.touch()
+                    await inbound_writer.send(message)
+
+        async def send() -> None:
+            async with outbound_reader:
+                async for message in outbound_reader:
+                    session.touch()
+                    with anyio.move_on_after(self.send_timeout or None) as timeout:
+                        await write_stream.send(message)
+                    if timeout.cancelled_caught:
+                        self.evict(session, "stalled")
+                        return
+
+        try:
+            async with anyio.create_task_group() as tasks:
+                tasks.start_soon(receive)
+                tasks.start_soon(send)
+                await serve(inbound, outbound)
+                tasks.cancel_scope.cancel()
+        finally:
+            # Ends the event stream of the transport
+            await write_stream.aclose()
+
+    async def run(self) -> None:
+        """Evicts idle sessions until cancelled"""
+        while True:
+            await asyncio.sleep(min(self.idle_timeout / 2, 30.0))
+            self.sweep()
+
+    def start(self) -> None:
+        """Starts the background idle sweep"""
+        if self._task is None and self.idle_timeout:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stops the background idle sweep"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns session counters.
+
+        Returns:
+            Dictionary with open sessions, the limit, admitted and rejected
+            sessions and evictions by reason
+        """
+        return {
+            "active": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "evicted": {"idle": self.evicted_idle, "stalled": self.evicted_stalled},
+        }
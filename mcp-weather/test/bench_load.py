@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Load benchmark of the weather tools through the SSE MCP endpoint.
+
+Every worker opens its own MCP session over /sse and calls
+get_today_weather and get_weekly_forecast back to back, so the number of
+workers is the target concurrency. The report shows throughput and
+p50/p95/p99 latency per tool.
+
+Self-contained run against the fake Open-Meteo (see fake_open_meteo.py),
+both servers are started on free local ports:
+
+    python bench_load.py --spawn --concurrency 20 --requests 2000 \\
+        --upstream-latency-ms 80 --upstream-latency-sigma 0.5
+
+Against a running server:
+
+    python bench_load.py --url http://localhost:8001/sse --duration 60
+
+Use --max-p95-ms and --max-error-rate to fail (exit code 1) on regressions.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(TEST_DIR)
+
+TOOLS = ("get_today_weather", "get_weekly_forecast")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    Returns the q-th percentile with linear interpolation.
+
+    Args:
+        samples: Measured values
+        q: Percentile between 0 and 100
+
+    Returns:
+        Percentile value, 0.0 for no samples
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def plan_calls(cities: List[str], weekly_share: float) -> Iterator[Dict]:
+    """
+    Yields an endless, deterministic sequence of tool calls.
+
+    Args:
+        cities: City names to cycle through
+        weekly_share: Share of get_weekly_forecast calls
+
+    Yields:
+        {"tool": name, "city": city}
+    """
+    weekly_every = round(1 / weekly_share) if weekly_share > 0 else 0
+    for index in itertools.count():
+        weekly = weekly_every and index % weekly_every == weekly_every - 1
+        yield {
+            "tool": TOOLS[1] if weekly else TOOLS[0],
+            "city": cities[index % len(cities)],
+        }
+
+
+async def run_worker(
+    url: str,
+    calls: Iterator[Dict],
+    budget: Dict,
+    results: Dict[str, Dict[str, List]]
+) -> None:
+    """Runs tool calls over one MCP session until the budget is spent"""
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while budget["left"] != 0 and time.monotonic() < budget["deadline"]:
+                if budget["left"] > 0:
+                    budget["left"] -= 1
+                call = next(calls)
+                started = time.perf_counter()
+                try:
+                    result = await session.call_tool(call["tool"], {"city": call["city"]})
+                    ok = not result.isError
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                tool_results = results[call["tool"]]
+                tool_results["latency"].append(elapsed)
+                if not ok:
+                    tool_results["errors"] += 1
+
+
+async def run_load(
+    url: str,
+    concurrency: int,
+    requests: int,
+    duration: Optional[float],
+    cities: List[str],
+    weekly_share: float
+) -> Dict:
+    """
+    Drives the tools at the target concurrency.
+
+    Returns:
+        Summary with per-tool and total statistics
+    """
+    calls = plan_calls(cities, weekly_share)
+    budget = {
+        "left": -1 if duration else requests,
+        "deadline": time.monotonic() + duration if duration else float("inf"),
+    }
+    results = {tool: {"latency": [], "errors": 0} for tool in TOOLS}
+
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        run_worker(url, calls, budget, results) for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    summary = {"concurrency": concurrency, "seconds": round(elapsed, 3), "tools": {}}
+    everything = {"latency": [], "errors": 0}
+    for tool, tool_results in [*results.items(), ("total", everything)]:
+        if tool != "total":
+            everything["latency"] += tool_results["latency"]
+            everything["errors"] += tool_results["errors"]
+        latency = tool_results["latency"]
+        summary["tools"][tool] = {
+            "calls": len(latency),
+            "errors": tool_results["errors"],
+            "error_rate": round(tool_results["errors"] / len(latency), 4) if latency else 0.0,
+            "rps": round(len(latency) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latency, 50) * 1000, 1),
+            "p95_ms": round(percentile(latency, 95) * 1000, 1),
+            "p99_ms": round(percentile(latency, 99) * 1000, 1),
+        }
+    return summary
+
+
+def print_summary(summary: Dict) -> None:
+    """Prints the summary as a table"""
+    print(f"⏱️ {summary['seconds']} s at concurrency {summary['concurrency']}")
+    print()
+    print(f"{'tool':<22}{'calls':>8}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-" * 77)
+    for tool, stats in summary["tools"].items():
+        print(
+            f"{tool:<22}{stats['calls']:>8}{stats['errors']:>8}{stats['rps']:>9}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+
+
+def free_port() -> int:
+    """Returns a free local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    """Waits until an HTTP endpoint answers"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url, timeout=1.0)
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not start in {timeout:.0f} s")
+                await asyncio.sleep(0.2)
+
+
+@contextlib.contextmanager
+def spawn_servers(args: argparse.Namespace) -> Iterator[str]:
+    """
+    Starts the fake Open-Meteo and the weather server.
+
+    Yields:
+        SSE endpoint URL of the weather server
+    """
+    upstream_port, server_port = free_port(), free_port()
+    upstream = f"http://127.0.0.1:{upstream_port}"
+    fake_command = [
+        sys.executable, os.path.join(TEST_DIR, "fake_open_meteo.py"),
+        "--port", str(upstream_port),
+        "--latency-ms", str(args.upstream_latency_ms),
+        "--latency-sigma", str(args.upstream_latency_sigma),
+        "--error-rate", str(args.upstream_error_rate),
+        "--seed", str(args.seed),
+    ]
+    server_command = [
+        sys.executable, "-m", "uvicorn", "server:app",
+        "--host", "127.0.0.1", "--port", str(server_port),
+        "--log-level", "warning",
+    ]
+    env = {
+        **os.environ,
+        "OPEN_METEO_GEOCODING_URL": f"{upstream}/v1/search",
+        "OPEN_METEO_FORECAST_URL": f"{upstream}/v1/forecast",
+        # Measure the server, not leftovers of previous runs
+        "WEATHER_CACHE_DB": "",
+        "GAZETTEER_PATH": "",
+        # Every worker is one client; the fake upstream has no quota
+        "CLIENT_RATE_LIMIT": "0",
+        "OPEN_METEO_RATE_LIMIT": "0",
+    }
+
+    processes = [
+        subprocess.Popen(fake_command, env=env),
+        subprocess.Popen(server_command, env=env, cwd=SERVER_DIR),
+    ]
+    try:
+        asyncio.run(wait_until_up(f"{upstream}/stats"))
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{server_port}/stats"))
+        yield f"http://127.0.0.1:{server_port}/sse"
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Load benchmark of the weather MCP tools")
+    parser.add_argument("--url", default="http://localhost:8001/sse", help="SSE endpoint")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start the fake Open-Meteo and the server on free ports")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent MCP sessions")
+    parser.add_argument("--requests", type=int, default=500, help="Total tool calls")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead")
+    parser.add_argument("--cities", type=int, default=50,
+                        help="Number of distinct (synthetic) cities")
+    parser.add_argument("--city", action="append", help="Use these city names instead")
+    parser.add_argument("--weekly-share", type=float, default=0.25,
+                        help="Share of get_weekly_forecast calls")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-latency-sigma", type=float, default=0.5)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if the total p95 is higher")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if the error rate is higher")
+    args = parser.parse_args()
+
+    cities = args.city or [f"Loadtown {index:04d}" for index in range(args.cities)]
+
+    def run(url: str) -> Dict:
+        return asyncio.run(run_load(
+            url, args.concurrency, args.requests, args.duration,
+            cities, args.weekly_share,
+        ))
+
+    if args.spawn:
+        with spawn_servers(args) as url:
+            summary = run(url)
+    else:
+        summary = run(args.url)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+    total = summary["tools"]["total"]
+    failed = False
+    if args.max_p95_ms is not None and total["p95_ms"] > args.max_p95_ms:
+        print(f"❌ p95 {total['p95_ms']} ms is above {args.max_p95_ms} ms")
+        failed = True
+    if args.max_error_rate is not None and total["error_rate"] > args.max_error_rate:
+        print(f"❌ Error rate {total['error_rate']} is above {args.max_error_rate}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark of prompt tokens spent on weather tool responses.
+
+Compares the "text" and "compact" output formats of get_today_weather
+and get_weekly_forecast over a corpus of recorded Open-Meteo responses.
+
+Record a corpus from the real API (requires internet):
+
+    python bench_output_tokens.py --record Moscow Kazan London Tokyo
+
+Run the benchmark:
+
+    python bench_output_tokens.py
+
+Token counts use tiktoken when it is installed and its encoding is
+available, otherwise the common approximation of 4 UTF-8 bytes per token.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import sys
+
+# Add the parent directory to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from forecast import ForecastRecord
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def get_token_counter(encoding_name):
+    """Returns a token counting function and its description"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return (
+            lambda text: math.ceil(len(text.encode("utf-8")) / 4),
+            "approximate, 4 UTF-8 bytes per token (install tiktoken for exact counts)",
+        )
+
+    return lambda text: len(encoding.encode(text)), f"tiktoken {encoding_name}"
+
+
+async def record_corpus(cities):
+    """Saves real 7-day Open-Meteo responses for the given cities"""
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    try:
+        for city in cities:
+            coordinates = await server.get_city_coordinates(city)
+            if not coordinates:
+                print(f"❓ {city}: city not found")
+                continue
+            latitude, longitude = coordinates
+            forecast = await server.get_weather_data(latitude, longitude, 7)
+            path = os.path.join(CORPUS_DIR, f"{server.normalize_city_name(city)}.json")
+            with open(path, "w", encoding="utf-8") as corpus_file:
+                json.dump({
+                    "city": city,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "forecast": forecast,
+                }, corpus_file, ensure_ascii=False, indent=2)
+            print(f"💾 {city} -> {path}")
+    finally:
+        await server.close_http_client()
+
+
+FIXTURE_WARNING = """\
+{rule}
+⚠️  NO RECORDED CORPUS: test/corpus/ has no responses.
+    Falling back to the single hand-written unit test fixture; its token
+    counts are NOT representative of real Open-Meteo responses.
+    Record real ones first (requires internet):
+        python bench_output_tokens.py --record Moscow Kazan London Tokyo
+{rule}""".format(rule="!" * 72)
+
+
+def load_corpus():
+    """
+    Loads recorded responses, or the unit test fixture if there are none.
+
+    Returns:
+        Tuple[list of corpus entries, True if they were recorded]
+    """
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.json"))):
+        with open(path, encoding="utf-8") as corpus_file:
+            corpus.append(json.load(corpus_file))
+    if corpus:
+        return corpus, True
+
+    from test_weather_api import MOCK_WEATHER_RESPONSE
+    print(FIXTURE_WARNING, file=sys.stderr)
+    corpus.append({
+        "city": "Moscow",
+        "latitude": MOCK_WEATHER_RESPONSE["latitude"],
+        "longitude": MOCK_WEATHER_RESPONSE["longitude"],
+        "forecast": MOCK_WEATHER_RESPONSE,
+    })
+    return corpus, False
+
+
+def render(entry, days):
+    """Renders one corpus entry in both formats"""
+    forecast = ForecastRecord.from_open_meteo(entry["forecast"]).head(days)
+    weather_data = server.parse_weather_data(
+        entry["city"], entry["latitude"], entry["longitude"], forecast
+    )
+    if days == 1:
+        text = server.format_today_weather(weather_data)
+        compact = server.compact_weather(weather_data)
+    else:
+        text = server.format_weekly_forecast(weather_data)
+        compact = server.compact_weather(weather_data, with_current=False)
+    return text, server.to_compact_json(compact)
+
+
+def run_benchmark(encoding_name):
+    """Prints token counts of both formats over the corpus"""
+    count_tokens, tokenizer = get_token_counter(encoding_name)
+    corpus, recorded = load_corpus()
+
+    print(f"🧮 Tokenizer: {tokenizer}")
+    if recorded:
+        print(f"📚 Corpus: {len(corpus)} recorded responses")
+    else:
+        print("📚 Corpus: unit test fixture only (NOT recorded data)")
+    print()
+    print(f"{'tool':<22}{'text':>10}{'compact':>10}{'saved':>10}")
+    print("-" * 52)
+
+    for tool, days in [("get_today_weather", 1), ("get_weekly_forecast", 7)]:
+        text_tokens = compact_tokens = 0
+        for entry in corpus:
+            text, compact = render(entry, days)
+            text_tokens += count_tokens(text)
+            compact_tokens += count_tokens(compact)
+
+        saved = 1 - compact_tokens / text_tokens if text_tokens else 0.0
+        print(
+            f"{tool:<22}{text_tokens / len(corpus):>10.1f}"
+            f"{compact_tokens / len(corpus):>10.1f}{saved:>10.1%}"
+        )
+
+    print()
+    print("Values are mean tokens per response.")
+    if not recorded:
+        print(FIXTURE_WARNING, file=sys.stderr)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Token count benchmark of weather tool output formats"
+    )
+    parser.add_argument(
+        "--record",
+        nargs="+",
+        metavar="CITY",
+        help="Record real Open-Meteo responses for these cities"
+    )
+    parser.add_argument(
+        "--encoding",
+        default="o200k_base",
+        help="tiktoken encoding name"
+    )
+
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_corpus(args.record))
+    else:
+        run_benchmark(args.encoding)
+
+
+if __name__ == "__main__":
+    main()
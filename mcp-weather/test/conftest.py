@@ -0,0 +1,51 @@
+"""
+Common fixtures for the MCP weather server tests.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Tests must not read or write the persistent cache file or local indexes
+os.environ.setdefault("WEATHER_CACHE_DB", "")
+os.environ.setdefault("GAZETTEER_PATH", "")
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Each test starts with empty caches, closed circuits and full budgets"""
+    import server
+
+    server.geocode_cache.clear()
+    server.alias_cache.clear()
+    server.fuzzy_index.clear()
+    server.forecast_cache.clear()
+    server.hourly_cache.clear()
+    server.air_quality_cache.clear()
+    server.astronomy_cache.clear()
+    server.http_response_cache.clear()
+    server.geocoding_upstream.reset()
+    server.forecast_upstream.reset()
+    server.air_quality_upstream.reset()
+    server.client_limiter.reset()
+    server.upstream_budget.reset()
+    server.sse_sessions.reset()
+    yield
+    server.geocode_cache.clear()
+    server.alias_cache.clear()
+    server.fuzzy_index.clear()
+    server.forecast_cache.clear()
+    server.hourly_cache.clear()
+    server.air_quality_cache.clear()
+    server.astronomy_cache.clear()
+    server.http_response_cache.clear()
+    server.geocoding_upstream.reset()
+    server.forecast_upstream.reset()
+    server.air_quality_upstream.reset()
+    server.client_limiter.reset()
+    server.upstream_budget.reset()
+    server.sse_sessions.reset()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Open-Meteo geocoding and forecast APIs.
+
+Responses are built from the fixtures of test_weather_api.py. Latency
+follows a log-normal distribution around a median, a share of requests
+fails with an HTTP error and a share hangs; all draws come from a seeded
+generator, so a run with the same seed and request order is repeatable.
+
+Run it:
+
+    python fake_open_meteo.py --port 8090 --latency-ms 80 --error-rate 0.01
+
+and point the weather server at it:
+
+    OPEN_METEO_GEOCODING_URL=http://localhost:8090/v1/search \\
+    OPEN_METEO_FORECAST_URL=http://localhost:8090/v1/forecast \\
+    python server.py
+
+City names starting with "nonexistent" are not found; every other name
+resolves to stable coordinates derived from the name, so different cities
+land in different forecast cache cells.
+"""
+
+import argparse
+import asyncio
+import copy
+import math
+import os
+import random
+import sys
+import zlib
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Fixtures live next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_weather_api import MOCK_GEOCODING_RESPONSE, MOCK_WEATHER_RESPONSE
+
+
+class FaultProfile(NamedTuple):
+    """Latency and error distribution of the fake upstream"""
+    # Median latency, milliseconds (0 answers immediately)
+    latency_ms: float = 0.0
+    # Log-normal shape: 0 - constant latency, 0.5 - p99 about 3x the median
+    latency_sigma: float = 0.0
+    # Share of requests answered with error_status
+    error_rate: float = 0.0
+    error_status: int = 500
+    # Share of requests that hang for hang_seconds (upstream timeouts)
+    hang_rate: float = 0.0
+    hang_seconds: float = 60.0
+    seed: int = 42
+
+
+def city_coordinates(name: str) -> Optional[Dict[str, float]]:
+    """
+    Returns stable fake coordinates for a city name.
+
+    Args:
+        name: City name from the request
+
+    Returns:
+        Dictionary with latitude and longitude, None for unknown cities
+    """
+    key = " ".join(name.casefold().split())
+    if key.startswith("nonexistent"):
+        return None
+    fixture = MOCK_GEOCODING_RESPONSE["results"][0]
+    if key in ("moscow", "москва"):
+        return {"latitude": fixture["latitude"], "longitude": fixture["longitude"]}
+
+    digest = zlib.crc32(key.encode("utf-8"))
+    return {
+        "latitude": round(-60 + digest % 12000 / 100, 4),
+        "longitude": round(-180 + digest // 12000 % 36000 / 100, 4),
+    }
+
+
+def geocoding_response(name: str) -> Dict:
+    """Geocoding API response for a city name"""
+    coordinates = city_coordinates(name)
+    if coordinates is None:
+        return {"generationtime_ms": 0.1}
+    result = {
+        **copy.deepcopy(MOCK_GEOCODING_RESPONSE["results"][0]),
+        "name": name,
+        **coordinates,
+    }
+    return {"results": [result]}
+
+
+def forecast_response(latitude: float, longitude: float, days: int) -> Dict:
+    """Forecast API response for one location, `days` days long"""
+    response = copy.deepcopy(MOCK_WEATHER_RESPONSE)
+    response["latitude"] = latitude
+    response["longitude"] = longitude
+
+    fixture_daily = MOCK_WEATHER_RESPONSE["daily"]
+    first_day = date.fromisoformat(fixture_daily["time"][0])
+    fixture_days = len(fixture_daily["time"])
+    daily = {
+        name: [values[day % fixture_days] for day in range(days)]
+        for name, values in fixture_daily.items()
+    }
+    daily["time"] = [
+        (first_day + timedelta(days=day)).isoformat() for day in range(days)
+    ]
+    response["daily"] = daily
+    return response
+
+
+def parse_floats(value: str) -> List[float]:
+    """Parses a comma-separated list of coordinates"""
+    return [float(item) for item in value.split(",")]
+
+
+def create_app(profile: FaultProfile = FaultProfile()) -> Starlette:
+    """
+    Creates the fake Open-Meteo application.
+
+    Args:
+        profile: Latency and error distribution
+
+    Returns:
+        Starlette app serving /v1/search, /v1/forecast and /stats
+    """
+    rng = random.Random(profile.seed)
+    counters = {"search": 0, "forecast": 0, "errors": 0, "hangs": 0}
+
+    async def misbehave() -> Optional[JSONResponse]:
+        # Draws happen in a fixed order, so the sequence is repeatable
+        fault = rng.random()
+        delay = 0.0
+        if profile.latency_ms > 0:
+            delay = rng.lognormvariate(
+                math.log(profile.latency_ms / 1000), profile.latency_sigma
+            )
+
+        if fault < profile.hang_rate:
+            counters["hangs"] += 1
+            await asyncio.sleep(profile.hang_seconds)
+        elif fault < profile.hang_rate + profile.error_rate:
+            counters["errors"] += 1
+            await asyncio.sleep(delay)
+            return JSONResponse(
+                {"error": True, "reason": "Injected failure"},
+                status_code=profile.error_status,
+            )
+        else:
+            await asyncio.sleep(delay)
+        return None
+
+    async def search(request: Request) -> JSONResponse:
+        counters["search"] += 1
+        error = await misbehave()
+        if error is not None:
+            return error
+        return JSONResponse(geocoding_response(request.query_params.get("name", "")))
+
+    async def forecast(request: Request) -> JSONResponse:
+        counters["forecast"] += 1
+        error = await misbehave()
+        if error is not None:
+            return error
+        params = request.query_params
+        latitudes = parse_floats(params["latitude"])
+        longitudes = parse_floats(params["longitude"])
+        days = int(params.get("forecast_days", "7"))
+        responses = [
+            forecast_response(latitude, longitude, days)
+            for latitude, longitude in zip(latitudes, longitudes)
+        ]
+        # Open-Meteo answers a list only for several locations
+        return JSONResponse(responses if len(responses) > 1 else responses[0])
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse(counters)
+
+    return Starlette(routes=[
+        Route("/v1/search", endpoint=search),
+        Route("/v1/forecast", endpoint=forecast),
+        Route("/stats", endpoint=stats),
+    ])
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the FaultProfile options to a command line parser"""
+    defaults = FaultProfile()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms,
+                        help="Median upstream latency, ms")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma,
+                        help="Log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Share of requests failing with --error-status")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate,
+                        help="Share of requests hanging for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def profile_from_arguments(args: argparse.Namespace) -> FaultProfile:
+    """Builds a FaultProfile from parsed add_profile_arguments() options"""
+    return FaultProfile(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Fake Open-Meteo API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"🎭 Fake Open-Meteo at http://{args.host}:{args.port}")
+    uvicorn.run(
+        create_app(profile_from_arguments(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for per-client admission control and the upstream budget.
+"""
+
+import asyncio
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch, Mock
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from starlette.requests import Request
+
+import server
+from admission import (
+    CLIENT_RATE_LIMITED, UPSTREAM_BUSY, ClientLimiter, TokenBucket, UpstreamBudget
+)
+from test.test_cache import make_forecast
+from upstream import CircuitOpenError, Upstream
+
+
+def make_ctx(headers=None, query_string=b"", client=("10.0.0.1", 50000)):
+    """FastMCP context of a tool call made over HTTP"""
+    request = Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/messages/",
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        "query_string": query_string,
+        "client": client,
+    })
+    ctx = Mock()
+    ctx.request_context.request = request
+    return ctx
+
+
+def forecast_client():
+    """HTTP client answering every forecast request"""
+    return httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json=make_forecast(1))
+    ))
+
+
+class TestTokenBucket:
+    """TokenBucket tests"""
+
+    def test_refill(self):
+        """Tokens refill at the configured rate up to the capacity"""
+        with patch("admission.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=2, capacity=3)
+            assert all(bucket.try_take() for _ in range(3))
+            assert not bucket.try_take()
+            assert bucket.delay() == pytest.approx(0.5)
+        with patch("admission.time.monotonic", return_value=101.0):
+            assert bucket.try_take(2)
+            assert not bucket.try_take()
+        with patch("admission.time.monotonic", return_value=200.0):
+            bucket.try_take(0)
+            assert bucket.tokens == 3
+
+
+class TestClientLimiter:
+    """Per-client token bucket tests"""
+
+    def test_clients_are_isolated(self):
+        """One client exhausting its bucket does not affect another"""
+        limiter = ClientLimiter(rate=0.001, burst=2)
+        limiter.acquire("session:a")
+        limiter.acquire("session:a")
+        with pytest.raises(McpError) as error:
+            limiter.acquire("session:a")
+        limiter.acquire("session:b")
+
+        assert error.value.error.code == CLIENT_RATE_LIMITED
+        assert error.value.error.data["retry_after"] > 0
+        assert limiter.stats() == {"clients": 2, "admitted": 3, "rejected": 1}
+
+    def test_calls_outside_requests_are_not_limited(self):
+        """Calls without a client key and a disabled limit pass"""
+        limiter = ClientLimiter(rate=0.001, burst=1)
+        for _ in range(5):
+            limiter.acquire(None)
+        disabled = ClientLimiter(rate=0, burst=1)
+        for _ in range(5):
+            disabled.acquire("session:a")
+
+    def test_least_recent_clients_are_dropped(self):
+        """Only max_clients buckets are kept"""
+        limiter = ClientLimiter(rate=1, burst=1, max_clients=2)
+        for client in ("a", "b", "c"):
+            limiter.acquire(client)
+
+        assert limiter.stats()["clients"] == 2
+
+
+class TestUpstreamBudget:
+    """Global upstream budget tests"""
+
+    @pytest.mark.asyncio
+    async def test_requests_wait_for_tokens(self):
+        """Requests beyond the burst are queued, not rejected"""
+        budget = UpstreamBudget(rate=100, burst=1, max_queue=10, max_wait=1)
+
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(*(budget.acquire() for _ in range(4)))
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert elapsed >= 0.025
+        assert budget.stats()["admitted"] == 4
+        assert budget.stats()["queued"] == 3
+        assert budget.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self):
+        """Requests beyond the queue size are rejected with UPSTREAM_BUSY"""
+        budget = UpstreamBudget(rate=20, burst=1, max_queue=1, max_wait=1)
+
+        results = await asyncio.gather(
+            *(budget.acquire() for _ in range(3)), return_exceptions=True
+        )
+
+        errors = [result for result in results if isinstance(result, McpError)]
+        assert len(errors) == 1
+        assert errors[0].error.code == UPSTREAM_BUSY
+
+    @pytest.mark.asyncio
+    async def test_wait_is_bounded(self):
+        """A request that would wait longer than max_wait is rejected"""
+        budget = UpstreamBudget(rate=1, burst=1, max_queue=10, max_wait=0.1)
+        await budget.acquire()
+
+        with pytest.raises(McpError) as error:
+            await budget.acquire()
+
+        assert error.value.error.code == UPSTREAM_BUSY
+        assert budget.stats()["rejected"] == 1
+
+
+class TestServerAdmission:
+    """Admission control in the weather tools"""
+
+    def test_client_key(self):
+        """The header wins over the SSE session, the session over the address"""
+        assert server.client_key(None) is None
+        assert server.client_key(
+            make_ctx({"X-Client-Id": "agent-1"}, b"session_id=abc")
+        ) == "client:agent-1"
+        assert server.client_key(make_ctx(query_string=b"session_id=abc")) == "session:abc"
+        assert server.client_key(make_ctx()) == "address:10.0.0.1"
+
+    @pytest.mark.asyncio
+    async def test_tool_rejects_client_over_limit(self):
+        """A client over its limit gets CLIENT_RATE_LIMITED"""
+        ctx = make_ctx({"X-Client-Id": "agent-1"})
+        with patch("server.client_limiter", ClientLimiter(rate=0.001, burst=1)), \
+                patch("server.get_city_coordinates", return_value=(55.7558, 37.6176)), \
+                patch("server.get_weather_data", return_value=make_forecast(1)):
+            await server.get_today_weather("Moscow", ctx=ctx)
+            with pytest.raises(McpError) as error:
+                await server.get_today_weather("Moscow", ctx=ctx)
+            # Another client is not affected
+            await server.get_today_weather("Moscow", ctx=make_ctx({"X-Client-Id": "agent-2"}))
+
+        assert error.value.error.code == CLIENT_RATE_LIMITED
+
+    @pytest.mark.asyncio
+    async def test_batch_costs_one_token_per_city(self):
+        """get_weather_for_cities takes a token per city"""
+        limiter = ClientLimiter(rate=0.001, burst=3)
+        with patch("server.client_limiter", limiter), \
+                patch("server.get_city_coordinates", return_value=None):
+            await server.get_weather_for_cities(["Moscow", "Kazan"], ctx=make_ctx())
+            with pytest.raises(McpError) as error:
+                await server.get_weather_for_cities(["Moscow", "Kazan"], ctx=make_ctx())
+
+        assert error.value.error.code == CLIENT_RATE_LIMITED
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_skip_the_budget(self):
+        """Only upstream requests take from the global budget"""
+        budget = UpstreamBudget(rate=0.001, burst=1, max_queue=0, max_wait=0)
+        with patch.object(server.forecast_upstream, "budget", budget), \
+                patch("server.get_http_client", return_value=forecast_client()):
+            await server.get_forecast(55.7558, 37.6176, 1)
+            await server.get_forecast(55.7558, 37.6176, 1)
+            with pytest.raises(McpError) as error:
+                await server.get_forecast(48.8566, 2.3522, 1)
+
+        assert error.value.error.code == UPSTREAM_BUSY
+        assert budget.stats()["admitted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_busy_geocoding_is_not_unknown_city(self):
+        """A busy budget during geocoding is reported as busy, not as a missing city"""
+        budget = UpstreamBudget(rate=0.001, burst=1, max_queue=0, max_wait=0)
+        budget._bucket.try_take()
+        with patch.object(server.geocoding_upstream, "budget", budget):
+            with pytest.raises(McpError) as error:
+                await server.get_today_weather("Atlantis")
+
+        assert error.value.error.code == UPSTREAM_BUSY
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_takes_no_budget(self):
+        """An open circuit fails fast without a budget token or a queue slot"""
+        budget = UpstreamBudget(rate=0.001, burst=1, max_queue=1, max_wait=5)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(503)
+        ))
+        upstream = Upstream("geocoding", lambda: client, failure_threshold=1, budget=budget)
+        with pytest.raises(httpx.HTTPStatusError):
+            await upstream.get("https://geocoding-api.open-meteo.com/v1/search")
+
+        started = asyncio.get_running_loop().time()
+        with pytest.raises(CircuitOpenError):
+            await upstream.get("https://geocoding-api.open-meteo.com/v1/search")
+
+        assert asyncio.get_running_loop().time() - started < 0.1
+        assert budget.stats() == {"waiting": 0, "admitted": 1, "queued": 0, "rejected": 0}
+
+    @pytest.mark.asyncio
+    async def test_rejected_trial_keeps_circuit_usable(self):
+        """A half-open trial rejected by the budget does not block the next trial"""
+        budget = UpstreamBudget(rate=0.001, burst=1, max_queue=0, max_wait=0)
+        budget._bucket.try_take()
+        upstream = Upstream("forecast", Mock(), failure_threshold=1, reset_timeout=0, budget=budget)
+        upstream.breaker.record_failure()
+
+        with pytest.raises(McpError):
+            await upstream.get("https://api.open-meteo.com/v1/forecast")
+
+        # The next call may be the trial again instead of failing as open
+        upstream.breaker.before_call()
@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the weather server caches.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+import sqlite3
+import sys
+import time
+import os
+from unittest.mock import patch, Mock, AsyncMock
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS
+
+import server
+from forecast import ForecastRecord
+from cache import (
+    MISSING, SingleFlight, SQLiteCache, SQLiteStore, TTLCache, create_cache
+)
+
+
+class TestTTLCache:
+    """TTL/LRU cache tests"""
+
+    def test_get_set(self):
+        """Stored values are returned, unknown keys are misses"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_none_is_cached(self):
+        """None is a valid cached value (negative caching)"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("unknown", None)
+
+        assert cache.get("unknown") is None
+
+    def test_expiry(self):
+        """Entries expire after their TTL"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        with patch("cache.time.time", return_value=1000.0):
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=5)
+        with patch("cache.time.time", return_value=1010.0):
+            assert cache.get("a") == 1
+            assert cache.get("b") is MISSING
+        assert cache.stats()["expirations"] == 1
+
+    def test_stale_reads(self):
+        """Expired entries stay readable with get_stale() up to max_stale"""
+        cache = TTLCache(maxsize=10, ttl=60, max_stale=100)
+        with patch("cache.time.time", return_value=1000.0):
+            cache.set("a", 1, ttl=5)
+        with patch("cache.time.time", return_value=1010.0):
+            assert cache.get("a") is MISSING
+            assert cache.get_stale("a") == (1, 5.0)
+        with patch("cache.time.time", return_value=1200.0):
+            assert cache.get_stale("a") == (MISSING, 0.0)
+            assert cache.get("a") is MISSING
+        assert "a" not in list(cache)
+        assert cache.stats()["stale_hits"] == 1
+        assert cache.stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_persistence(self, tmp_path):
+        """Entries survive a restart through the SQLite store"""
+        path = str(tmp_path / "cache.sqlite3")
+
+        store = SQLiteStore(path, "geocode")
+        cache = TTLCache(maxsize=10, ttl=60, store=store)
+        cache.set("ru:москва", (55.75, 37.62))
+        cache.set("ru:nowhere", None, ttl=5)
+        store.close()
+
+        store = SQLiteStore(path, "geocode")
+        warm = TTLCache(maxsize=10, ttl=60, store=store)
+        assert warm.get("ru:москва") == (55.75, 37.62)
+        assert warm.get("ru:nowhere") is None
+        store.close()
+
+    def test_persistence_skips_expired(self, tmp_path):
+        """Expired entries are not loaded from the store"""
+        store = SQLiteStore(str(tmp_path / "cache.sqlite3"), "geocode")
+        store.put("old", 1, expires_at=1.0)
+
+        cache = TTLCache(maxsize=10, ttl=60, store=store)
+        assert len(cache) == 0
+        store.close()
+
+
+class TestSQLiteCache:
+    """Cross-process SQLite cache tests"""
+
+    def test_shared_between_connections(self, tmp_path):
+        """Entries written by one worker are visible to another"""
+        path = str(tmp_path / "shared.sqlite3")
+        worker_1 = SQLiteCache(path, "forecast", maxsize=10, ttl=60)
+        worker_2 = SQLiteCache(path, "forecast", maxsize=10, ttl=60)
+        try:
+            worker_1.set("55.7500,37.6000:7", {"daily": {"time": ["2024-01-15"]}})
+            worker_1.set("ru:atlantis", None)
+
+            assert worker_2.get("55.7500,37.6000:7") == {"daily": {"time": ["2024-01-15"]}}
+            assert worker_2.get("ru:atlantis") is None
+            assert "55.7500,37.6000:7" in worker_2
+            assert worker_2.get("unknown") is MISSING
+            assert worker_2.stats()["hits"] == 2
+            assert worker_2.stats()["misses"] == 1
+        finally:
+            worker_1.close()
+            worker_2.close()
+
+    def test_wal_mode(self, tmp_path):
+        """The database uses write-ahead logging"""
+        cache = SQLiteCache(str(tmp_path / "shared.sqlite3"), "geocode", 10, 60)
+        try:
+            assert cache.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            cache.close()
+
+    def test_expiry(self, tmp_path):
+        """Expired entries are misses"""
+        cache = SQLiteCache(str(tmp_path / "shared.sqlite3"), "geocode", 10, 60)
+        try:
+            with patch("cache.time.time", return_value=1000.0):
+                cache.set("a", 1, ttl=5)
+            with patch("cache.time.time", return_value=1010.0):
+                assert cache.get("a") is MISSING
+                assert "a" not in cache
+            assert cache.stats()["expirations"] == 1
+        finally:
+            cache.close()
+
+    def test_stale_reads(self, tmp_path):
+        """Expired entries stay readable with get_stale() up to max_stale"""
+        cache = SQLiteCache(
+            str(tmp_path / "shared.sqlite3"), "forecast", 10, 60, max_stale=100
+        )
+        try:
+            with patch("cache.time.time", return_value=1000.0):
+                cache.set("a", 1, ttl=5)
+            with patch("cache.time.time", return_value=1010.0):
+                assert cache.get("a") is MISSING
+                assert cache.get_stale("a") == (1, 5.0)
+            with patch("cache.time.time", return_value=1200.0):
+                assert cache.get_stale("a") == (MISSING, 0.0)
+                cache.evict()
+            assert len(cache) == 0
+            assert cache.stats()["stale_hits"] == 1
+        finally:
+            cache.close()
+
+    def test_eviction(self, tmp_path):
+        """The least recently used entries are evicted beyond maxsize"""
+        cache = SQLiteCache(str(tmp_path / "shared.sqlite3"), "geocode", 2, 60)
+        try:
+            with patch("cache.time.time", return_value=1000.0):
+                cache.set("a", 1)
+            with patch("cache.time.time", return_value=1001.0):
+                cache.set("b", 2)
+            with patch("cache.time.time", return_value=1003.0):
+                cache.get("a")
+                cache.set("c", 3)
+                cache.evict()
+
+                assert len(cache) == 2
+                assert cache.get("b") is MISSING
+                assert cache.get("a") == 1
+        finally:
+            cache.close()
+
+    def test_write_skipped_while_locked(self, tmp_path):
+        """A write lock held by another process skips writes instead of blocking"""
+        path = str(tmp_path / "shared.sqlite3")
+        cache = SQLiteCache(path, "forecast", 10, 60, busy_timeout=0.05)
+        other = sqlite3.connect(path, isolation_level=None)
+        try:
+            cache.set("a", 1)
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("DELETE FROM forecast WHERE key = 'a'")
+
+            started = time.monotonic()
+            cache.set("b", 2)
+            cache.delete("a")
+            assert time.monotonic() - started < 1.0
+            assert cache.stats()["skipped_writes"] == 2
+
+            # Readers keep seeing the last committed state
+            assert cache.get("a") == 1
+            assert cache.get("b") is MISSING
+
+            other.execute("COMMIT")
+            cache.set("b", 2)
+            assert cache.get("b") == 2
+            assert cache.get("a") is MISSING
+        finally:
+            other.close()
+            cache.close()
+
+    def test_create_cache(self, tmp_path):
+        """The backend is selected by configuration"""
+        assert isinstance(create_cache("memory", "geocode", 10, 60), TTLCache)
+        shared = create_cache("sqlite", "geocode", 10, 60, str(tmp_path / "c.sqlite3"))
+        assert isinstance(shared, SQLiteCache)
+        with pytest.raises(ValueError):
+            create_cache("sqlite", "geocode", 10, 60)
+        with pytest.raises(ValueError):
+            create_cache("redis", "geocode", 10, 60)
+
+    @pytest.mark.asyncio
+    async def test_forecast_shared_between_workers(self, tmp_path):
+        """A forecast fetched by one worker is served to another"""
+        path = str(tmp_path / "shared.sqlite3")
+        worker_1 = SQLiteCache(path, "forecast", 10, 60)
+        worker_2 = SQLiteCache(path, "forecast", 10, 60)
+        try:
+            with patch("server.get_weather_data", return_value=make_forecast(7)) as fetch:
+                with patch.object(server, "forecast_cache", worker_1):
+                    await server.get_forecast(55.7558, 37.6176, 7)
+                with patch.object(server, "forecast_cache", worker_2):
+                    today = await server.get_forecast(55.7558, 37.6176, 1)
+
+            fetch.assert_awaited_once()
+            assert len(today) == 1
+        finally:
+            worker_1.close()
+            worker_2.close()
+
+
+class TestGeocodeCache:
+    """Geocoding cache tests"""
+
+    @staticmethod
+    def _client(payload):
+        mock_response = Mock()
+        mock_response.json.return_value = payload
+        mock_response.raise_for_status.return_value = None
+        client = AsyncMock()
+        client.get.return_value = mock_response
+        return client
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_uses_cache(self):
+        """A second lookup of the same city does not call the API"""
+        client = self._client(
+            {"results": [{"latitude": 55.7558, "longitude": 37.6176}]}
+        )
+        with patch("server.get_http_client", return_value=client):
+            assert await server.get_city_coordinates("Moscow") == (55.7558, 37.6176)
+            assert await server.get_city_coordinates("  moscow ") == (55.7558, 37.6176)
+
+        assert client.get.await_count == 1
+        assert server.geocode_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_not_found_is_cached(self):
+        """Unknown cities are cached with the negative TTL"""
+        client = self._client({"results": []})
+        with patch("server.get_http_client", return_value=client):
+            assert await server.get_city_coordinates("Atlantis") is None
+            assert await server.get_city_coordinates("Atlantis") is None
+
+        assert client.get.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        """Upstream errors are not cached as 'not found'"""
+        client = AsyncMock()
+        client.get.side_effect = Exception("Network error")
+        with patch("server.get_http_client", return_value=client):
+            assert await server.get_city_coordinates("Moscow") is None
+            assert await server.get_city_coordinates("Moscow") is None
+
+        assert client.get.await_count == 2
+
+
+class TestAliasIndex:
+    """Name variants of a location share one geocoding result"""
+
+    @staticmethod
+    def _client(name):
+        """Geocoding API answering every query with Moscow named `name`"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"results": [{
+                "id": 524901, "name": name, "latitude": 55.75222, "longitude": 37.61556,
+            }]})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requests
+
+    @pytest.mark.asyncio
+    async def test_spellings_share_one_lookup(self):
+        """The returned name and transliterations resolve without the API"""
+        client, requests = self._client("Москва")
+        with patch("server.get_http_client", return_value=client):
+            for name in ["Moscow", "Москва", "moskva", " MOSKVA ", "moscow"]:
+                assert await server.get_city_coordinates(name) == (55.75222, 37.61556)
+
+        assert len(requests) == 1
+        assert server.alias_cache.get("moskva") == "524901"
+        assert len(server.geocode_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_spellings_share_forecast(self):
+        """Cities resolved through aliases are served the cached forecast"""
+        client, requests = self._client("Москва")
+        with patch("server.get_http_client", return_value=client), \
+                patch("server.get_weather_data", return_value=make_forecast(1)) as fetch:
+            await server.get_real_weather_data("Moscow")
+            await server.get_real_weather_data("Moskva")
+
+        assert len(requests) == 1
+        fetch.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_not_found_covers_only_the_name(self):
+        """A missing name does not hide its transliteration"""
+        server.alias_cache.set("мосва", None)
+        server.alias_cache.set("mosva", "524901")
+        server.geocode_cache.set("524901", (55.75222, 37.61556))
+
+        assert await server.get_city_coordinates("Мосва") is None
+        assert await server.get_city_coordinates("Mosva") == (55.75222, 37.61556)
+
+
+def make_forecast(days):
+    """Open-Meteo forecast response with the given number of days"""
+    return {
+        "current": {
+            "time": "2024-01-15T12:00:00Z",
+            "temperature_2m": -5.2,
+            "relative_humidity_2m": 78,
+            "weather_code": 3,
+            "wind_speed_10m": 4.5,
+            "surface_pressure": 1013.2
+        },
+        "daily": {
+            "time": [f"2024-01-{15 + day}" for day in range(days)],
+            "weather_code": [3] * days,
+            "temperature_2m_max": [-2.1] * days,
+            "temperature_2m_min": [-8.7] * days,
+            "precipitation_probability_max": [20] * days,
+            "wind_speed_10m_max": [6.8] * days
+        }
+    }
+
+
+def make_record(days):
+    """Cached ForecastRecord with the given number of days"""
+    return ForecastRecord.from_open_meteo(make_forecast(days))
+
+
+class TestForecastCache:
+    """Forecast cache tests"""
+
+    def test_snap_to_grid(self):
+        """Nearby coordinates fall into the same grid cell"""
+        assert server.snap_to_grid(55.7558, 37.6176) == (55.75, 37.6)
+        assert server.snap_to_grid(55.7612, 37.6049) == (55.75, 37.6)
+        assert server.snap_to_grid(-33.8688, 151.2093) == (-33.85, 151.2)
+
+    def test_forecast_ttl_aligned_to_refresh(self):
+        """Entries expire on the next upstream refresh boundary"""
+        interval = server.FORECAST_REFRESH_SECONDS
+        assert server.forecast_ttl(now=10 * interval) == interval
+        assert server.forecast_ttl(now=10 * interval + 60) == interval - 60
+
+    @pytest.mark.asyncio
+    async def test_weekly_fetch_serves_today(self):
+        """A cached 7-day forecast also serves a 1-day request"""
+        with patch("server.get_weather_data", return_value=make_forecast(7)) as fetch:
+            weekly = await server.get_forecast(55.7558, 37.6176, 7)
+            today = await server.get_forecast(55.7600, 37.6100, 1)
+
+        fetch.assert_awaited_once_with(55.75, 37.6, 7)
+        assert len(weekly) == 7
+        assert len(today) == 1
+        assert today.observed == weekly.observed
+
+    @pytest.mark.asyncio
+    async def test_today_fetch_does_not_serve_weekly(self):
+        """A cached 1-day forecast is not enough for a 7-day request"""
+        with patch("server.get_weather_data") as fetch:
+            fetch.side_effect = [make_forecast(1), make_forecast(7)]
+            await server.get_forecast(55.7558, 37.6176, 1)
+            weekly = await server.get_forecast(55.7558, 37.6176, 7)
+            await server.get_forecast(55.7558, 37.6176, 1)
+
+        assert fetch.await_count == 2
+        assert len(weekly) == 7
+
+
+class TestCoordinatesTool:
+    """get_weather_by_coordinates skips geocoding and shares the forecast cache"""
+
+    @pytest.mark.asyncio
+    async def test_no_geocoding_and_shared_cell(self):
+        """Nearby coordinates and cities in the same grid cell share one fetch"""
+        with patch("server.get_weather_data", return_value=make_forecast(7)) as fetch, \
+                patch("server.get_city_coordinates", return_value=(55.7558, 37.6176)) as geocode:
+            weekly = await server.get_weather_by_coordinates(55.7558, 37.6176, days=7)
+            today = await server.get_weather_by_coordinates(55.76, 37.61)
+            await server.get_today_weather("Moscow")
+
+        fetch.assert_awaited_once_with(55.75, 37.6, 7)
+        geocode.assert_awaited_once_with("Moscow")
+        assert "55.7558, 37.6176" in weekly
+        assert weekly.count("📆") == 7
+        assert "-5°C" in today
+
+    @pytest.mark.asyncio
+    async def test_compact_output(self):
+        """Multi-day compact output has no current conditions"""
+        with patch("server.get_weather_data", return_value=make_forecast(7)):
+            result = json.loads(await server.get_weather_by_coordinates(
+                55.7558, 37.6176, days=3, output_format="compact"
+            ))
+
+        assert result["ll"] == [55.76, 37.62]
+        assert "now" not in result
+        assert len(result["daily"]["d"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_text_title_names_the_days(self):
+        """A multi-day text forecast is titled with its number of days"""
+        with patch("server.get_weather_data", return_value=make_forecast(7)):
+            result = await server.get_weather_by_coordinates(55.7558, 37.6176, days=3)
+
+        assert "3-day weather forecast for 55.7558, 37.6176" in result
+        assert "Forecast for 3 days:" in result
+        assert "Weekly" not in result
+        assert result.count("📆") == 3
+
+    @pytest.mark.asyncio
+    async def test_invalid_arguments(self):
+        """Coordinates and days are validated"""
+        for arguments in ((91, 0), (0, 181), (0, 0, 0), (0, 0, 17)):
+            with pytest.raises(McpError) as error:
+                await server.get_weather_by_coordinates(*arguments)
+
+            assert error.value.error.code == INVALID_PARAMS
+
+
+class TestStaleForecasts:
+    """Stale-while-revalidate forecast tests"""
+
+    async def wait_for_revalidations(self):
+        """Waits for background refreshes started by the test"""
+        await asyncio.gather(*list(server._revalidation_tasks))
+
+    @pytest.mark.asyncio
+    async def test_stale_forecast_served_and_refreshed(self):
+        """An expired forecast is returned at once and refreshed in the background"""
+        cache_key = server.forecast_cache_key(55.75, 37.6, 1)
+        server.forecast_cache.set(cache_key, make_record(1), ttl=-120)
+        fresh = make_forecast(1)
+        fresh["current"]["temperature_2m"] = 3.0
+
+        with patch("server.get_weather_data", return_value=fresh) as fetch:
+            stale = await server.get_forecast(55.7558, 37.6176, 1)
+            assert stale.stale_for == pytest.approx(120, abs=5)
+            await self.wait_for_revalidations()
+            refreshed = await server.get_forecast(55.7558, 37.6176, 1)
+
+        fetch.assert_awaited_once_with(55.75, 37.6, 1)
+        assert refreshed.stale_for is None
+        assert refreshed.temperature == 3.0
+        assert server.forecast_cache.stats()["stale_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_forecast(self):
+        """Upstream errors do not fail calls while stale data exists"""
+        cache_key = server.forecast_cache_key(55.75, 37.6, 1)
+        server.forecast_cache.set(cache_key, make_record(1), ttl=-60)
+        failed = server.forecast_revalidations["failed"]
+
+        with patch("server.get_weather_data", side_effect=httpx.ConnectTimeout("slow")):
+            forecast = await server.get_forecast(55.7558, 37.6176, 1)
+            await self.wait_for_revalidations()
+
+        assert forecast.stale_for > 0
+        assert server.forecast_revalidations["failed"] == failed + 1
+
+    @pytest.mark.asyncio
+    async def test_too_stale_forecast_is_refetched(self):
+        """Forecasts past FORECAST_MAX_STALENESS are not served"""
+        cache_key = server.forecast_cache_key(55.75, 37.6, 1)
+        server.forecast_cache.set(
+            cache_key, make_record(1), ttl=-server.FORECAST_MAX_STALENESS - 1
+        )
+
+        with patch("server.get_weather_data", side_effect=httpx.ConnectTimeout("slow")):
+            with pytest.raises(httpx.ConnectTimeout):
+                await server.get_forecast(55.7558, 37.6176, 1)
+
+    @pytest.mark.asyncio
+    async def test_stale_result_is_marked(self):
+        """Tool output tells that the data is stale"""
+        cache_key = server.forecast_cache_key(55.75, 37.6, 1)
+        server.forecast_cache.set(cache_key, make_record(1), ttl=-600)
+
+        with patch("server.get_city_coordinates", return_value=(55.7558, 37.6176)), \
+                patch("server.get_weather_data", return_value=make_forecast(1)):
+            text = await server.get_today_weather("Moscow")
+            await self.wait_for_revalidations()
+            compact = await server.get_today_weather("Moscow", output_format="compact")
+
+        assert "⚠️ Cached data, 10 min" in text
+        assert "stale" not in json.loads(compact)
+
+
+class TestSingleFlight:
+    """Request coalescing tests"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Concurrent callers with the same key await one call"""
+        flight = SingleFlight()
+        started = 0
+
+        async def fetch():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.01)
+            return "sunny"
+
+        results = await asyncio.gather(*[flight.do("moscow", fetch) for _ in range(5)])
+
+        assert results == ["sunny"] * 5
+        assert started == 1
+        assert flight.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_every_caller(self):
+        """Every waiter receives the exception of the shared call"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            *[flight.do("moscow", fetch) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Cancelling one waiter leaves the shared call running"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 42
+
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == 42
+
+    @pytest.mark.asyncio
+    async def test_new_call_after_completion(self):
+        """A finished call is not reused for later callers"""
+        flight = SingleFlight()
+        fetch = AsyncMock(return_value=1)
+
+        await flight.do("key", fetch)
+        await flight.do("key", fetch)
+
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_geocoding_and_forecast(self):
+        """Concurrent lookups of one city cost one request of each kind"""
+        async def geocode(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            response = Mock()
+            response.json.return_value = {
+                "results": [{"latitude": 55.7558, "longitude": 37.6176}]
+            }
+            return response
+
+        async def forecast(*args):
+            await asyncio.sleep(0.01)
+            return make_forecast(1)
+
+        client = AsyncMock()
+        client.get.side_effect = geocode
+        with patch("server.get_http_client", return_value=client), \
+             patch("server.get_weather_data", side_effect=forecast) as fetch:
+            results = await asyncio.gather(
+                *[server.get_real_weather_data("Moscow", 1) for _ in range(10)]
+            )
+
+        assert client.get.await_count == 1
+        assert fetch.await_count == 1
+        assert {result["current_weather"]["temperature"] for result in results} == {-5}
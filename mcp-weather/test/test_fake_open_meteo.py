@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the fake Open-Meteo service used by the load benchmark.
+"""
+
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from test.bench_load import percentile, plan_calls
+from test.fake_open_meteo import FaultProfile, create_app
+
+
+def fake_client(profile=FaultProfile()):
+    """HTTP client talking to an in-process fake Open-Meteo"""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app(profile)),
+        base_url="http://fake-open-meteo",
+    )
+
+
+class TestFakeOpenMeteo:
+    """The fake answers like Open-Meteo"""
+
+    @pytest.mark.asyncio
+    async def test_weather_through_fake(self):
+        """The server parses fake geocoding and forecast responses"""
+        client = fake_client()
+        with patch("server.get_http_client", return_value=client), \
+                patch("server.GEOCODING_URL", "http://fake-open-meteo/v1/search"), \
+                patch("server.FORECAST_URL", "http://fake-open-meteo/v1/forecast"):
+            weather_data = await server.get_real_weather_data("Moscow", 7)
+            tokyo = await server.get_city_coordinates("Tokyo")
+            unknown = await server.get_city_coordinates("Nonexistent City")
+
+        assert weather_data["coordinates"] == {"latitude": 55.7558, "longitude": 37.6176}
+        assert len(weather_data["forecast"]) == 7
+        assert weather_data["forecast"][3]["date"] == "2024-01-18"
+        assert tokyo is not None and tokyo != (55.7558, 37.6176)
+        assert unknown is None
+
+    @pytest.mark.asyncio
+    async def test_batch_forecast(self):
+        """Several locations are answered with a list"""
+        async with fake_client() as client:
+            response = await client.get("/v1/forecast", params={
+                "latitude": "55.75,51.5", "longitude": "37.6,-0.1", "forecast_days": 1,
+            })
+
+        assert [item["latitude"] for item in response.json()] == [55.75, 51.5]
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_are_deterministic(self):
+        """The same seed fails the same requests"""
+        profile = FaultProfile(error_rate=0.5, error_status=503, seed=7)
+        statuses = []
+        for _ in range(2):
+            async with fake_client(profile) as client:
+                statuses.append([
+                    (await client.get("/v1/search", params={"name": "Kazan"})).status_code
+                    for _ in range(20)
+                ])
+
+        assert statuses[0] == statuses[1]
+        assert {200, 503} == set(statuses[0])
+
+
+class TestLoadBenchmark:
+    """Load benchmark helpers"""
+
+    def test_percentile(self):
+        """Percentiles interpolate between samples"""
+        samples = [float(value) for value in range(1, 101)]
+        assert percentile(samples, 50) == pytest.approx(50.5)
+        assert percentile(samples, 99) == pytest.approx(99.01)
+        assert percentile([], 95) == 0.0
+
+    def test_plan_calls(self):
+        """The call mix follows the weekly share and cycles through cities"""
+        calls = plan_calls(["A", "B"], weekly_share=0.25)
+        plan = [next(calls) for _ in range(8)]
+
+        assert [call["tool"] for call in plan].count("get_weekly_forecast") == 2
+        assert [call["city"] for call in plan[:3]] == ["A", "B", "A"]
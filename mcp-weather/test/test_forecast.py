@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the compact forecast records of the forecast cache.
+"""
+
+import json
+import pickle
+import tracemalloc
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from cache import create_cache
+from forecast import ForecastRecord
+from test.test_cache import make_forecast
+
+
+class TestForecastRecord:
+    """Encoding and decoding of ForecastRecord"""
+
+    def test_decode(self):
+        """Daily series decode to Python numbers"""
+        record = ForecastRecord.from_open_meteo(make_forecast(3))
+
+        assert len(record) == 3
+        assert record.weather_codes.dtype == np.int8
+        assert record.observed_at().isoformat() == "2024-01-15T12:00:00+00:00"
+        day = record.daily()[2]
+        assert day["date"] == "2024-01-17"
+        assert day["weather_code"] == 3
+        assert day["precipitation_probability"] == 20
+        assert day["temperature_max"] == pytest.approx(-2.1)
+
+    def test_missing_probability(self):
+        """Unknown precipitation probabilities decode as 0"""
+        data = make_forecast(2)
+        data["daily"]["precipitation_probability_max"] = [None, 40]
+
+        record = ForecastRecord.from_open_meteo(data)
+
+        assert [day["precipitation_probability"] for day in record.daily()] == [0, 40]
+
+    def test_head_and_stale(self):
+        """Shorter and stale views leave the cached record unchanged"""
+        record = ForecastRecord.from_open_meteo(make_forecast(7))
+
+        today = record.head(1)
+        stale = today.as_stale(90)
+
+        assert str(today.dates[-1]) == "2024-01-15"
+        assert len(record) == 7
+        assert record.head(16) is record
+        assert stale.stale_for == 90
+        assert today.stale_for is None
+
+    def test_pickle(self):
+        """Records pickle to a fraction of the raw response"""
+        data = make_forecast(16)
+        record = ForecastRecord.from_open_meteo(data)
+
+        restored = pickle.loads(pickle.dumps(record))
+
+        assert restored.daily() == record.daily()
+        assert restored.temperature == -5.2
+        assert len(pickle.dumps(record)) * 2 < len(pickle.dumps(data))
+
+    def test_memory(self):
+        """A cached record takes a fraction of the decoded JSON"""
+        raw = json.dumps(make_forecast(7))
+
+        def allocated(build):
+            tracemalloc.start()
+            try:
+                items = [build() for _ in range(500)]
+                return tracemalloc.get_traced_memory()[0] / len(items)
+            finally:
+                tracemalloc.stop()
+
+        record_size = allocated(lambda: ForecastRecord.from_open_meteo(json.loads(raw)))
+        dict_size = allocated(lambda: json.loads(raw))
+
+        assert record_size * 3 < dict_size
+
+    def test_sqlite_cache(self, tmp_path):
+        """Records round-trip through the shared SQLite cache"""
+        cache = create_cache("sqlite", "forecast", 10, 60, str(tmp_path / "cache.sqlite3"))
+        try:
+            cache.set("cell", ForecastRecord.from_open_meteo(make_forecast(7)))
+
+            assert cache.get("cell").head(2).daily()[1]["date"] == "2024-01-16"
+        finally:
+            cache.close()
+
+
+class TestRecordCache:
+    """The forecast cache keeps records, tools decode them"""
+
+    @pytest.mark.asyncio
+    async def test_cache_holds_records(self):
+        """Fetched forecasts are cached as ForecastRecords and rendered on demand"""
+        with patch("server.get_weather_data", return_value=make_forecast(7)), \
+                patch("server.get_city_coordinates", return_value=(55.7558, 37.6176)):
+            result = await server.get_weekly_forecast("Moscow")
+
+        cached = server.forecast_cache.get(server.forecast_cache_key(55.75, 37.6, 7))
+        assert isinstance(cached, ForecastRecord)
+        assert "2024-01-21" in result
+        assert "-2°C" in result
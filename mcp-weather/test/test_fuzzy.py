@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for typo-tolerant city matching.
+"""
+
+import random
+import time
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from fuzzy import TrigramIndex, levenshtein
+from gazetteer import Gazetteer
+from test.test_gazetteer import index_path  # noqa: F401 (fixture)
+
+NOVOSIBIRSK = (55.0415, 82.9346)
+
+
+class TestTrigramIndex:
+    """Candidate search and verification of TrigramIndex"""
+
+    def test_levenshtein(self):
+        """Distances above the limit are reported as limit + 1"""
+        assert levenshtein("kazan", "kazan", 2) == 0
+        assert levenshtein("kazan", "kazn", 2) == 1
+        assert levenshtein("novosibirsk", "novosibrisk", 2) == 2
+        assert levenshtein("moscow", "madrid", 2) == 3
+        assert levenshtein("rome", "rotterdam", 1) == 2
+
+    def test_closest_name(self):
+        """The closest name within the distance is returned"""
+        index = TrigramIndex()
+        index.update([("kazan", 1), ("kazanlak", 2), ("kaluga", 3)])
+
+        match = index.search("kazn", 1)
+
+        assert match.name == "kazan"
+        assert match.value == 1
+        assert match.distance == 1
+        assert index.search("kazan", 0).distance == 0
+        assert index.search("kaluzhskaya", 2) is None
+        assert index.stats() == {
+            "names": 3, "evictable": 0, "evicted": 0, "exact": 1, "corrected": 1, "misses": 1
+        }
+
+    def test_first_letter_is_kept(self):
+        """Names with a different first letter are not matched"""
+        index = TrigramIndex()
+        index.add("pinsk", 1)
+
+        assert index.search("minsk", 2) is None
+        assert index.search("pinks", 2).name == "pinsk"
+
+    def test_size_limit(self):
+        """Names beyond max_names are not indexed"""
+        index = TrigramIndex(max_names=2)
+
+        assert index.update([("omsk", 1), ("tomsk", 2), ("perm", 3)]) == 2
+        assert "perm" not in index
+        # Known names are updated even when the index is full
+        assert index.add("omsk", 4)
+        assert index.search("omsk", 0).value == 4
+
+    def test_eviction(self):
+        """A permanent name replaces the evictable name added last"""
+        index = TrigramIndex(max_names=2)
+        index.update([("omsk", 1), ("tomsk", 2)], evictable=True)
+
+        assert index.add("perm", 3)
+        assert "tomsk" not in index
+        assert index.search("tomks", 2) is None
+        assert index.search("pern", 2).value == 3
+        # An evictable name becomes permanent when added as one
+        assert index.add("omsk", 4)
+        assert not index.add("orsk", 5)
+        assert not index.add("ufa", 6, evictable=True)
+        assert index.stats()["evicted"] == 1
+
+    def test_merge(self):
+        """A separately built index keeps the permanent names of this one"""
+        index = TrigramIndex(max_names=2)
+        index.add("perm", 1)
+        built = TrigramIndex(max_names=2)
+        built.update([("omsk", 2), ("tomsk", 3)], evictable=True)
+
+        index.merge(built)
+
+        assert "perm" in index and "omsk" in index
+        assert "tomsk" not in index
+
+    def test_lookup_time(self):
+        """Lookups over tens of thousands of names take well under a millisecond"""
+        rng = random.Random(1)
+        names = [
+            "".join(rng.choice("abcdefghiklmnoprstuvyz") for _ in range(rng.randint(5, 14)))
+            for _ in range(30000)
+        ]
+        index = TrigramIndex()
+        index.update((name, position) for position, name in enumerate(names))
+        queries = [name[:3] + name[4:] for name in names[:500]]
+
+        start = time.perf_counter()
+        matches = [index.search(query, 2) for query in queries]
+        elapsed = (time.perf_counter() - start) / len(queries)
+
+        assert all(match is not None and match.distance <= 1 for match in matches)
+        assert elapsed < 0.002
+
+
+class TestCityCorrection:
+    """get_city_coordinates corrects near-misses locally"""
+
+    @staticmethod
+    def _client():
+        """Geocoding API knowing only Novosibirsk"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.params["name"] != "Novosibirsk":
+                return httpx.Response(200, json={})
+            return httpx.Response(200, json={"results": [{
+                "id": 1496747, "name": "Новосибирск",
+                "latitude": NOVOSIBIRSK[0], "longitude": NOVOSIBIRSK[1],
+            }]})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requests
+
+    @pytest.mark.asyncio
+    async def test_misspelling_without_api_call(self):
+        """Misspellings of a resolved city need no geocoding request"""
+        client, requests = self._client()
+        with patch("server.get_http_client", return_value=client):
+            await server.get_city_coordinates("Novosibirsk")
+            for name in ["Novosibrisk", "novosibirks", "Новосибирк", "Novosibisk"]:
+                assert await server.get_city_coordinates(name) == NOVOSIBIRSK
+
+        assert len(requests) == 1
+        assert server.fuzzy_index.stats()["corrected"] == 4
+
+    @pytest.mark.asyncio
+    async def test_short_and_distant_names_go_upstream(self):
+        """Short names and names too far from a known city are not corrected"""
+        client, requests = self._client()
+        with patch("server.get_http_client", return_value=client):
+            await server.get_city_coordinates("Novosibirsk")
+            assert await server.get_city_coordinates("Novgorod") is None
+            assert await server.get_city_coordinates("Nov") is None
+
+        assert len(requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """FUZZY_MAX_DISTANCE=0 disables the correction"""
+        client, requests = self._client()
+        with patch("server.get_http_client", return_value=client), \
+                patch("server.FUZZY_MAX_DISTANCE", 0):
+            await server.get_city_coordinates("Novosibirsk")
+            assert await server.get_city_coordinates("Novosibrisk") is None
+
+        assert len(requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_gazetteer_names(self, index_path):  # noqa: F811
+        """Gazetteer names are corrected without a network request"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            assert server.index_gazetteer(gazetteer) == len(gazetteer)
+            client, requests = self._client()
+            with patch.object(server, "gazetteer", gazetteer), \
+                    patch("server.get_http_client", return_value=client):
+                assert await server.get_city_coordinates("Kazzan") == (
+                    pytest.approx(55.78874), pytest.approx(49.12214)
+                )
+                assert await server.get_city_coordinates("Масква") == (
+                    pytest.approx(55.75222), pytest.approx(37.61556)
+                )
+        finally:
+            gazetteer.close()
+
+        assert requests == []
+
+    def test_gazetteer_by_population(self, index_path):  # noqa: F811
+        """A small index gets the names of the most populous cities"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            index = TrigramIndex(max_names=3)
+            assert server.index_gazetteer(gazetteer, index) == 3
+        finally:
+            gazetteer.close()
+
+        assert all(name in index for name in ["moscow", "москва", "moskva"])
+        assert "kazan" not in index
+
+    @pytest.mark.asyncio
+    async def test_resolved_names_beyond_size(self, index_path):  # noqa: F811
+        """Cities resolved after the gazetteer filled the index are still corrected"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            index = TrigramIndex(max_names=len(gazetteer))
+            with patch("server.fuzzy_index", index):
+                server.index_gazetteer(gazetteer)
+                client, requests = self._client()
+                with patch("server.get_http_client", return_value=client):
+                    await server.get_city_coordinates("Novosibirsk")
+                    assert await server.get_city_coordinates("Novosibrisk") == NOVOSIBIRSK
+        finally:
+            gazetteer.close()
+
+        assert len(requests) == 1
+        assert len(index) == len(gazetteer)
+
+    @pytest.mark.asyncio
+    async def test_load_in_background(self, index_path):  # noqa: F811
+        """The gazetteer is indexed off the event loop and merged with resolved names"""
+        server.fuzzy_index.add("novosibirsk", NOVOSIBIRSK)
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            await server.load_fuzzy_index(gazetteer)
+        finally:
+            gazetteer.close()
+
+        assert "novosibirsk" in server.fuzzy_index
+        assert "kazan" in server.fuzzy_index
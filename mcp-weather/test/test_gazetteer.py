@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the offline gazetteer index.
+"""
+
+import pytest
+import struct
+import sys
+import os
+from unittest.mock import patch, AsyncMock
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from gazetteer import Gazetteer, build_index, transliterate
+
+
+def geonames_row(geoname_id, name, alternate_names, latitude, longitude, population):
+    """One line of a GeoNames dump"""
+    columns = [""] * 19
+    columns[0] = str(geoname_id)
+    columns[1] = name
+    columns[2] = name
+    columns[3] = ",".join(alternate_names)
+    columns[4] = str(latitude)
+    columns[5] = str(longitude)
+    columns[14] = str(population)
+    return "\t".join(columns) + "\n"
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    """Small prebuilt gazetteer index"""
+    source = tmp_path / "cities.txt"
+    source.write_text(
+        geonames_row(524901, "Moscow", ["Москва", "Moskva"], 55.75222, 37.61556, 10381222)
+        + geonames_row(4601437, "Moscow", [], 46.73239, -117.00017, 25000)
+        + geonames_row(551487, "Kazan", ["Казань"], 55.78874, 49.12214, 1104738)
+        + geonames_row(2988507, "Paris", ["Париж", "https://en.wikipedia.org/wiki/Paris"], 48.85341, 2.3488, 2138551),
+        encoding="utf-8",
+    )
+    path = tmp_path / "gazetteer.bin"
+    build_index(str(source), str(path))
+    return str(path)
+
+
+class TestGazetteer:
+    """Gazetteer index tests"""
+
+    def test_lookup_by_name_and_alternate_name(self, index_path):
+        """Cities are found by name and alternate names in any case"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            for name in ["Moscow", "москва", "  MOSKVA "]:
+                entry = gazetteer.lookup(name)
+                assert entry is not None
+                assert entry.geoname_id == 524901
+                assert entry.name == "Moscow"
+                assert entry.latitude == pytest.approx(55.75222)
+
+            assert gazetteer.lookup("Atlantis") is None
+            assert gazetteer.stats()["misses"] == 1
+        finally:
+            gazetteer.close()
+
+    def test_lookup_by_transliteration(self, index_path):
+        """Names missing from the index are looked up transliterated"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            # Only "Kazan" and "Казань" are indexed
+            assert gazetteer.lookup("Kazań").geoname_id == 551487
+            assert gazetteer.lookup("КАЗАНЬ").geoname_id == 551487
+        finally:
+            gazetteer.close()
+
+    def test_transliterate(self):
+        """Cyrillic is transliterated and diacritics are dropped"""
+        assert transliterate(" Москва ") == "moskva"
+        assert transliterate("Нижний Новгород") == "nizhniy novgorod"
+        assert transliterate("São Paulo") == "sao paulo"
+        assert transliterate("東京") == ""
+
+    def test_most_populous_city_wins(self, index_path):
+        """Of two cities with the same name the larger one is indexed"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            assert gazetteer.lookup("Moscow").longitude == pytest.approx(37.61556)
+        finally:
+            gazetteer.close()
+
+    def test_population(self, index_path, tmp_path):
+        """Entries carry the population; indexes of the previous format still open"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            assert gazetteer.lookup("Kazan").population == 1104738
+        finally:
+            gazetteer.close()
+
+        key, name = b"kazan", b"Kazan"
+        path = tmp_path / "gazetteer_v1.bin"
+        path.write_bytes(
+            struct.pack("<4sI", b"GZT1", 1)
+            + struct.pack("<IHIHIdd", 0, len(key), len(key), len(name), 551487, 55.78874, 49.12214)
+            + key + name
+        )
+        gazetteer = Gazetteer.open(str(path))
+        try:
+            assert gazetteer.lookup("Kazan") == (551487, "Kazan", 55.78874, 49.12214, 0)
+        finally:
+            gazetteer.close()
+
+    def test_prefix(self, index_path):
+        """Prefix search returns names in sorted order"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            names = [entry.name for entry in gazetteer.prefix("ka")]
+            assert names == ["Kazan"]
+            assert [entry.name for entry in gazetteer.prefix("мос")] == ["Moscow"]
+        finally:
+            gazetteer.close()
+
+    def test_urls_are_skipped(self, index_path):
+        """Links in alternate names are not indexed"""
+        gazetteer = Gazetteer.open(index_path)
+        try:
+            assert not any(key.startswith("http") for key in gazetteer.keys())
+        finally:
+            gazetteer.close()
+
+    def test_invalid_file(self, tmp_path):
+        """A file without the magic header is rejected"""
+        path = tmp_path / "broken.bin"
+        path.write_bytes(b"not an index")
+        with pytest.raises(ValueError):
+            Gazetteer.open(str(path))
+
+    @pytest.mark.asyncio
+    async def test_city_coordinates_without_network(self, index_path):
+        """get_city_coordinates resolves indexed cities locally"""
+        client = AsyncMock()
+        with patch.object(server, "gazetteer", Gazetteer.open(index_path)), \
+             patch("server.get_http_client", return_value=client):
+            try:
+                assert await server.get_city_coordinates("Казань") == (
+                    pytest.approx(55.78874), pytest.approx(49.12214)
+                )
+            finally:
+                server.gazetteer.close()
+
+        client.get.assert_not_called()
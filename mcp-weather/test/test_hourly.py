@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the hourly forecast and its local aggregation.
+"""
+
+import calendar
+import json
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS
+
+import server
+from hourly import HourlyForecast, to_list
+
+# 2024-06-01 09:30 UTC, 12:30 in Kazan (UTC+3)
+NOW = calendar.timegm((2024, 6, 1, 9, 30, 0))
+
+
+def make_hourly(days=2, rain_hours=(13, 14, 15), utc_offset=10800):
+    """Open-Meteo response with hourly variables, rain in the given hours of day 1"""
+    hours = days * 24
+    return {
+        "utc_offset_seconds": utc_offset,
+        "hourly": {
+            "time": [
+                f"2024-06-{day + 1:02d}T{hour:02d}:00"
+                for day in range(days) for hour in range(24)
+            ],
+            "temperature_2m": [10 + (hour % 24) / 2 for hour in range(hours)],
+            "precipitation_probability": [
+                80 if hour in rain_hours else 10 for hour in range(hours)
+            ],
+            "precipitation": [1.5 if hour in rain_hours else 0.0 for hour in range(hours)],
+            "weather_code": [61 if hour in rain_hours else 1 for hour in range(hours)],
+            "wind_speed_10m": [3.0] * hours,
+            "is_day": [1 if 5 <= hour % 24 < 21 else 0 for hour in range(hours)],
+        },
+    }
+
+
+class TestHourlyForecast:
+    """Vectorized aggregation of HourlyForecast"""
+
+    def test_precipitation_windows(self):
+        """Consecutive wet hours form one window"""
+        forecast = HourlyForecast.from_open_meteo(
+            make_hourly(rain_hours=(13, 14, 15, 30, 47))
+        )
+
+        windows = forecast.precipitation_windows()
+
+        assert windows == [
+            {"start": "2024-06-01T13:00", "end": "2024-06-01T16:00",
+             "hours": 3, "probability": 80, "amount": 4.5},
+            {"start": "2024-06-02T06:00", "end": "2024-06-02T07:00",
+             "hours": 1, "probability": 80, "amount": 1.5},
+            {"start": "2024-06-02T23:00", "end": "2024-06-03T00:00",
+             "hours": 1, "probability": 80, "amount": 1.5},
+        ]
+
+    def test_dry_forecast(self):
+        """No windows without wet hours"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly(rain_hours=()))
+
+        assert forecast.precipitation_windows() == []
+
+    def test_daily_summary(self):
+        """Daily extremes and sums are computed per local day"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly())
+
+        assert forecast.daily_summary() == {
+            "date": ["2024-06-01", "2024-06-02"],
+            "max": [21.5, 21.5],
+            "min": [10.0, 10.0],
+            "precipitation": [4.5, 0.0],
+        }
+
+    def test_best_hours(self):
+        """Best hours are dry daylight hours closest to a comfortable temperature"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly())
+
+        best = forecast.best_hours(3)
+
+        # 20°C is reached at 20:00, which is the last daylight hour
+        assert best["start"] == "2024-06-01T18:00"
+        assert best["end"] == "2024-06-01T21:00"
+
+    def test_no_best_hours_at_night(self):
+        """Only night or wet hours give no best hours"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly())
+
+        assert forecast[21:29].best_hours(3) is None
+
+    def test_next_hours_use_local_time(self):
+        """The window starts at the current local hour"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly())
+
+        window = forecast.next_hours(6, now=NOW)
+
+        assert str(window.time[0]) == "2024-06-01T12"
+        assert len(window) == 6
+
+    def test_missing_values(self):
+        """Null values become NaN and None in JSON output"""
+        data = make_hourly()
+        data["hourly"]["precipitation_probability"][0] = None
+        forecast = HourlyForecast.from_open_meteo(data)
+
+        assert np.isnan(forecast.precipitation_probability[0])
+        assert to_list(forecast.precipitation_probability[:2]) == [None, 10]
+
+
+class TestHourlyTool:
+    """get_hourly_forecast tool"""
+
+    @pytest.mark.asyncio
+    async def test_single_fetch_serves_all_windows(self):
+        """Shorter windows of a cell are served from a cached longer fetch"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=make_hourly(days=8))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch("server.get_http_client", return_value=client):
+            week = await server.get_hourly(55.79, 49.12, 168, now=NOW)
+            day = await server.get_hourly(55.79, 49.12, 24, now=NOW)
+            await server.get_hourly(55.81, 49.11, 6, now=NOW)
+
+        assert len(requests) == 1
+        assert requests[0].url.params["forecast_days"] == "8"
+        assert "precipitation_probability" in requests[0].url.params["hourly"]
+        assert len(day) == 24
+        assert len(week) == 168
+
+    @pytest.mark.asyncio
+    async def test_text_answers_when_rain_stops(self):
+        """Text output tells when the current rain stops"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly()).next_hours(24, now=NOW + 3600)
+
+        with patch("server.get_city_coordinates", return_value=(55.79, 49.12)), \
+                patch("server.get_hourly", return_value=forecast):
+            result = await server.get_hourly_forecast("kazan")
+
+        assert "Kazan" in result
+        assert "Precipitation now, expected to stop at 2024-06-01 16:00" in result
+        assert "Best time outside: 2024-06-01 18:00–21:00" in result
+        assert "2024-06-01: 16…22°C" in result
+
+    @pytest.mark.asyncio
+    async def test_compact_output(self):
+        """Compact output holds hourly arrays and the summaries"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly()).next_hours(4, now=NOW)
+
+        with patch("server.get_city_coordinates", return_value=(55.79, 49.12)), \
+                patch("server.get_hourly", return_value=forecast):
+            result = json.loads(
+                await server.get_hourly_forecast("Kazan", hours=4, output_format="compact")
+            )
+
+        assert result["from"] == "2024-06-01T12:00"
+        assert result["hourly"]["pp"] == [10, 80, 80, 80]
+        assert result["hourly"]["c"] == [1, 61, 61, 61]
+        assert result["rain"] == [["2024-06-01T13:00", "2024-06-01T16:00", 80, 4.5]]
+        assert result["daily"]["d"] == ["2024-06-01"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_hours(self):
+        """The number of hours is validated"""
+        with pytest.raises(McpError) as error:
+            await server.get_hourly_forecast("Kazan", hours=0)
+
+        assert error.value.error.code == INVALID_PARAMS
+
+    @pytest.mark.asyncio
+    async def test_city_not_found(self):
+        """Unknown cities are reported as invalid parameters"""
+        with patch("server.get_city_coordinates", return_value=None):
+            with pytest.raises(McpError) as error:
+                await server.get_hourly_forecast("Atlantis")
+
+        assert error.value.error.code == INVALID_PARAMS
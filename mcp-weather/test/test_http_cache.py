@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the HTTP caching transport of the Open-Meteo client.
+"""
+
+import gzip
+import json
+import httpx
+import pytest
+import sys
+import os
+import time
+from email.utils import formatdate
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from cache import TTLCache
+from http_cache import CachingTransport, freshness_lifetime, parse_cache_control
+from test.test_cache import make_forecast
+
+URL = "https://api.open-meteo.com/v1/forecast"
+
+
+def make_client(handler):
+    """Client with a caching transport over a mock network, and its requests"""
+    requests = []
+
+    def network(request):
+        requests.append(request)
+        return handler(request)
+
+    transport = CachingTransport(httpx.MockTransport(network), TTLCache(maxsize=10, ttl=60))
+    return httpx.AsyncClient(transport=transport), transport, requests
+
+
+class TestFreshness:
+    """Cache header parsing"""
+
+    def test_cache_control(self):
+        """Directives are parsed case-insensitively"""
+        assert parse_cache_control('Public, Max-Age=900, no-transform') == {
+            "public": None, "max-age": "900", "no-transform": None
+        }
+
+    def test_lifetime(self):
+        """max-age wins over Expires, Age is subtracted, no-store is not stored"""
+        now = 1700000000.0
+        expires = formatdate(now + 600, usegmt=True)
+        date = formatdate(now, usegmt=True)
+
+        assert freshness_lifetime(httpx.Headers({"cache-control": "max-age=60", "age": "10"}), now) == 50
+        assert freshness_lifetime(httpx.Headers({"expires": expires, "date": date}), now) == 600
+        assert freshness_lifetime(httpx.Headers({"cache-control": "no-cache"}), now) == 0
+        assert freshness_lifetime(httpx.Headers({"cache-control": "no-store"}), now) is None
+        assert freshness_lifetime(httpx.Headers(), now) == 0
+
+
+class TestCachingTransport:
+    """Fresh hits, conditional requests and uncacheable responses"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_response_without_network(self):
+        """A fresh response is served from the cache for the same parameters only"""
+        client, transport, requests = make_client(
+            lambda request: httpx.Response(
+                200, json={"days": request.url.params["forecast_days"]},
+                headers={"cache-control": "max-age=900"},
+            )
+        )
+
+        first = await client.get(URL, params={"forecast_days": 7})
+        second = await client.get(URL, params={"forecast_days": 7})
+        other = await client.get(URL, params={"forecast_days": 1})
+
+        assert len(requests) == 2
+        assert second.json() == first.json() == {"days": "7"}
+        assert other.json() == {"days": "1"}
+        assert second.extensions["cache"] == "HIT"
+        assert transport.stats() == {"hits": 1, "revalidated": 0, "misses": 2}
+
+    @pytest.mark.asyncio
+    async def test_revalidation_with_etag(self):
+        """A stale response is revalidated and a 304 reuses the stored body"""
+        def handler(request):
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"', "cache-control": "max-age=0"})
+            return httpx.Response(
+                200, json={"temperature": -5.2},
+                headers={"etag": '"v1"', "cache-control": "max-age=0"},
+            )
+
+        client, transport, requests = make_client(handler)
+
+        await client.get(URL)
+        response = await client.get(URL)
+
+        assert len(requests) == 2
+        assert "if-none-match" not in requests[0].headers
+        assert requests[1].headers["if-none-match"] == '"v1"'
+        assert response.status_code == 200
+        assert response.json() == {"temperature": -5.2}
+        assert response.extensions["cache"] == "REVALIDATED"
+        assert transport.stats()["revalidated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expires_and_last_modified(self):
+        """Expires sets freshness; Last-Modified is sent once it is stale"""
+        modified = formatdate(1700000000, usegmt=True)
+        expires = formatdate(time.time() - 60, usegmt=True)
+
+        def handler(request):
+            if "if-modified-since" in request.headers:
+                return httpx.Response(304)
+            return httpx.Response(
+                200, text="ok", headers={"expires": expires, "last-modified": modified}
+            )
+
+        client, _, requests = make_client(handler)
+
+        await client.get(URL)
+        await client.get(URL)
+
+        # Expires in the past: stored for revalidation only
+        assert requests[1].headers["if-modified-since"] == modified
+
+    @pytest.mark.asyncio
+    async def test_uncacheable_responses(self):
+        """no-store responses, errors and responses without metadata go to the network"""
+        statuses = iter([200, 200, 500, 500])
+
+        def handler(request):
+            headers = {"cache-control": "no-store"} if request.url.path == "/store" else {}
+            return httpx.Response(next(statuses), text="x", headers=headers)
+
+        client, _, requests = make_client(handler)
+
+        await client.get("https://example.org/store")
+        await client.get("https://example.org/plain")
+        await client.get("https://example.org/error")
+        await client.get("https://example.org/error")
+
+        assert len(requests) == 4
+
+    @pytest.mark.asyncio
+    async def test_compressed_body(self):
+        """Encoded bodies are stored raw and decoded by the client on every hit"""
+        body = json.dumps({"ok": True}).encode()
+        client, _, requests = make_client(
+            lambda request: httpx.Response(
+                200, content=gzip.compress(body),
+                headers={"content-encoding": "gzip", "cache-control": "max-age=60"},
+            )
+        )
+
+        first = await client.get(URL)
+        second = await client.get(URL)
+
+        assert len(requests) == 1
+        assert first.json() == second.json() == {"ok": True}
+
+
+class TestServerClient:
+    """The Open-Meteo client of the server caches responses"""
+
+    def test_client_has_caching_transport(self):
+        """create_http_client puts the connection pool behind a CachingTransport"""
+        client = server.create_http_client()
+
+        assert isinstance(client._transport, CachingTransport)
+        assert client._transport.cache is server.http_response_cache
+
+    @pytest.mark.asyncio
+    async def test_repeated_forecast_request(self):
+        """Identical forecast requests after an application cache miss are near-free"""
+        requests = []
+
+        def network(request):
+            requests.append(request)
+            return httpx.Response(
+                200, json=make_forecast(1), headers={"cache-control": "max-age=900"}
+            )
+
+        client = httpx.AsyncClient(transport=CachingTransport(
+            httpx.MockTransport(network), server.http_response_cache,
+            counters=server.http_cache_counters,
+        ))
+        hits = server.http_cache_counters["hits"]
+        with patch("server.get_http_client", return_value=client):
+            await server.get_weather_data(55.75, 37.6, 1)
+            server.forecast_cache.clear()
+            await server.get_forecast(55.7558, 37.6176, 1)
+
+        assert len(requests) == 1
+        assert server.http_cache_counters["hits"] == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_hit_bypasses_upstream(self):
+        """A fresh hit takes no budget token, records no latency and ignores an open circuit"""
+        requests = []
+
+        def network(request):
+            requests.append(request)
+            return httpx.Response(200, json={"ok": True}, headers={"cache-control": "max-age=900"})
+
+        client = httpx.AsyncClient(transport=CachingTransport(
+            httpx.MockTransport(network), server.http_response_cache,
+            counters=server.http_cache_counters,
+        ))
+        upstream = server.forecast_upstream
+        with patch("server.get_http_client", return_value=client):
+            await upstream.get(URL, {"latitude": 1})
+            admitted = server.upstream_budget.stats()["admitted"]
+            samples = len(upstream.latency)
+            for _ in range(upstream.breaker.failure_threshold):
+                upstream.breaker.record_failure()
+
+            response = await upstream.get(URL, {"latitude": 1})
+
+        assert response.json() == {"ok": True}
+        assert response.extensions["cache"] == "HIT"
+        assert len(requests) == 1
+        assert server.upstream_budget.stats()["admitted"] == admitted
+        assert len(upstream.latency) == samples
+        assert upstream.stats()["cache_hits"] == 1
+        assert upstream.stats()["requests"] == 1
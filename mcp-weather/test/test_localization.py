@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for unit conversion and localization of the tool output.
+"""
+
+import json
+import httpx
+import pytest
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS
+
+import server
+from hourly import HourlyForecast
+from localization import (
+    Preferences, convert_pressure, convert_temperature, convert_wind_speed,
+    describe_weather, format_clock, format_date_time
+)
+from test.test_cache import make_forecast
+from test.test_hourly import NOW, make_hourly
+
+IMPERIAL_RU = Preferences(units="imperial", language="ru", time_format="12h")
+
+
+class TestConversions:
+    """Unit conversion and formatting helpers"""
+
+    def test_units(self):
+        """Metric values are returned as is, imperial ones converted"""
+        assert convert_temperature(-5.2, "metric") == -5.2
+        assert convert_temperature(100, "imperial") == 212
+        assert convert_wind_speed(10, "imperial") == pytest.approx(22.37, abs=0.01)
+        assert convert_pressure(1013.25, "imperial") == pytest.approx(29.92, abs=0.01)
+
+    def test_weather_codes(self):
+        """Descriptions exist in every language"""
+        assert describe_weather(3, "en") == "overcast"
+        assert describe_weather(3, "ru") == "пасмурно"
+        assert describe_weather(999, "ru") == "неизвестно (код 999)"
+
+    def test_clock(self):
+        """Time of day in 24- and 12-hour formats"""
+        afternoon = datetime(2024, 6, 1, 14, 5)
+
+        assert format_clock(afternoon, Preferences()) == "14:05"
+        assert format_clock(afternoon, IMPERIAL_RU) == "2:05 PM"
+        assert format_date_time("2024-06-01T09:00", IMPERIAL_RU) == "2024-06-01 9:00 AM"
+
+
+class TestRendering:
+    """Rendering of cached canonical forecasts"""
+
+    def test_parse_imperial_russian(self):
+        """parse_weather_data converts units and language"""
+        result = server.parse_weather_data(
+            "moscow", 55.7558, 37.6176, make_forecast(1), IMPERIAL_RU
+        )
+
+        assert result["current_weather"] == {
+            "temperature": 23,
+            "condition": "пасмурно",
+            "humidity": 78,
+            "wind_speed": 10,
+            "pressure": 29.92,
+        }
+        assert result["forecast"][0]["day_temp"] == 28
+        assert result["forecast"][0]["night_temp"] == 16
+        assert result["forecast"][0]["weekday"] == "понедельник"
+        assert result["current_time"] == "2024-01-15 12:00 PM UTC"
+
+    def test_text_labels(self):
+        """Text output uses the units and language of the call"""
+        weather_data = server.parse_weather_data(
+            "moscow", 55.7558, 37.6176, make_forecast(1), IMPERIAL_RU
+        )
+
+        text = server.format_today_weather(weather_data, IMPERIAL_RU)
+
+        assert "Погода сегодня в городе Moscow" in text
+        assert "23°F" in text
+        assert "10 миль/ч" in text
+        assert "Данные предоставлены Open-Meteo API" in text
+
+    def test_hourly_imperial(self):
+        """Hourly arrays are converted when rendered"""
+        forecast = HourlyForecast.from_open_meteo(make_hourly()).next_hours(4, now=NOW)
+        weather_data = server.parse_hourly_data("Kazan", 55.79, 49.12, forecast)
+
+        compact = server.compact_hourly(weather_data, Preferences(units="imperial"))
+
+        assert compact["u"] == "imperial"
+        assert compact["hourly"]["t"] == [61, 62, 63, 64]
+        assert compact["rain"][0][3] == 0.18
+        # The cached series itself stays metric
+        assert float(forecast.temperature[0]) == 16.0
+
+
+class TestSharedCache:
+    """Different preferences share one cached forecast"""
+
+    @pytest.mark.asyncio
+    async def test_one_fetch_for_all_preferences(self):
+        """Calls with different units, languages and clocks hit the same cache entry"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=make_forecast(1))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch("server.get_http_client", return_value=client), \
+                patch("server.get_city_coordinates", return_value=(55.7558, 37.6176)):
+            metric = await server.get_today_weather("Moscow")
+            imperial = await server.get_today_weather(
+                "Moscow", units="imperial", language="ru", time_format="12h"
+            )
+            compact = json.loads(await server.get_today_weather(
+                "Moscow", output_format="compact", units="imperial"
+            ))
+
+        assert len(requests) == 1
+        assert requests[0].url.params["wind_speed_unit"] == "ms"
+        assert "-5°C" in metric
+        assert "23°F" in imperial
+        assert compact["u"] == "imperial"
+        assert compact["now"]["t"] == 23
+        assert len(server.forecast_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_city_not_found_language(self):
+        """The error for an unknown city follows the language of the call"""
+        with patch("server.get_city_coordinates", return_value=None):
+            with pytest.raises(McpError) as english:
+                await server.get_today_weather("Atlantis")
+            with pytest.raises(McpError) as russian:
+                await server.get_today_weather("Atlantis", language="ru")
+
+        assert english.value.error.message == "City 'Atlantis' not found"
+        assert russian.value.error.message == "Город 'Atlantis' не найден"
+
+    @pytest.mark.asyncio
+    async def test_unknown_preferences(self):
+        """Unknown units or languages are invalid parameters"""
+        for arguments in ({"units": "kelvin"}, {"language": "de"}, {"time_format": "36h"}):
+            with pytest.raises(McpError) as error:
+                await server.get_today_weather("Moscow", **arguments)
+
+            assert error.value.error.code == INVALID_PARAMS
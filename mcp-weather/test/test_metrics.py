@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the Prometheus metrics of the MCP weather server.
+"""
+
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS
+
+import metrics
+import server
+from test.test_cache import make_forecast
+
+
+def sample(name, **labels):
+    """Current value of a metric sample, 0.0 if it was not recorded yet"""
+    value = metrics.REGISTRY.get_sample_value(name, labels)
+    return value if value is not None else 0.0
+
+
+class TestToolMetrics:
+    """Per-tool counters and histograms"""
+
+    @pytest.mark.asyncio
+    async def test_successful_call(self):
+        """Successful calls are counted and timed"""
+        calls = sample("mcp_weather_tool_calls_total", tool="get_today_weather", outcome="ok")
+        timed = sample("mcp_weather_tool_duration_seconds_count", tool="get_today_weather")
+
+        with patch("server.get_city_coordinates", return_value=(55.7558, 37.6176)), \
+                patch("server.get_weather_data", return_value=make_forecast(1)):
+            await server.get_today_weather("Moscow")
+
+        assert sample(
+            "mcp_weather_tool_calls_total", tool="get_today_weather", outcome="ok"
+        ) == calls + 1
+        assert sample(
+            "mcp_weather_tool_duration_seconds_count", tool="get_today_weather"
+        ) == timed + 1
+
+    @pytest.mark.asyncio
+    async def test_errors_by_code(self):
+        """Failed calls are counted by ErrorData code"""
+        errors = sample(
+            "mcp_weather_tool_errors_total", tool="get_weekly_forecast", code=str(INVALID_PARAMS)
+        )
+
+        with patch("server.get_city_coordinates", return_value=None):
+            with pytest.raises(McpError):
+                await server.get_weekly_forecast("Atlantis")
+
+        assert sample(
+            "mcp_weather_tool_errors_total", tool="get_weekly_forecast", code=str(INVALID_PARAMS)
+        ) == errors + 1
+
+    @pytest.mark.asyncio
+    async def test_tool_schema_unchanged(self):
+        """Instrumented tools keep their parameters"""
+        tools = {tool.name: tool for tool in await server.mcp.list_tools()}
+
+        assert set(tools["get_today_weather"].inputSchema["properties"]) == {
+            "city", "output_format", "units", "language", "time_format"
+        }
+
+
+class TestMetricsEndpoint:
+    """/metrics route"""
+
+    @pytest.mark.asyncio
+    async def test_scrape(self):
+        """Cache, upstream and session metrics are exported"""
+        with patch("server.get_weather_data", return_value=make_forecast(1)):
+            await server.get_forecast(55.7558, 37.6176, 1)
+            await server.get_forecast(55.7558, 37.6176, 1)
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'mcp_weather_cache_hit_ratio{cache="forecast"} 0.5' in response.text
+        assert 'mcp_weather_upstream_circuit_open{api="geocoding"} 0.0' in response.text
+        assert "mcp_weather_sse_sessions 0.0" in response.text
+
+    @pytest.mark.asyncio
+    async def test_upstream_latency(self):
+        """Upstream requests are timed per API and outcome"""
+        before = sample(
+            "mcp_weather_upstream_duration_seconds_count", api="forecast", outcome="error"
+        )
+
+        def fail(request):
+            return httpx.Response(503)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(fail))
+        with patch("server.get_http_client", return_value=client):
+            with pytest.raises(httpx.HTTPStatusError):
+                await server.get_weather_data(55.75, 37.6, 1)
+
+        assert sample(
+            "mcp_weather_upstream_duration_seconds_count", api="forecast", outcome="error"
+        ) == before + 1
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the composite outdoor conditions tool.
+"""
+
+import asyncio
+import json
+import time
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from forecast import ForecastRecord
+from hourly import HourlyForecast
+from outdoor import AirQuality, Astronomy
+from test.test_cache import make_forecast
+from test.test_hourly import NOW, make_hourly
+
+MOSCOW = (55.7558, 37.6176)
+
+
+def make_air_quality(european_aqi=35):
+    """Air Quality API response with current variables"""
+    return {
+        "current": {
+            "time": "2024-06-01T12:00",
+            "interval": 3600,
+            "european_aqi": european_aqi,
+            "us_aqi": 52,
+            "pm2_5": 10.4,
+            "pm10": 15.2,
+            "ozone": 61.0,
+            "nitrogen_dioxide": 20.3,
+        }
+    }
+
+
+def make_astronomy():
+    """Forecast API response with daily astronomy variables"""
+    return {
+        "daily": {
+            "time": ["2024-06-01"],
+            "sunrise": ["2024-06-01T03:49"],
+            "sunset": ["2024-06-01T21:01"],
+            "daylight_duration": [61920.0],
+            "uv_index_max": [6.35],
+        }
+    }
+
+
+def open_meteo(requests, delay=0.0, air_quality_status=200):
+    """Mock Open-Meteo answering forecast, hourly, astronomy and air quality requests"""
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(delay)
+        params = request.url.params
+        if request.url.host.startswith("air-quality"):
+            if air_quality_status != 200:
+                return httpx.Response(air_quality_status)
+            return httpx.Response(200, json=make_air_quality())
+        if "hourly" in params:
+            return httpx.Response(200, json=make_hourly(days=2))
+        if "sunrise" in params.get("daily", ""):
+            return httpx.Response(200, json=make_astronomy())
+        return httpx.Response(200, json=make_forecast(1))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def outdoor_data(air_quality=True, astronomy=True):
+    """Result of get_outdoor_data with an hourly window starting at NOW"""
+    return (
+        ForecastRecord.from_open_meteo(make_forecast(1)),
+        HourlyForecast.from_open_meteo(make_hourly()).next_hours(12, now=NOW),
+        AirQuality.from_open_meteo(make_air_quality()) if air_quality else None,
+        Astronomy.from_open_meteo(make_astronomy()) if astronomy else None,
+    )
+
+
+class TestDatasets:
+    """Parsing of air quality and astronomy responses"""
+
+    def test_air_quality(self):
+        """Current values are kept and the European AQI is banded"""
+        air_quality = AirQuality.from_open_meteo(make_air_quality())
+
+        assert air_quality.pm2_5 == 10.4
+        assert air_quality.level == "fair"
+        assert AirQuality.from_open_meteo(make_air_quality(15)).level == "good"
+        assert AirQuality.from_open_meteo(make_air_quality(140)).level == "extremely_poor"
+        assert AirQuality.from_open_meteo(make_air_quality(None)).level is None
+
+    def test_astronomy(self):
+        """Today's sun times are taken from the daily series"""
+        astronomy = Astronomy.from_open_meteo(make_astronomy())
+
+        assert astronomy.sunrise == "2024-06-01T03:49"
+        assert astronomy.daylight == 61920.0
+        assert astronomy.uv_index_max == 6.35
+
+
+class TestConcurrentFetch:
+    """get_outdoor_data fetches the datasets concurrently through the caches"""
+
+    @pytest.mark.asyncio
+    async def test_datasets_are_fetched_concurrently(self):
+        """Four upstream requests take about as long as one"""
+        requests = []
+        client = open_meteo(requests, delay=0.2)
+        with patch("server.get_http_client", return_value=client):
+            start = time.perf_counter()
+            forecast, hourly, air_quality, astronomy = await server.get_outdoor_data(*MOSCOW)
+            elapsed = time.perf_counter() - start
+
+        assert len(requests) == 4
+        assert elapsed < 0.6
+        assert forecast.temperature == -5.2
+        assert air_quality.european_aqi == 35
+        assert astronomy.sunset == "2024-06-01T21:01"
+
+    @pytest.mark.asyncio
+    async def test_cached_datasets(self):
+        """A repeated call for the same grid cell needs no upstream request"""
+        requests = []
+        client = open_meteo(requests)
+        with patch("server.get_http_client", return_value=client):
+            await server.get_outdoor_data(*MOSCOW)
+            await server.get_outdoor_data(55.76, 37.62)
+
+        assert len(requests) == 4
+
+    @pytest.mark.asyncio
+    async def test_air_quality_failure_is_tolerated(self):
+        """A failed supplementary dataset is returned as None"""
+        requests = []
+        client = open_meteo(requests, air_quality_status=500)
+        with patch("server.get_http_client", return_value=client):
+            forecast, _, air_quality, astronomy = await server.get_outdoor_data(*MOSCOW)
+
+        assert air_quality is None
+        assert astronomy is not None
+        assert forecast.temperature == -5.2
+
+
+class TestOutdoorTool:
+    """get_outdoor_conditions tool"""
+
+    @pytest.mark.asyncio
+    async def test_text_output(self):
+        """Text output merges weather, rain windows, air quality and sun times"""
+        with patch("server.get_city_coordinates", return_value=MOSCOW), \
+                patch("server.get_outdoor_data", return_value=outdoor_data()):
+            result = await server.get_outdoor_conditions("moscow")
+
+        assert "Outdoor conditions in the city Moscow" in result
+        assert "Now: -5°C, overcast" in result
+        assert "Precipitation 2024-06-01 13:00–16:00" in result
+        assert "Air quality: fair (European AQI 35, PM2.5 10 μg/m³, PM10 15 μg/m³)" in result
+        assert "Sunrise: 03:49, 🌇 sunset: 21:01, daylight: 17 h 12 min, UV index up to 6.3" in result
+
+    @pytest.mark.asyncio
+    async def test_unavailable_datasets(self):
+        """Missing supplementary datasets are marked, in the requested language"""
+        with patch("server.get_city_coordinates", return_value=MOSCOW), \
+                patch("server.get_outdoor_data",
+                      return_value=outdoor_data(air_quality=False, astronomy=False)):
+            result = await server.get_outdoor_conditions("Москва", language="ru")
+
+        assert "Качество воздуха: нет данных" in result
+        assert "Солнце: нет данных" in result
+
+    @pytest.mark.asyncio
+    async def test_compact_output(self):
+        """Compact output holds all datasets with short keys"""
+        with patch("server.get_city_coordinates", return_value=MOSCOW), \
+                patch("server.get_outdoor_data", return_value=outdoor_data(astronomy=False)):
+            result = json.loads(
+                await server.get_outdoor_conditions("Moscow", output_format="compact")
+            )
+
+        assert result["now"]["t"] == -5
+        assert result["rain"] == [["2024-06-01T13:00", "2024-06-01T16:00", 80, 4.5]]
+        assert result["aq"]["lvl"] == "fair"
+        assert result["aq"]["pm25"] == 10.4
+        assert result["sun"] is None
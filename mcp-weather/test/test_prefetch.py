@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the hot-city prefetch scheduler.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import patch, AsyncMock
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from prefetch import PrefetchScheduler
+from test.test_cache import make_forecast
+
+MOSCOW = (55.75, 37.6, 1)
+KAZAN = (55.8, 49.1, 1)
+LONDON = (51.5, -0.1, 7)
+
+
+class TestPrefetchScheduler:
+    """PrefetchScheduler tests"""
+
+    def test_top_orders_by_request_count(self):
+        """The most requested locations come first, limited to top_n"""
+        scheduler = PrefetchScheduler(AsyncMock(), interval=900, top_n=2)
+        for location, count in [(MOSCOW, 3), (KAZAN, 1), (LONDON, 2)]:
+            for _ in range(count):
+                scheduler.record(location)
+
+        assert scheduler.top() == [MOSCOW, LONDON]
+
+    def test_top_merges_horizons_of_a_cell(self):
+        """A cell is refreshed once, with its largest requested horizon"""
+        scheduler = PrefetchScheduler(AsyncMock(), interval=900, top_n=2)
+        scheduler.record(MOSCOW)
+        scheduler.record(MOSCOW)
+        scheduler.record((*MOSCOW[:2], 7))
+        scheduler.record(LONDON)
+        scheduler.record(LONDON)
+
+        assert scheduler.top() == [(*MOSCOW[:2], 7), LONDON]
+
+    def test_next_run_delay_before_boundary(self):
+        """Cycles start lead_time seconds before each expiry boundary"""
+        scheduler = PrefetchScheduler(AsyncMock(), interval=900, lead_time=60)
+
+        assert scheduler.next_run_delay(now=9000) == 840
+        assert scheduler.next_run_delay(now=9000 + 800) == 40
+        # Already inside the lead window: wait for the next boundary
+        assert scheduler.next_run_delay(now=9000 + 870) == 870
+
+    @pytest.mark.asyncio
+    async def test_run_once_refreshes_top_locations(self):
+        """Each cycle refreshes the top locations and decays counts"""
+        refresh = AsyncMock(side_effect=lambda *location: [f"{location}"])
+        scheduler = PrefetchScheduler(refresh, interval=900, top_n=2, rate=0)
+        for _ in range(4):
+            scheduler.record(MOSCOW)
+        scheduler.record(KAZAN)
+        scheduler.record(KAZAN)
+        scheduler.record(LONDON)
+
+        assert await scheduler.run_once() == 2
+
+        assert [call.args for call in refresh.await_args_list] == [MOSCOW, KAZAN]
+        assert scheduler.top() == [MOSCOW, KAZAN]
+        assert scheduler.stats()["tracked"] == 2
+        assert scheduler.stats()["refreshed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """No more than `concurrency` refreshes run at the same time"""
+        running = 0
+        peak = 0
+
+        async def refresh(*location):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return [location]
+
+        scheduler = PrefetchScheduler(
+            refresh, interval=900, top_n=10, concurrency=2, rate=0
+        )
+        for index in range(6):
+            scheduler.record((float(index), 0.0, 1))
+
+        assert await scheduler.run_once() == 6
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self):
+        """A failed refresh does not stop the cycle"""
+        refresh = AsyncMock(side_effect=[RuntimeError("boom"), ["kazan"]])
+        scheduler = PrefetchScheduler(refresh, interval=900, rate=0)
+        scheduler.record(MOSCOW)
+        scheduler.record(MOSCOW)
+        scheduler.record(KAZAN)
+
+        assert await scheduler.run_once() == 1
+        assert scheduler.stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_prefetch_hits(self):
+        """Requests served by prefetched entries are counted as hits"""
+        scheduler = PrefetchScheduler(
+            AsyncMock(return_value=["moscow"]), interval=900, rate=0
+        )
+        scheduler.record(MOSCOW)
+        await scheduler.run_once()
+
+        scheduler.record(MOSCOW, "moscow", hit=True)
+        scheduler.record(MOSCOW, "moscow", hit=False)
+        scheduler.record(KAZAN, "kazan", hit=True)
+
+        stats = scheduler.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_start_stop(self):
+        """The background task is started and cancelled"""
+        scheduler = PrefetchScheduler(AsyncMock(), interval=900)
+        scheduler.start()
+        assert scheduler.stats()["running"]
+
+        await scheduler.stop()
+        assert not scheduler.stats()["running"]
+
+
+class TestServerPrefetch:
+    """Prefetching integrated with the forecast cache"""
+
+    @pytest.mark.asyncio
+    async def test_prefetched_forecast_outlives_boundary(self):
+        """A forecast prefetched before the boundary is kept past it"""
+        interval = server.FORECAST_REFRESH_SECONDS
+        now = 10 * interval - server.PREFETCH_LEAD_SECONDS / 2
+        with patch("server.get_weather_data", return_value=make_forecast(1)), \
+                patch("server.time.time", return_value=now), \
+                patch.object(server.forecast_cache, "set") as cache_set:
+            cache_keys = await server.prefetch_forecast(55.75, 37.6, 1)
+
+        assert cache_keys == [server.forecast_cache_key(55.75, 37.6, 1)]
+        ttl = cache_set.call_args.kwargs["ttl"]
+        assert ttl == pytest.approx(interval + server.PREFETCH_LEAD_SECONDS / 2)
+
+    @pytest.mark.asyncio
+    async def test_requests_are_recorded(self):
+        """get_forecast records requests and prefetch hits"""
+        scheduler = PrefetchScheduler(server.prefetch_forecast, interval=900, rate=0)
+        with patch("server.prefetcher", scheduler), \
+                patch("server.get_weather_data", return_value=make_forecast(1)) as fetch:
+            await server.get_forecast(55.7558, 37.6176, 1)
+            server.forecast_cache.clear()
+            await scheduler.run_once()
+            await server.get_forecast(55.7558, 37.6176, 1)
+
+        assert fetch.await_count == 2
+        assert scheduler.stats()["hits"] == 1
+        assert scheduler.stats()["refreshed"] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_one_request_per_cell(self):
+        """The largest horizon is fetched once and cached for the shorter ones"""
+        with patch("server.get_weather_data", return_value=make_forecast(16)) as fetch:
+            cache_keys = await server.prefetch_forecast(55.75, 37.6, 16)
+
+        assert fetch.await_count == 1
+        assert cache_keys == [
+            server.forecast_cache_key(55.75, 37.6, horizon) for horizon in (16, 1, 7)
+        ]
+        for horizon in server.FORECAST_HORIZONS:
+            record = server.forecast_cache.get(server.forecast_cache_key(55.75, 37.6, horizon))
+            assert len(record) == horizon
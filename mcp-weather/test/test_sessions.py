@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the SSE session limits.
+"""
+
+import anyio
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from sessions import SessionManager
+
+
+def transport_streams():
+    """Transport-side streams of a session and the client's ends of them"""
+    client_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, client_reader = anyio.create_memory_object_stream(0)
+    return read_stream, write_stream, client_writer, client_reader
+
+
+async def echo(inbound, outbound):
+    """Server loop answering every message with itself"""
+    async with outbound:
+        async for message in inbound:
+            await outbound.send(message)
+
+
+class TestAdmission:
+    """Session limit and idle sweep"""
+
+    @pytest.mark.asyncio
+    async def test_limit(self):
+        """Connections beyond max_sessions are refused until a slot is released"""
+        manager = SessionManager(max_sessions=2, idle_timeout=0)
+
+        first = manager.open()
+        assert manager.open() is not None
+        assert manager.open() is None
+
+        manager.close(first)
+        assert manager.open() is not None
+        assert manager.stats()["rejected"] == 1
+        assert manager.stats()["active"] == 2
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_make_room(self):
+        """At the limit, idle sessions are evicted before refusing"""
+        manager = SessionManager(max_sessions=1, idle_timeout=60)
+        idle = manager.open()
+        idle.last_active -= 120
+
+        assert manager.open() is not None
+        assert idle.evicted == "idle"
+        assert idle.scope.cancel_called
+        assert manager.stats()["evicted"] == {"idle": 1, "stalled": 0}
+
+    @pytest.mark.asyncio
+    async def test_sweep_keeps_active_sessions(self):
+        """Only sessions without recent traffic are swept"""
+        manager = SessionManager(idle_timeout=60)
+        active, idle = manager.open(), manager.open()
+        idle.last_active -= 61
+
+        assert manager.sweep() == 1
+        assert list(manager.sessions.values()) == [active]
+
+
+class TestRelay:
+    """Message relay between the transport and the server loop"""
+
+    @pytest.mark.asyncio
+    async def test_messages_are_relayed(self):
+        """Messages pass both ways and count as activity"""
+        manager = SessionManager()
+        session = manager.open()
+        session.last_active -= 100
+        read_stream, write_stream, client_writer, client_reader = transport_streams()
+
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(manager.relay, session, read_stream, write_stream, echo)
+            await client_writer.send("ping")
+            assert await client_reader.receive() == "ping"
+            await client_writer.aclose()
+            # The relay closes the write stream when the server loop ends
+            with pytest.raises(anyio.EndOfStream):
+                await client_reader.receive()
+
+        assert session.evicted is None
+        assert manager.stats()["evicted"] == {"idle": 0, "stalled": 0}
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_is_evicted(self):
+        """A client that stops reading fills the queue and is evicted"""
+        manager = SessionManager(queue_size=2, send_timeout=0.05)
+        session = manager.open()
+        read_stream, write_stream, client_writer, client_reader = transport_streams()
+        sent = []
+
+        async def flood(inbound, outbound):
+            for number in range(100):
+                await outbound.send(number)
+                sent.append(number)
+
+        with anyio.fail_after(2):
+            with session.scope:
+                await manager.relay(session, read_stream, write_stream, flood)
+
+        # Backpressure: the server loop waited instead of queueing everything
+        assert len(sent) < 5
+        assert session.evicted == "stalled"
+        assert manager.stats()["evicted"]["stalled"] == 1
+        assert session.id not in manager.sessions
+
+    @pytest.mark.asyncio
+    async def test_idle_eviction_cancels_session(self):
+        """Sweeping an idle session stops its server loop"""
+        manager = SessionManager(idle_timeout=60)
+        session = manager.open()
+        read_stream, write_stream, client_writer, client_reader = transport_streams()
+        finished = anyio.Event()
+
+        async def run_session():
+            with session.scope:
+                await manager.relay(session, read_stream, write_stream, echo)
+            finished.set()
+
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(run_session)
+            await anyio.sleep(0)
+            session.last_active -= 61
+            manager.sweep()
+            with anyio.fail_after(1):
+                await finished.wait()
+
+        assert session.evicted == "idle"
+
+
+class TestSSEEndpoint:
+    """The /sse endpoint honours the session limit"""
+
+    @pytest.mark.asyncio
+    async def test_refused_at_limit(self):
+        """A full server answers 503 without opening a session"""
+        manager = SessionManager(max_sessions=1, idle_timeout=0)
+        manager.open()
+        transport = httpx.ASGITransport(app=server.app)
+        with patch.object(server, "sse_sessions", manager):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                response = await http.get("/sse")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+        assert manager.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stats_and_metrics(self):
+        """Session counters are exported in /stats and /metrics"""
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            stats = (await http.get("/stats")).json()
+            metrics = (await http.get("/metrics")).text
+
+        assert stats["sse_sessions"]["max_sessions"] == server.SSE_MAX_SESSIONS
+        assert 'mcp_weather_sse_evicted_total{reason="stalled"}' in metrics
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the HTTP transports of the MCP weather server.
+"""
+
+import asyncio
+import contextlib
+import json
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import server
+
+MCP_HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+
+def rpc(method, params=None, request_id=1):
+    """JSON-RPC request body"""
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+
+
+def read_rpc_result(response):
+    """Extracts the JSON-RPC message from a JSON or SSE response"""
+    if response.headers["content-type"].startswith("application/json"):
+        return response.json()
+    for line in response.text.splitlines():
+        if line.startswith("data: "):
+            return json.loads(line[len("data: "):])
+    raise AssertionError(f"No JSON-RPC message in {response.text!r}")
+
+
+@contextlib.asynccontextmanager
+async def running_app():
+    """HTTP client for the app with its lifespan running"""
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+
+class TestStreamableHTTP:
+    """Stateless Streamable HTTP transport tests"""
+
+    @pytest.mark.asyncio
+    async def test_list_tools_without_session(self):
+        """Requests are served without initialization or a session id"""
+        async with running_app() as client:
+            response = await client.post("/mcp", headers=MCP_HEADERS, json=rpc("tools/list"))
+
+        assert response.status_code == 200
+        assert "mcp-session-id" not in response.headers
+        tools = {tool["name"] for tool in read_rpc_result(response)["result"]["tools"]}
+        assert {"get_today_weather", "get_weekly_forecast"} <= tools
+
+    @pytest.mark.asyncio
+    async def test_call_tool(self):
+        """Tools can be called with independent requests"""
+        weather_data = server.parse_weather_data("Moscow", 55.7558, 37.6176, {
+            "current": {
+                "time": "2024-01-15T12:00:00Z",
+                "temperature_2m": -5.2,
+                "relative_humidity_2m": 78,
+                "weather_code": 3,
+                "wind_speed_10m": 4.5,
+                "surface_pressure": 1013.2
+            },
+            "daily": {
+                "time": ["2024-01-15"],
+                "weather_code": [3],
+                "temperature_2m_max": [-2.1],
+                "temperature_2m_min": [-8.7],
+                "precipitation_probability_max": [20],
+                "wind_speed_10m_max": [6.8]
+            }
+        })
+        with patch("server.get_real_weather_data", return_value=weather_data):
+            async with running_app() as client:
+                responses = [
+                    await client.post(
+                        "/mcp",
+                        headers=MCP_HEADERS,
+                        json=rpc("tools/call", {
+                            "name": "get_today_weather",
+                            "arguments": {"city": "Moscow", "output_format": "compact"},
+                        }, request_id),
+                    )
+                    for request_id in (1, 2)
+                ]
+
+        for response in responses:
+            result = read_rpc_result(response)["result"]
+            assert not result["isError"]
+            assert json.loads(result["content"][0]["text"])["city"] == "Moscow"
+
+    @pytest.mark.asyncio
+    async def test_not_running(self):
+        """Outside of the lifespan the endpoint answers 503"""
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await http.post("/mcp", headers=MCP_HEADERS, json=rpc("tools/list"))
+
+        assert response.status_code == 503
+
+
+class TestHealth:
+    """Health and readiness endpoints"""
+
+    @pytest.mark.asyncio
+    async def test_healthz(self):
+        """Liveness answers without the lifespan, a session or a task"""
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            tasks = len(asyncio.all_tasks())
+            response = await http.get("/healthz")
+
+            assert len(asyncio.all_tasks()) == tasks
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_readyz(self):
+        """Readiness follows the lifespan and reports circuit states"""
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            not_ready = await http.get("/readyz")
+        async with running_app() as client:
+            ready = await client.get("/readyz")
+
+        assert not_ready.status_code == 503
+        assert not_ready.json()["checks"]["lifespan"] is False
+        assert ready.status_code == 200
+        assert ready.json()["ready"] is True
+        assert ready.json()["circuits"] == {
+            "geocoding": "closed", "forecast": "closed", "air_quality": "closed"
+        }
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_keeps_ready(self):
+        """An open circuit is reported, cached data is still served"""
+        async with running_app() as client:
+            with patch.object(server.forecast_upstream.breaker, "state", "open"):
+                response = await client.get("/readyz")
+
+        assert response.status_code == 200
+        assert response.json()["circuits"]["forecast"] == "open"
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Pytest tests for the upstream circuit breaker and hedged requests.
+
+Requests go to a local fake upstream (an httpx mock transport) with
+scripted latencies and failures.
+"""
+
+import asyncio
+import httpx
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent folder to the path for importing server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from admission import UpstreamBudget
+from upstream import CircuitBreaker, CircuitOpenError, LatencyWindow, Upstream
+
+URL = "https://api.open-meteo.com/v1/forecast"
+
+
+class FakeUpstream:
+    """Fake Open-Meteo answering with scripted (delay, status) pairs"""
+
+    def __init__(self, script, default=(0.0, 200)):
+        self.script = list(script)
+        self.default = default
+        self.requests = 0
+
+    async def handler(self, request):
+        self.requests += 1
+        delay, status = self.script.pop(0) if self.script else self.default
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"request": self.requests})
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+def make_upstream(fake, **kwargs):
+    """Upstream sending requests to the fake"""
+    client = fake.client()
+    return Upstream("forecast", lambda: client, **kwargs)
+
+
+class TestCircuitBreaker:
+    """CircuitBreaker state machine tests"""
+
+    def test_opens_after_consecutive_failures(self):
+        """The circuit opens after failure_threshold failures in a row"""
+        breaker = CircuitBreaker("forecast", failure_threshold=3, reset_timeout=30)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        breaker.before_call()
+        breaker.record_success()
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_half_open_trial(self):
+        """After reset_timeout one trial call decides the state"""
+        breaker = CircuitBreaker("forecast", failure_threshold=1, reset_timeout=30)
+        with patch("upstream.time.monotonic", return_value=100.0):
+            breaker.before_call()
+            breaker.record_failure()
+        with patch("upstream.time.monotonic", return_value=131.0):
+            breaker.before_call()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            # Only one trial at a time
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+            breaker.record_failure()
+            assert breaker.state == CircuitBreaker.OPEN
+        with patch("upstream.time.monotonic", return_value=162.0):
+            breaker.before_call()
+            breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_latency_quantile(self):
+        """Quantiles are taken over the recent window"""
+        window = LatencyWindow(size=100)
+        assert window.quantile(0.95) is None
+        for ms in range(1, 101):
+            window.add(ms / 1000)
+        assert window.quantile(0.5) == pytest.approx(0.051)
+        assert window.quantile(0.95) == pytest.approx(0.096)
+
+
+class TestUpstream:
+    """Upstream requests against a fake Open-Meteo"""
+
+    @pytest.mark.asyncio
+    async def test_fails_fast_while_open(self):
+        """Once open, calls are rejected without reaching the upstream"""
+        fake = FakeUpstream([], default=(0.0, 503))
+        upstream = make_upstream(fake, failure_threshold=2, reset_timeout=30)
+
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await upstream.get(URL)
+        with pytest.raises(CircuitOpenError):
+            await upstream.get(URL)
+
+        assert fake.requests == 2
+        assert upstream.stats()["state"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_open(self):
+        """4xx responses do not count as upstream failures"""
+        fake = FakeUpstream([], default=(0.0, 400))
+        upstream = make_upstream(fake, failure_threshold=1)
+
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await upstream.get(URL)
+
+        assert upstream.stats()["state"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_timeouts_open_the_circuit(self):
+        """Timeouts count as failures"""
+        async def timeout_handler(request):
+            raise httpx.ReadTimeout("slow", request=request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(timeout_handler))
+        upstream = Upstream("forecast", lambda: client, failure_threshold=1)
+
+        with pytest.raises(httpx.ReadTimeout):
+            await upstream.get(URL)
+        with pytest.raises(CircuitOpenError):
+            await upstream.get(URL)
+
+    @pytest.mark.asyncio
+    async def test_hedged_request_wins(self):
+        """A request slower than p95 is repeated and the faster answer is used"""
+        fake = FakeUpstream([(0.0, 200)] * 20 + [(1.0, 200), (0.0, 200)])
+        upstream = make_upstream(
+            fake, hedging=True, hedge_min_delay=0.01, hedge_min_samples=20
+        )
+        for _ in range(20):
+            await upstream.get(URL)
+
+        started = asyncio.get_running_loop().time()
+        response = await upstream.get(URL)
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert response.json() == {"request": 22}
+        assert elapsed < 0.5
+        assert upstream.stats()["hedged"] == 1
+        assert upstream.stats()["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedging_without_samples(self):
+        """Hedging waits for enough latency samples"""
+        fake = FakeUpstream([(0.05, 200)])
+        upstream = make_upstream(fake, hedging=True, hedge_min_samples=20)
+
+        await upstream.get(URL)
+
+        assert fake.requests == 1
+        assert upstream.stats()["hedged"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_survives_failed_request(self):
+        """A failed request does not fail the call while its hedge succeeds"""
+        fake = FakeUpstream([(0.0, 200)] * 20 + [(0.1, 503), (0.2, 200)])
+        upstream = make_upstream(
+            fake, hedging=True, hedge_min_delay=0.01, hedge_min_samples=20
+        )
+        for _ in range(20):
+            await upstream.get(URL)
+
+        response = await upstream.get(URL)
+
+        assert response.json() == {"request": 22}
+        assert upstream.stats()["failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_needs_budget_token(self):
+        """No hedge is sent when the budget has no token to spare"""
+        fake = FakeUpstream([(0.0, 200)] * 20 + [(0.2, 200)])
+        budget = UpstreamBudget(rate=0.001, burst=21)
+        upstream = make_upstream(
+            fake, hedging=True, hedge_min_delay=0.01, hedge_min_samples=20, budget=budget
+        )
+        for _ in range(20):
+            await upstream.get(URL)
+
+        response = await upstream.get(URL)
+
+        assert response.json() == {"request": 21}
+        assert fake.requests == 21
+        assert upstream.stats()["hedged"] == 0
+        assert upstream.stats()["hedges_skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_before_hedge(self):
+        """Cancelling the caller while it waits for the hedge delay cancels the request"""
+        fake = FakeUpstream([(0.0, 200)] * 20 + [(5.0, 200)])
+        upstream = make_upstream(
+            fake, hedging=True, hedge_min_delay=1.0, hedge_min_samples=20
+        )
+        for _ in range(20):
+            await upstream.get(URL)
+        tasks = asyncio.all_tasks()
+
+        call = asyncio.ensure_future(upstream.get(URL))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+
+        assert [task for task in asyncio.all_tasks() - tasks if not task.done()] == []
+        assert upstream.stats()["state"] == "closed"
+
+
+class TestServerUpstream:
+    """Server calls go through the upstream wrappers"""
+
+    @pytest.mark.asyncio
+    async def test_forecast_fails_fast_when_open(self):
+        """An open forecast circuit fails the call without a request"""
+        fake = FakeUpstream([], default=(0.0, 503))
+        client = fake.client()
+        with patch("server.get_http_client", return_value=client):
+            for _ in range(server.UPSTREAM_FAILURE_THRESHOLD):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await server.get_weather_data(55.75, 37.6, 1)
+            with pytest.raises(CircuitOpenError):
+                await server.get_weather_data(55.75, 37.6, 1)
+
+        assert fake.requests == server.UPSTREAM_FAILURE_THRESHOLD
+        assert server.geocoding_upstream.stats()["state"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_open_geocoding_is_not_unknown_city(self):
+        """An open geocoding circuit is not reported as a city that was not found"""
+        for _ in range(server.UPSTREAM_FAILURE_THRESHOLD):
+            server.geocoding_upstream.breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            await server.get_city_coordinates("Atlantis")
+        with pytest.raises(server.McpError) as error:
+            await server.get_today_weather("Atlantis")
+
+        assert error.value.error.code == server.INTERNAL_ERROR
+        assert "unavailable" in error.value.error.message
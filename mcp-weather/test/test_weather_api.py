@@ -3,10 +3,11 @@
 Pytest tests for MCP weather server with Open-Meteo API integration.
 """
 
+import json
 import pytest
 import sys
 import os
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 
 # Add the parent folder to the path for importing server.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,6 +23,7 @@ from server import (
     get_today_weather,
     get_weekly_forecast
 )
+import server
 
 
 # Mock data for tests
@@ -72,12 +74,12 @@ class TestCityCoordinates:
     @pytest.mark.asyncio
     async def test_get_city_coordinates_success(self):
         """Test of successful receipt of coordinates"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = MOCK_GEOCODING_RESPONSE
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_city_coordinates("Moscow")
             
@@ -87,12 +89,12 @@ class TestCityCoordinates:
     @pytest.mark.asyncio
     async def test_get_city_coordinates_not_found(self):
         """Test when the city is not found"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = {"results": []}
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_city_coordinates("UnknownCity")
             
@@ -101,8 +103,8 @@ class TestCityCoordinates:
     @pytest.mark.asyncio
     async def test_get_city_coordinates_http_error(self):
         """HTTP error handling test"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = httpx.HTTPStatusError(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.side_effect = httpx.HTTPStatusError(
                 "404 Not Found", 
                 request=Mock(), 
                 response=Mock()
@@ -119,12 +121,12 @@ class TestWeatherData:
     @pytest.mark.asyncio
     async def test_get_weather_data_success(self):
         """Test of successful weather data retrieval"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = MOCK_WEATHER_RESPONSE
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_weather_data(55.7558, 37.6176, 3)
             
@@ -133,26 +135,52 @@ class TestWeatherData:
     @pytest.mark.asyncio
     async def test_get_weather_data_http_error(self):
         """Testing HTTP error handling when retrieving weather"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = httpx.HTTPStatusError(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.side_effect = httpx.HTTPStatusError(
                 "500 Internal Server Error",
                 request=Mock(),
-                response=Mock()
+                response=Mock(status_code=500)
             )
             
             with pytest.raises(httpx.HTTPStatusError):
                 await get_weather_data(55.7558, 37.6176, 1)
 
 
+class TestHttpClientPool:
+    """Tests for the shared Open-Meteo HTTP client"""
+
+    @pytest.mark.asyncio
+    async def test_get_http_client_is_shared(self):
+        """The same pooled client is reused between calls"""
+        client = server.get_http_client()
+        try:
+            assert server.get_http_client() is client
+            assert client.timeout.connect == server.HTTP_CONNECT_TIMEOUT
+            assert client.timeout.read == server.HTTP_READ_TIMEOUT
+        finally:
+            await server.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_lifespan_opens_and_closes_client(self):
+        """The lifespan opens the client on startup and closes it on shutdown"""
+        async with server.lifespan(server.app):
+            client = server._http_client
+            assert client is not None
+            assert not client.is_closed
+
+        assert client.is_closed
+        assert server._http_client is None
+
+
 class TestWeatherCodeConversion:
     """Weather code conversion tests"""
     
     def test_weather_code_to_description_known_codes(self):
         """Test conversion of known codes"""
         assert weather_code_to_description(0) == "clear"
-        assert weather_code_to_description(3) == "cloudy"
+        assert weather_code_to_description(3) == "overcast"
         assert weather_code_to_description(61) == "light rain"
-        assert weather_code_to_description(95) == "storm"
+        assert weather_code_to_description(95) == "thunderstorm"
     
     def test_weather_code_to_description_unknown_code(self):
         """Unknown code conversion test"""
@@ -181,7 +209,7 @@ class TestRealWeatherData:
             }
             assert len(result['forecast']) == 3
             assert result['current_weather']['temperature'] == -5
-            assert result['current_weather']['condition'] == "cloudy"
+            assert result['current_weather']['condition'] == "overcast"
     
     @pytest.mark.asyncio
     async def test_get_real_weather_data_city_not_found(self):
@@ -208,7 +236,7 @@ class TestMCPTools:
             'current_time': '2024-01-15 12:00 UTC',
             'current_weather': {
                 'temperature': -5,
-                'condition': 'пасмурно',
+                'condition': 'overcast',
                 'humidity': 78,
                 'wind_speed': 4,
                 'pressure': 1013
@@ -218,7 +246,7 @@ class TestMCPTools:
                 'weekday': 'Monday',
                 'day_temp': -2,
                 'night_temp': -9,
-                'condition': 'пасмурно',
+                'condition': 'overcast',
                 'wind_speed': 7,
                 'precipitation_chance': 20
             }]
@@ -231,8 +259,8 @@ class TestMCPTools:
             
             assert "Moscow" in result
             assert "-5°C" in result
-            assert "cloudy" in result
-            assert "Open-Meteo API" in result
+            assert "overcast" in result
+            assert "Data provided by Open-Meteo API" in result
     
     @pytest.mark.asyncio
     async def test_get_today_weather_empty_city(self):
@@ -252,7 +280,7 @@ class TestMCPTools:
             'current_time': '2024-01-15 12:00 UTC',
             'current_weather': {
                 'temperature': 8,
-                'condition': 'облачно',
+                'condition': 'cloudy',
                 'humidity': 85,
                 'wind_speed': 6,
                 'pressure': 1015
@@ -263,7 +291,7 @@ class TestMCPTools:
                     'weekday': 'Monday',
                     'day_temp': 10,
                     'night_temp': 5,
-                    'condition': 'облачно',
+                    'condition': 'cloudy',
                     'wind_speed': 8,
                     'precipitation_chance': 40
                 },
@@ -272,7 +300,7 @@ class TestMCPTools:
                     'weekday': 'Tuesday',
                     'day_temp': 12,
                     'night_temp': 7,
-                    'condition': 'дождь',
+                    'condition': 'rain',
                     'wind_speed': 10,
                     'precipitation_chance': 70
                 }
@@ -285,8 +313,8 @@ class TestMCPTools:
             result = await get_weekly_forecast("London")
             
             assert "London" in result
-            assert "прогноз" in result.lower()
-            assert "Open-Meteo API" in result
+            assert "forecast" in result.lower()
+            assert "Data provided by Open-Meteo API" in result
     
     @pytest.mark.asyncio
     async def test_get_weekly_forecast_whitespace_city(self):
@@ -297,13 +325,166 @@ class TestMCPTools:
         assert exc_info.value.error.code == INVALID_PARAMS
 
 
+class TestOutputFormats:
+    """Tests for the compact output mode"""
+
+    @pytest.fixture
+    def weather_data(self):
+        return server.parse_weather_data(
+            "Moscow", 55.7558, 37.6176, MOCK_WEATHER_RESPONSE
+        )
+
+    @pytest.mark.asyncio
+    async def test_today_compact(self, weather_data):
+        """The compact mode returns terse JSON with short keys"""
+        with patch('server.get_real_weather_data', return_value=weather_data):
+            result = await get_today_weather("Moscow", output_format="compact")
+
+        data = json.loads(result)
+        assert data["city"] == "Moscow"
+        assert data["ll"] == [55.76, 37.62]
+        assert data["now"] == {"t": -5, "c": "overcast", "h": 78, "w": 4, "p": 1013}
+        assert data["daily"]["hi"] == [-2, 0, 2]
+
+    @pytest.mark.asyncio
+    async def test_weekly_compact_uses_arrays(self, weather_data):
+        """Daily values of the weekly forecast are arrays"""
+        with patch('server.get_real_weather_data', return_value=weather_data):
+            result = await get_weekly_forecast("Moscow", output_format="compact")
+
+        data = json.loads(result)
+        assert "now" not in data
+        assert data["daily"]["d"] == ["2024-01-15", "2024-01-16", "2024-01-17"]
+        assert data["daily"]["c"] == ["overcast", "light rain", "clear"]
+        assert data["daily"]["pp"] == [20, 80, 10]
+
+    @pytest.mark.asyncio
+    async def test_compact_is_shorter(self, weather_data):
+        """The compact output is shorter than the text output"""
+        with patch('server.get_real_weather_data', return_value=weather_data):
+            text = await get_weekly_forecast("Moscow", output_format="text")
+            compact = await get_weekly_forecast("Moscow", output_format="compact")
+
+        assert len(compact) < len(text)
+
+    @pytest.mark.asyncio
+    async def test_server_default_format(self, weather_data):
+        """The server-wide format applies when the caller does not choose one"""
+        with patch('server.get_real_weather_data', return_value=weather_data), \
+             patch.object(server, 'WEATHER_OUTPUT_FORMAT', 'compact'):
+            result = await get_today_weather("Moscow")
+
+        assert json.loads(result)["city"] == "Moscow"
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self):
+        """An unknown format is rejected"""
+        with pytest.raises(McpError) as exc_info:
+            await get_today_weather("Moscow", output_format="xml")
+
+        assert exc_info.value.error.code == INVALID_PARAMS
+
+
+class TestWeatherForCities:
+    """Tests for the multi-city weather tool"""
+
+    COORDINATES = {
+        "Moscow": (55.7558, 37.6176),
+        "Kazan": (55.7887, 49.1221),
+        "Sochi": (43.6028, 39.7342),
+    }
+
+    @staticmethod
+    async def fake_coordinates(city_name):
+        return TestWeatherForCities.COORDINATES.get(city_name)
+
+    @pytest.mark.asyncio
+    async def test_get_weather_data_batch_params(self):
+        """Several locations are requested with comma-separated coordinates"""
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_response = Mock()
+            mock_response.json.return_value = [MOCK_WEATHER_RESPONSE] * 2
+            mock_response.raise_for_status.return_value = None
+            mock_client.return_value.get.return_value = mock_response
+
+            result = await server.get_weather_data_batch(
+                [(55.75, 37.6), (55.8, 49.1)], 1
+            )
+
+            params = mock_client.return_value.get.call_args.kwargs["params"]
+            assert params["latitude"] == "55.75,55.8"
+            assert params["longitude"] == "37.6,49.1"
+            assert len(result) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_weather_data_batch_single_location(self):
+        """A single-location response object is wrapped in a list"""
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_response = Mock()
+            mock_response.json.return_value = MOCK_WEATHER_RESPONSE
+            mock_response.raise_for_status.return_value = None
+            mock_client.return_value.get.return_value = mock_response
+
+            result = await server.get_weather_data_batch([(55.75, 37.6)], 1)
+
+            assert result == [MOCK_WEATHER_RESPONSE]
+
+    @pytest.mark.asyncio
+    async def test_cities_use_one_request(self):
+        """All cities are fetched with one upstream request"""
+        with patch('server.get_city_coordinates', side_effect=self.fake_coordinates), \
+             patch('server.get_weather_data_batch') as mock_batch:
+            mock_batch.return_value = [MOCK_WEATHER_RESPONSE] * 3
+
+            result = await server.get_weather_for_cities(
+                ["Moscow", "Kazan", "Sochi", "Atlantis"]
+            )
+
+            mock_batch.assert_awaited_once()
+            assert len(mock_batch.call_args.args[0]) == 3
+            for city in ["Moscow", "Kazan", "Sochi"]:
+                assert city in result
+            assert "Atlantis: city not found" in result
+
+    @pytest.mark.asyncio
+    async def test_cached_cities_are_not_refetched(self):
+        """Only cities missing from the forecast cache are requested"""
+        with patch('server.get_city_coordinates', side_effect=self.fake_coordinates), \
+             patch('server.get_weather_data_batch') as mock_batch:
+            mock_batch.return_value = [MOCK_WEATHER_RESPONSE]
+            await server.get_weather_for_cities(["Moscow"])
+
+            mock_batch.return_value = [MOCK_WEATHER_RESPONSE]
+            await server.get_weather_for_cities(["Moscow", "Kazan"])
+
+            assert mock_batch.await_count == 2
+            assert mock_batch.call_args.args[0] == [server.snap_to_grid(55.7887, 49.1221)]
+
+    @pytest.mark.asyncio
+    async def test_empty_city_list(self):
+        """An empty list is rejected"""
+        with pytest.raises(McpError) as exc_info:
+            await server.get_weather_for_cities(["", "  "])
+
+        assert exc_info.value.error.code == INVALID_PARAMS
+
+    @pytest.mark.asyncio
+    async def test_too_many_cities(self):
+        """The number of cities per call is limited"""
+        cities = [f"City {i}" for i in range(server.MAX_BATCH_CITIES + 1)]
+        with pytest.raises(McpError) as exc_info:
+            await server.get_weather_for_cities(cities)
+
+        assert exc_info.value.error.code == INVALID_PARAMS
+
+
 class TestIntegration:
     """Integration tests"""
     
     @pytest.mark.asyncio
     async def test_full_weather_flow(self):
         """Testing the full weather stream"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             # Setting up mocks for two calls: geocoding and weather
             mock_responses = [
                 Mock(json=lambda: MOCK_GEOCODING_RESPONSE),
@@ -313,7 +494,7 @@ class TestIntegration:
             for mock_response in mock_responses:
                 mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.side_effect = mock_responses
+            mock_client.return_value.get.side_effect = mock_responses
             
             result = await get_today_weather("Moscow")
             
@@ -322,7 +503,7 @@ class TestIntegration:
             assert "55.76" in result  # Координаты
             assert "37.62" in result
             assert "-5°C" in result   # Температура
-            assert "пасмурно" in result  # Условия
+            assert "overcast" in result  # Условия
             assert "78%" in result    # Влажность
     
     @pytest.mark.asyncio
@@ -344,12 +525,12 @@ class TestEdgeCases:
     @pytest.mark.asyncio
     async def test_unicode_city_names(self):
         """City Names Unicode Test"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = MOCK_GEOCODING_RESPONSE
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             # Тестируем различные unicode символы
             unicode_cities = ["Москва", "北京", "العربية", "München"]
@@ -0,0 +1,342 @@
+"""
+Resilient calls to the Open-Meteo APIs.
+
+CircuitBreaker makes calls fail fast while an upstream keeps failing,
+instead of every call waiting for its own timeout. Upstream wraps GET
+requests with a breaker and optional hedging: when the first request has
+not answered within the recent p95 latency, an identical second request
+is sent and whichever answers first wins.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"Upstream '{name}' is unavailable, retry in {retry_after:.0f} s"
+        )
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout` seconds. Then a single trial
+    call is let through: its success closes the circuit, its failure opens
+    it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        """Closes the circuit and resets the counters"""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self) -> None:
+        """
+        Checks that a call may be made.
+
+        Raises:
+            CircuitOpenError: The circuit is open
+        """
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._trial_in_flight = True
+
+    def release(self) -> None:
+        """Forgets a call that was cancelled before it had an outcome"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        """Records a successful call"""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Records a failed call"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if (
+            self.state == self.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the state and counters"""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Tells whether an error means that the upstream is unhealthy.
+
+    Network errors, timeouts, 5xx and 429 responses count; other 4xx
+    responses are the caller's problem and do not trip the breaker.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, httpx.TransportError)
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful requests"""
+
+    def __init__(self, size: int = 200):
+        self._samples: "deque[float]" = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        """Adds a sample"""
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns the q-quantile of the window.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Latency in seconds or None if the window is empty
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Upstream:
+    """
+    GET requests to one upstream API through a circuit breaker, with
+    optional hedging.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        get_client: Callable[[], httpx.AsyncClient],
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedging: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedge_min_samples: int = 20,
+        observe: Optional[Callable[[float, str], None]] = None,
+        budget: Optional[Any] = None,
+        cached: Optional[Callable[[httpx.Request], Optional[httpx.Response]]] = None
+    ):
+        """
+        Args:
+            name: Upstream name for errors and statistics
+            get_client: Returns the HTTP client to use
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open
+            hedging: Send a second request when the first is slow
+            hedge_quantile: Latency quantile after which to hedge
+            hedge_min_delay: Lower bound of the hedging delay, seconds
+            hedge_min_samples: Latency samples needed before hedging
+            observe: Called with the latency of every finished request
+                and its outcome, "ok" or "error"
+            budget: Rate budget (admission.UpstreamBudget) to wait on
+                before each call
+            cached: Returns a fresh HTTP cache response for a request, or
+                None (http_cache.fresh_response); hits are served before
+                the budget and the breaker and are not timed
+        """
+        self.name = name
+        self.get_client = get_client
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.observe = observe
+        self.budget = budget
+        self.cached = cached
+        self.latency = LatencyWindow()
+        self.cache_hits = 0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def reset(self) -> None:
+        """Closes the circuit and forgets latencies and counters"""
+        self.breaker.reset()
+        self.latency = LatencyWindow()
+        self.cache_hits = self.requests = 0
+        self.hedged = self.hedge_wins = self.hedges_skipped = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Returns the delay before a hedged request.
+
+        Returns:
+            Seconds, or None if hedging is off or there are too few samples
+        """
+        if not self.hedging or len(self.latency) < self.hedge_min_samples:
+            return None
+        return max(self.latency.quantile(self.hedge_quantile), self.hedge_min_delay)
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        Sends a GET request.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+
+        Returns:
+            Successful response
+
+        Raises:
+            CircuitOpenError: The circuit is open
+            McpError: The rate budget is exhausted
+            httpx.HTTPError: The request failed
+        """
+        if self.cached is not None:
+            response = self.cached(httpx.Request("GET", url, params=params))
+            if response is not None:
+                self.cache_hits += 1
+                return response
+
+        # An open circuit fails fast, without queueing for the shared budget
+        self.breaker.before_call()
+        if self.budget is not None:
+            try:
+                await self.budget.acquire()
+            except BaseException:
+                # Rejected or cancelled before the call: frees a half-open trial
+                self.breaker.release()
+                raise
+        self.requests += 1
+        try:
+            response = await self._get(url, params)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return response
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._send(url, params)
+
+        first = asyncio.ensure_future(self._send(url, params))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+
+            # A hedge is optional: it is only sent if the budget has a token to spare
+            if self.budget is not None and not self.budget.try_acquire():
+                self.hedges_skipped += 1
+                return await first
+            self.hedged += 1
+            second = asyncio.ensure_future(self._send(url, params))
+            pending = {first, second}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for call in done:
+                    if call.exception() is None:
+                        if call is second:
+                            self.hedge_wins += 1
+                        return call.result()
+                    error = call.exception()
+            raise error
+        finally:
+            # Also reached when the caller is cancelled while waiting
+            for call in pending:
+                call.cancel()
+
+    async def _send(self, url: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await self.get_client().get(url, params=params)
+            response.raise_for_status()
+        except Exception:
+            if self.observe is not None:
+                self.observe(time.monotonic() - started, "error")
+            raise
+        if response.extensions.get("cache") == "HIT":
+            # Filled by a concurrent request since get() checked the cache
+            return response
+        elapsed = time.monotonic() - started
+        self.latency.add(elapsed)
+        if self.observe is not None:
+            self.observe(elapsed, "ok")
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns circuit state, request and hedging counters and latency quantiles"""
+        p50 = self.latency.quantile(0.5)
+        p95 = self.latency.quantile(0.95)
+        return {
+            **self.breaker.stats(),
+            "cache_hits": self.cache_hits,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
@@ -8,6 +8,7 @@ from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from .health import add_health_routes
 from .host_agent import HostAgent, A2ACardResolver
 
 logger = logging.getLogger(__name__)
@@ -42,6 +43,8 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+add_health_routes(app)
+
 
 class AgentAddress(BaseModel):
     """Payload model for adding a new remote agent by its HTTP address."""
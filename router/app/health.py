@@ -0,0 +1,30 @@
+"""Liveness and readiness endpoints shared by the router servers.
+
+Both handlers only read in-process state: they open no A2A session, start
+no task and send no request, so orchestrators can probe them cheaply.
+"""
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from .host_agent import HostAgent
+
+HEALTH_PATHS = ('/healthz', '/readyz')
+HEALTHY_BODY = b'{"status":"ok"}'
+
+
+async def healthz(request: Request) -> Response:
+    """Liveness: the event loop answers."""
+    return Response(HEALTHY_BODY, media_type='application/json')
+
+
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness: 200 once the cards of all remote agents are resolved."""
+    state = HostAgent.readiness()
+    return JSONResponse(state, status_code=200 if state['ready'] else 503)
+
+
+def add_health_routes(app) -> None:
+    """Register /healthz and /readyz on a Starlette or FastAPI app."""
+    app.add_route('/healthz', healthz, methods=['GET'])
+    app.add_route('/readyz', readyz, methods=['GET'])
@@ -122,6 +122,16 @@ class HostAgent:
         agent_info = [json.dumps(ra) for ra in self.list_remote_agents()]
         HostAgent._global_agents = "\n".join(agent_info)
 
+    @classmethod
+    def readiness(cls) -> dict:
+        """Return agent card resolution state for readiness probes.
+
+        Only the shared registries are read; no card is fetched.
+        """
+        addresses = len(cls._global_addresses)
+        cards = len(cls._global_cards)
+        return {'ready': cards >= addresses, 'addresses': addresses, 'cards': cards}
+
     def create_agent(self) -> Agent:
         model_name = os.getenv("LLM_MODEL")
         api_base = os.getenv( "LLM_API_BASE")
@@ -15,6 +15,7 @@ from a2a.types import (
 from httpx import Timeout
 
 from .agent_executor import MyAgentExecutor
+from .health import HEALTH_PATHS, add_health_routes
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -35,6 +36,10 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware для логирования всех HTTP запросов и ответов"""
     
     async def dispatch(self, request: Request, call_next):
+        # Probes arrive every few seconds; keep them out of the log
+        if request.url.path in HEALTH_PATHS:
+            return await call_next(request)
+
         # Logging the incoming request
         start_time = datetime.now()
         
@@ -108,6 +113,7 @@ async def async_main(host, port, phoenix, remote_agent_addresses):
             )
             
             starlette_app = server.build()
+            add_health_routes(starlette_app)
             
             # Add logging middleware (first to catch all requests)
             starlette_app.add_middleware(RequestLoggingMiddleware)
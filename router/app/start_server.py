@@ -185,10 +185,10 @@ def status():
     import requests
     
     servers = [
-        ("Unified Server (A2A)", "http://localhost:10000/health", "A2A protocol"),
+        ("Unified Server (A2A)", "http://localhost:10000/healthz", "A2A protocol"),
+        ("Unified Server (Ready)", "http://localhost:10000/readyz", "Remote agent cards resolved"),
         ("Unified Server (Mgmt)", "http://localhost:10000/mgm/agents", "Agent management"),
-        ("Legacy A2A Server", "http://localhost:10000/health", "A2A protocol server"),
-        ("Legacy FastAPI Server", "http://localhost:8000/agents", "Dynamic agent management")
+        ("Legacy FastAPI Server", "http://localhost:8000/healthz", "Dynamic agent management")
     ]
     
     logger.info("🔍 Checking server status...")
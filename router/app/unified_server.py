@@ -22,6 +22,7 @@ from a2a.types import (
 from httpx import Timeout
 
 from .agent_executor import MyAgentExecutor
+from .health import HEALTH_PATHS, healthz, readyz
 from .host_agent import HostAgent, A2ACardResolver
 from dotenv import load_dotenv
 import os
@@ -47,6 +48,10 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware for logging all HTTP requests and responses"""
     
     async def dispatch(self, request: Request, call_next):
+        # Probes arrive every few seconds; keep them out of the log
+        if request.url.path in HEALTH_PATHS:
+            return await call_next(request)
+
         # Logging the incoming request
         start_time = datetime.now()
         
@@ -277,8 +282,13 @@ async def create_unified_app(
         Route('/mgm/agents/{agent_name}', remove_agent, methods=['DELETE']),
     ]
     
+    health_routes = [
+        Route('/healthz', healthz, methods=['GET']),
+        Route('/readyz', readyz, methods=['GET']),
+    ]
+
     # Let's create the main application
-    routes = mgm_routes + [
+    routes = mgm_routes + health_routes + [
         Mount('/', a2a_app)  # A2A application handles all other paths
     ]
     
@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 
 from app.fastapi_host_server import app
 from a2a.types import AgentCard
+from app.host_agent import HostAgent
 
 pytestmark = pytest.mark.asyncio
 
@@ -74,4 +75,21 @@ async def test_add_duplicate_agent(mock_agent_card: AgentCard):
             # Attempt to add the same agent again
             response = client.post("/agents", json={"address": mock_agent_card.url})
             assert response.status_code == status.HTTP_400_BAD_REQUEST
-            assert "already registered" in response.json()["detail"] 
\ No newline at end of file
+            assert "already registered" in response.json()["detail"] 
+
+async def test_health_endpoints(host_agent: HostAgent, mock_agent_card: AgentCard):
+    """
+    Tests that /healthz always answers and /readyz waits for agent cards.
+    """
+    with TestClient(app) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+
+        HostAgent._global_addresses.append(mock_agent_card.url)
+        not_ready = client.get("/readyz")
+        assert not_ready.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert not_ready.json() == {"ready": False, "addresses": 1, "cards": 0}
+
+        host_agent.register_agent_card(mock_agent_card)
+        ready = client.get("/readyz")
+        assert ready.status_code == status.HTTP_200_OK
+        assert ready.json()["ready"] is True